@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""Array-backed OHLCV candle series (no external deps).
+
+Replaces the list of per-candle dicts built by snapshot_mtf.klines_to_candles:
+one array('q') of open times (epoch ms) and five array('d') price/volume
+columns, i.e. 48 bytes per candle instead of a dict + 5 floats + an ISO string.
+
+- series[a:b] is a zero-copy view over the same arrays (step 1 only)
+- series.column("close") / .closes etc. return a zero-copy memoryview
+  (buffer export: indexable, iterable, .tolist(), memoryview(...).cast(...))
+- series[i] returns a Candle view that still answers c["close"], c["ts_utc"],
+  so code written against the dict form keeps working
+- append() extends the series; if the arrays are shared with a view or a
+  live memoryview, they are copied first so nobody sees them change
+
+Legacy JSON: to_dicts() / json_default (for json.dumps(..., default=json_default)).
+"""
+
+from __future__ import annotations
+
+from array import array
+from datetime import datetime, timezone
+from typing import Any, Iterator, Optional, Sequence, Union
+
+FIELDS = ("ts_utc", "open", "high", "low", "close", "volume")
+COLUMNS = ("ts_ms", "open", "high", "low", "close", "volume")
+TYPECODES = {"ts_ms": "q", "open": "d", "high": "d", "low": "d", "close": "d", "volume": "d"}
+
+
+def iso_utc(ms: int) -> str:
+    return datetime.fromtimestamp(ms / 1000.0, tz=timezone.utc).isoformat()
+
+
+def _parse_iso_ms(ts: str) -> int:
+    return int(round(datetime.fromisoformat(ts).timestamp() * 1000))
+
+
+class Candle:
+    """Read-only view of one candle with the legacy dict interface."""
+
+    __slots__ = ("_cols", "_i")
+
+    def __init__(self, cols: dict, i: int):
+        self._cols = cols
+        self._i = i
+
+    @property
+    def ts_ms(self) -> int:
+        return self._cols["ts_ms"][self._i]
+
+    def __getitem__(self, key: str) -> Any:
+        if key == "ts_utc":
+            return iso_utc(self._cols["ts_ms"][self._i])
+        return self._cols[key][self._i]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self) -> tuple:
+        return FIELDS
+
+    def to_dict(self) -> dict:
+        return {k: self[k] for k in FIELDS}
+
+    def __repr__(self) -> str:
+        return f"Candle({self.to_dict()!r})"
+
+
+class CandleSeries:
+    __slots__ = ("_cols", "_start", "_stop")
+
+    def __init__(self, cols: Optional[dict] = None, start: int = 0, stop: Optional[int] = None):
+        if cols is None:
+            cols = {name: array(TYPECODES[name]) for name in COLUMNS}
+        self._cols = cols
+        self._start = start
+        self._stop = len(cols["ts_ms"]) if stop is None else stop
+
+    # --- construction ---
+
+    @classmethod
+    def from_klines(cls, klines: list[list]) -> "CandleSeries":
+        """REST kline rows [openTime, open, high, low, close, volume, closeTime, ...]."""
+        return cls(
+            {
+                "ts_ms": array("q", [int(k[0]) for k in klines]),
+                "open": array("d", [float(k[1]) for k in klines]),
+                "high": array("d", [float(k[2]) for k in klines]),
+                "low": array("d", [float(k[3]) for k in klines]),
+                "close": array("d", [float(k[4]) for k in klines]),
+                "volume": array("d", [float(k[5]) for k in klines]),
+            }
+        )
+
+    @classmethod
+    def from_dicts(cls, candles: Sequence[dict]) -> "CandleSeries":
+        cols = {name: array(TYPECODES[name]) for name in COLUMNS}
+        cols["ts_ms"].extend(_parse_iso_ms(c["ts_utc"]) for c in candles)
+        for name in COLUMNS[1:]:
+            cols[name].extend(float(c[name]) for c in candles)
+        return cls(cols)
+
+    @classmethod
+    def from_columns(cls, block: dict) -> "CandleSeries":
+        """snapshot_codec columns (arrays or lists); arrays are shared, not copied."""
+        cols = {}
+        for name in COLUMNS:
+            v = block[name]
+            cols[name] = v if isinstance(v, array) and v.typecode == TYPECODES[name] else array(TYPECODES[name], v)
+        return cls(cols)
+
+    # --- sequence protocol ---
+
+    def __len__(self) -> int:
+        return self._stop - self._start
+
+    def __bool__(self) -> bool:
+        return self._stop > self._start
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[Candle, "CandleSeries"]:
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            if step != 1:
+                raise ValueError("CandleSeries slices must have step 1")
+            return CandleSeries(self._cols, self._start + start, self._start + max(start, stop))
+        n = len(self)
+        if key < 0:
+            key += n
+        if not 0 <= key < n:
+            raise IndexError("candle index out of range")
+        return Candle(self._cols, self._start + key)
+
+    def __iter__(self) -> Iterator[Candle]:
+        cols = self._cols
+        for i in range(self._start, self._stop):
+            yield Candle(cols, i)
+
+    # --- columns ---
+
+    def column(self, name: str) -> memoryview:
+        """Zero-copy view of one column ("ts_ms", "open", ..., "volume")."""
+        return memoryview(self._cols[name])[self._start : self._stop]
+
+    @property
+    def ts_ms(self) -> memoryview:
+        return self.column("ts_ms")
+
+    @property
+    def opens(self) -> memoryview:
+        return self.column("open")
+
+    @property
+    def highs(self) -> memoryview:
+        return self.column("high")
+
+    @property
+    def lows(self) -> memoryview:
+        return self.column("low")
+
+    @property
+    def closes(self) -> memoryview:
+        return self.column("close")
+
+    @property
+    def volumes(self) -> memoryview:
+        return self.column("volume")
+
+    def ts_utc(self, i: int) -> str:
+        return self[i]["ts_utc"]
+
+    def columns(self) -> dict:
+        """Owned array copies of this view (e.g. for snapshot_codec)."""
+        return {name: self._cols[name][self._start : self._stop] for name in COLUMNS}
+
+    # --- mutation ---
+
+    def copy(self) -> "CandleSeries":
+        return CandleSeries(self.columns())
+
+    def append(self, ts_ms: int, o: float, h: float, l: float, c: float, v: float = 0.0) -> None:
+        vals = (ts_ms, o, h, l, c, v)
+        cols = self._cols
+        if self._start != 0 or self._stop != len(cols["ts_ms"]):
+            cols = self.columns()  # a view: detach from the shared arrays before growing
+        else:
+            done = []
+            try:
+                for name, x in zip(COLUMNS, vals):
+                    cols[name].append(x)
+                    done.append(name)
+                self._stop += 1
+                return
+            except BufferError:
+                # a memoryview of one of our arrays is alive: copy-on-write
+                for name in done:
+                    cols[name].pop()
+                cols = self.columns()
+        for name, x in zip(COLUMNS, vals):
+            cols[name].append(x)
+        self._cols = cols
+        self._start = 0
+        self._stop = len(cols["ts_ms"])
+
+    # --- legacy form ---
+
+    def to_dicts(self) -> list[dict]:
+        ts, o, h, lo, c, v = (self.column(name) for name in COLUMNS)
+        return [
+            {
+                "ts_utc": iso_utc(ts[i]),
+                "open": o[i],
+                "high": h[i],
+                "low": lo[i],
+                "close": c[i],
+                "volume": v[i],
+            }
+            for i in range(len(self))
+        ]
+
+    def __repr__(self) -> str:
+        return f"CandleSeries(n={len(self)})"
+
+
+def json_default(obj: Any) -> Any:
+    """json.dumps(default=...) hook: series -> legacy list of candle dicts."""
+    if isinstance(obj, CandleSeries):
+        return obj.to_dicts()
+    if isinstance(obj, Candle):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def column(candles: Union[CandleSeries, Sequence[dict]], name: str) -> Sequence[float]:
+    """One column from either a CandleSeries (zero-copy) or a legacy list of dicts."""
+    if isinstance(candles, CandleSeries):
+        return candles.column(name)
+    return [float(c[name]) for c in candles]
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""Exchange-aligned clock for candle-boundary scheduling (no external deps).
+
+Measures the offset between the local clock and Binance server time
+(/api/v3/time, weight 1) NTP-style: offset = server - midpoint(send, receive),
+keeping the sample with the smallest round trip. now_ms() is then exchange
+time, so sleep_until(next_boundary_ms(tf)) wakes when a TF candle closes on
+the exchange rather than on a drifting local clock / cron tick.
+
+Example:
+  python3 skills/trading-bot/scripts/exchange_clock.py --samples 5 --tf 15m
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import threading
+import time
+from typing import Optional
+
+import kline_cache
+import snapshot_mtf
+
+
+def fetch_server_time_ms(timeout_s: float = 5.0) -> int:
+    last_err: Exception | None = None
+    for base in snapshot_mtf.BINANCE_BASE_URLS:
+        try:
+            snapshot_mtf.REQUEST_LIMITER.acquire(1)
+            data = snapshot_mtf.fetch_json(f"{base}/api/v3/time", timeout_s=timeout_s)
+            return int(data["serverTime"])  # type: ignore[index]
+        except Exception as e:
+            last_err = e
+    raise last_err  # type: ignore[misc]
+
+
+class ExchangeClock:
+    def __init__(self, samples: int = 5):
+        self.samples = samples
+        self.offset_ms = 0.0
+        self.rtt_ms: Optional[float] = None
+        self.stopped = threading.Event()
+
+    def sync(self) -> float:
+        """Re-measure the offset; keeps the previous one if every sample fails."""
+        best: Optional[tuple[float, float]] = None
+        for _ in range(self.samples):
+            try:
+                t0 = time.time() * 1000.0
+                server = fetch_server_time_ms()
+                t1 = time.time() * 1000.0
+            except Exception:
+                continue
+            rtt = t1 - t0
+            if best is None or rtt < best[0]:
+                best = (rtt, server - (t0 + t1) / 2.0)
+        if best is not None:
+            self.rtt_ms, self.offset_ms = best
+        return self.offset_ms
+
+    def now_ms(self) -> int:
+        return int(time.time() * 1000.0 + self.offset_ms)
+
+    def next_boundary_ms(self, tf: str, now_ms: Optional[int] = None) -> int:
+        step = kline_cache.interval_ms(tf)
+        if step is None:
+            raise ValueError(f"unsupported interval: {tf}")
+        now = self.now_ms() if now_ms is None else now_ms
+        return (now // step + 1) * step
+
+    def sleep_until(self, target_ms: int) -> bool:
+        """Sleep until exchange time reaches target_ms; False if stop() was called."""
+        while not self.stopped.is_set():
+            remaining = (target_ms - self.now_ms()) / 1000.0
+            if remaining <= 0:
+                return True
+            # wake up slightly early for long waits so the final approach is precise
+            self.stopped.wait(remaining if remaining < 1.0 else remaining - 0.5)
+        return False
+
+    def stop(self) -> None:
+        self.stopped.set()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--samples", type=int, default=5)
+    ap.add_argument("--tf", default="15m")
+    args = ap.parse_args()
+
+    clock = ExchangeClock(samples=args.samples)
+    clock.sync()
+    nxt = clock.next_boundary_ms(args.tf)
+    out = {
+        "module": "exchange_clock",
+        "offset_ms": round(clock.offset_ms, 1),
+        "rtt_ms": round(clock.rtt_ms, 1) if clock.rtt_ms is not None else None,
+        "next_close_utc": snapshot_mtf.iso_utc(nxt),
+        "seconds_to_close": round((nxt - clock.now_ms()) / 1000.0, 3),
+    }
+    print(json.dumps(out, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""Shared HTTP(S) client with keep-alive connection reuse and gzip (no external deps).
+
+`urlopen` opens a new TCP+TLS connection per request. Here idle connections are
+pooled per (scheme, host, port) and reused across requests and threads, and
+responses are requested gzip-compressed. Every Binance fetcher in the repo goes
+through get_json().
+
+A pooled connection the server has already closed fails on first use; that
+request is retried once on a fresh connection.
+"""
+
+from __future__ import annotations
+
+import gzip
+import http.client
+import json
+import ssl
+import threading
+import zlib
+from urllib.parse import urlsplit
+
+DEFAULT_HEADERS = {
+    "User-Agent": "openclaw-trading-bot",
+    "Accept-Encoding": "gzip, deflate",
+    "Connection": "keep-alive",
+}
+
+# idle connections kept per host (matches the widest fetch thread pools)
+MAX_IDLE_PER_HOST = 16
+
+_STALE_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.CannotSendRequest,
+    http.client.BadStatusLine,
+    ConnectionResetError,
+    BrokenPipeError,
+)
+
+
+class HttpError(Exception):
+    """Non-2xx response; keeps status and headers (e.g. Retry-After on 429/418)."""
+
+    def __init__(self, url: str, status: int, reason: str, headers: dict, body: bytes):
+        super().__init__(f"HTTP Error {status}: {reason}")
+        self.url = url
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+
+
+class ConnectionPool:
+    def __init__(self, max_idle_per_host: int = MAX_IDLE_PER_HOST):
+        self.max_idle = max_idle_per_host
+        self.idle: dict[tuple, list[http.client.HTTPConnection]] = {}
+        self.lock = threading.Lock()
+        self.ssl_context = ssl.create_default_context()
+
+    def _new(self, key: tuple, timeout_s: float) -> http.client.HTTPConnection:
+        scheme, host, port = key
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port, timeout=timeout_s, context=self.ssl_context)
+        return http.client.HTTPConnection(host, port, timeout=timeout_s)
+
+    def acquire(
+        self, key: tuple, timeout_s: float, fresh: bool = False
+    ) -> tuple[http.client.HTTPConnection, bool]:
+        """Return (connection, reused); `fresh` skips the idle pool."""
+        conn = None
+        if not fresh:
+            with self.lock:
+                conns = self.idle.get(key)
+                conn = conns.pop() if conns else None
+        if conn is None:
+            return self._new(key, timeout_s), False
+        conn.timeout = timeout_s
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout_s)
+        return conn, True
+
+    def release(self, key: tuple, conn: http.client.HTTPConnection) -> None:
+        with self.lock:
+            conns = self.idle.setdefault(key, [])
+            if len(conns) < self.max_idle:
+                conns.append(conn)
+                return
+        conn.close()
+
+    def close_all(self) -> None:
+        with self.lock:
+            conns = [c for cs in self.idle.values() for c in cs]
+            self.idle.clear()
+        for c in conns:
+            c.close()
+
+
+POOL = ConnectionPool()
+
+
+def _decode(body: bytes, encoding: str) -> bytes:
+    encoding = (encoding or "").lower()
+    if encoding == "gzip":
+        return gzip.decompress(body)
+    if encoding == "deflate":
+        return zlib.decompress(body)
+    return body
+
+
+def get(url: str, timeout_s: float, headers: dict | None = None) -> bytes:
+    """GET `url` over a pooled connection; return the decoded body."""
+    parts = urlsplit(url)
+    scheme = parts.scheme or "https"
+    port = parts.port or (443 if scheme == "https" else 80)
+    key = (scheme, parts.hostname, port)
+    path = parts.path or "/"
+    if parts.query:
+        path += "?" + parts.query
+    hdrs = dict(DEFAULT_HEADERS)
+    if headers:
+        hdrs.update(headers)
+
+    for attempt in range(2):
+        conn, reused = POOL.acquire(key, timeout_s, fresh=attempt > 0)
+        try:
+            conn.request("GET", path, headers=hdrs)
+            resp = conn.getresponse()
+            raw = resp.read()
+        except _STALE_ERRORS:
+            conn.close()
+            if reused:
+                continue  # server dropped the idle connection; retry on a fresh one
+            raise
+        except Exception:
+            conn.close()
+            raise
+
+        if resp.will_close:
+            conn.close()
+        else:
+            POOL.release(key, conn)
+
+        body = _decode(raw, resp.getheader("Content-Encoding", ""))
+        if not 200 <= resp.status < 300:
+            raise HttpError(url, resp.status, resp.reason, dict(resp.getheaders()), body)
+        return body
+
+    raise http.client.RemoteDisconnected("connection closed by server")
+
+
+def get_json(url: str, timeout_s: float, headers: dict | None = None) -> object:
+    return json.loads(get(url, timeout_s, headers).decode("utf-8"))
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""Streaming (incremental) RSI / EMA / WMA with serialisable state (no external deps).
+
+Each indicator updates in O(1) per new close and reproduces the batch functions
+in snapshot_mtf.py (`rsi`, `ema`, `wma`) value for value when fed the same series:
+- Rsi: Wilder smoothing, first value after `length` changes
+- Ema: SMA seed over the first `length` values, then k = 2/(length+1)
+- Wma: running plain + weighted sums instead of rebuilding the window per bar
+
+RsiMaChain wires them the way compute_indicators does (RSI14 -> EMA9/WMA45 of
+RSI, missing RSI filled with the previous value, 50 before the first one).
+
+State is persisted as JSON (see load_chains/save_chains) so a run only pushes
+the candles that closed since the previous run.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from collections import deque
+from pathlib import Path
+from typing import Optional
+
+
+class Ema:
+    def __init__(self, length: int):
+        if length <= 0:
+            raise ValueError("length must be > 0")
+        self.length = length
+        self.k = 2 / (length + 1)
+        self.count = 0
+        self.seed_sum = 0.0
+        self.value: Optional[float] = None
+
+    def update(self, x: float) -> Optional[float]:
+        self.count += 1
+        if self.value is None:
+            self.seed_sum += x
+            if self.count == self.length:
+                self.value = self.seed_sum / self.length
+            return self.value
+        self.value = x * self.k + self.value * (1 - self.k)
+        return self.value
+
+    def peek(self, x: float) -> Optional[float]:
+        """Value if `x` were pushed, without changing state."""
+        if self.value is None:
+            if self.count + 1 == self.length:
+                return (self.seed_sum + x) / self.length
+            return None
+        return x * self.k + self.value * (1 - self.k)
+
+    def to_dict(self) -> dict:
+        return {"length": self.length, "count": self.count, "seed_sum": self.seed_sum, "value": self.value}
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "Ema":
+        o = cls(int(d["length"]))
+        o.count = int(d["count"])
+        o.seed_sum = float(d["seed_sum"])
+        o.value = d["value"]
+        return o
+
+
+class Wma:
+    # recompute the running sums from the window every N pushes to cap float drift
+    RESYNC_EVERY = 4096
+
+    def __init__(self, length: int):
+        if length <= 0:
+            raise ValueError("length must be > 0")
+        self.length = length
+        self.denom = length * (length + 1) / 2
+        self.window: deque[float] = deque(maxlen=length)
+        self.sum = 0.0  # sum(v)
+        self.wsum = 0.0  # sum(i * v_i), i = 1 (oldest) .. length (newest)
+        self.pushes = 0
+
+    def update(self, x: float) -> Optional[float]:
+        n = len(self.window)
+        if n == self.length:
+            # shifting weights down by one subtracts sum(v); the oldest drops out at weight 0
+            self.wsum += self.length * x - self.sum
+            self.sum += x - self.window[0]
+        else:
+            self.wsum += (n + 1) * x
+            self.sum += x
+        self.window.append(x)
+
+        self.pushes += 1
+        if self.pushes % self.RESYNC_EVERY == 0:
+            self.sum = sum(self.window)
+            self.wsum = sum(i * v for i, v in enumerate(self.window, start=1))
+
+        return self.value
+
+    @property
+    def value(self) -> Optional[float]:
+        if len(self.window) < self.length:
+            return None
+        return self.wsum / self.denom
+
+    def peek(self, x: float) -> Optional[float]:
+        n = len(self.window)
+        if n == self.length:
+            return (self.wsum + (self.length * x - self.sum)) / self.denom
+        if n + 1 == self.length:
+            return (self.wsum + self.length * x) / self.denom
+        return None
+
+    def to_dict(self) -> dict:
+        return {
+            "length": self.length,
+            "window": list(self.window),
+            "sum": self.sum,
+            "wsum": self.wsum,
+            "pushes": self.pushes,
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "Wma":
+        o = cls(int(d["length"]))
+        o.window.extend(float(v) for v in d["window"])
+        o.sum = float(d["sum"])
+        o.wsum = float(d["wsum"])
+        o.pushes = int(d["pushes"])
+        return o
+
+
+class Rsi:
+    def __init__(self, length: int = 14):
+        self.length = length
+        self.prev: Optional[float] = None
+        self.count = 0  # number of changes seen
+        self.avg_gain = 0.0  # running sum until seeded, Wilder average afterwards
+        self.avg_loss = 0.0
+        self.value: Optional[float] = None
+
+    @staticmethod
+    def _calc(ag: float, al: float) -> float:
+        if al == 0:
+            return 100.0
+        rs = ag / al
+        return 100.0 - (100.0 / (1.0 + rs))
+
+    def _step(self, x: float) -> tuple[int, float, float, Optional[float]]:
+        if self.prev is None:
+            return 0, 0.0, 0.0, None
+        change = x - self.prev
+        gain = max(change, 0.0)
+        loss = max(-change, 0.0)
+        n = self.length
+        count = self.count + 1
+        if count < n:
+            return count, self.avg_gain + gain, self.avg_loss + loss, None
+        if count == n:
+            ag = (self.avg_gain + gain) / n
+            al = (self.avg_loss + loss) / n
+        else:
+            ag = (self.avg_gain * (n - 1) + gain) / n
+            al = (self.avg_loss * (n - 1) + loss) / n
+        return count, ag, al, self._calc(ag, al)
+
+    def update(self, x: float) -> Optional[float]:
+        self.count, self.avg_gain, self.avg_loss, self.value = self._step(x)
+        self.prev = x
+        return self.value
+
+    def peek(self, x: float) -> Optional[float]:
+        return self._step(x)[3]
+
+    def to_dict(self) -> dict:
+        return {
+            "length": self.length,
+            "prev": self.prev,
+            "count": self.count,
+            "avg_gain": self.avg_gain,
+            "avg_loss": self.avg_loss,
+            "value": self.value,
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "Rsi":
+        o = cls(int(d["length"]))
+        o.prev = d["prev"]
+        o.count = int(d["count"])
+        o.avg_gain = float(d["avg_gain"])
+        o.avg_loss = float(d["avg_loss"])
+        o.value = d["value"]
+        return o
+
+
+class RsiMaChain:
+    """RSI(rsi_len) -> EMA(ema_len) and WMA(wma_len) of the filled RSI series."""
+
+    def __init__(self, rsi_len: int = 14, ema_len: int = 9, wma_len: int = 45):
+        self.rsi = Rsi(rsi_len)
+        self.ema = Ema(ema_len)
+        self.wma = Wma(wma_len)
+        self.fill = 50.0
+        self.last_ts: Optional[str] = None
+
+    def update(self, close: float, ts: Optional[str] = None) -> tuple:
+        r = self.rsi.update(close)
+        if r is not None:
+            self.fill = float(r)
+        self.ema.update(self.fill)
+        self.wma.update(self.fill)
+        self.last_ts = ts
+        return r, self.ema.value, self.wma.value
+
+    def peek(self, close: float) -> tuple:
+        r = self.rsi.peek(close)
+        filled = self.fill if r is None else float(r)
+        return r, self.ema.peek(filled), self.wma.peek(filled)
+
+    def sync(self, candles: list[dict]) -> tuple:
+        """Push the closed candles not seen yet; return (rsi, ema, wma) at the last candle.
+
+        The last candle is treated as still open (Binance returns the live candle
+        last) and only peeked. If our last pushed candle is no longer in the window
+        the chain is reseeded from the full window.
+        """
+        closed = candles[:-1]
+        start = None
+        if self.last_ts is not None:
+            for i in range(len(closed) - 1, -1, -1):
+                if closed[i]["ts_utc"] == self.last_ts:
+                    start = i + 1
+                    break
+        if start is None:
+            self.__init__(self.rsi.length, self.ema.length, self.wma.length)
+            start = 0
+
+        for c in closed[start:]:
+            self.update(float(c["close"]), c["ts_utc"])
+
+        if not candles:
+            return None, None, None
+        return self.peek(float(candles[-1]["close"]))
+
+    def to_dict(self) -> dict:
+        return {
+            "rsi": self.rsi.to_dict(),
+            "ema": self.ema.to_dict(),
+            "wma": self.wma.to_dict(),
+            "fill": self.fill,
+            "last_ts": self.last_ts,
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "RsiMaChain":
+        o = cls()
+        o.rsi = Rsi.from_dict(d["rsi"])
+        o.ema = Ema.from_dict(d["ema"])
+        o.wma = Wma.from_dict(d["wma"])
+        o.fill = float(d["fill"])
+        o.last_ts = d.get("last_ts")
+        return o
+
+
+def chain_key(symbol: str, tf: str) -> str:
+    return f"{symbol.upper()}:{tf}"
+
+
+def load_chains(path: Path | str) -> dict[str, RsiMaChain]:
+    p = Path(path)
+    if not p.exists():
+        return {}
+    try:
+        data = json.loads(p.read_text(encoding="utf-8"))
+        return {k: RsiMaChain.from_dict(v) for k, v in data.get("chains", {}).items()}
+    except Exception:
+        # bad state only costs a reseed from the candle window
+        return {}
+
+
+def save_chains(path: Path | str, chains: dict[str, RsiMaChain]) -> None:
+    p = Path(path)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    tmp = p.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(
+        json.dumps({"version": 1, "chains": {k: c.to_dict() for k, c in chains.items()}}),
+        encoding="utf-8",
+    )
+    os.replace(tmp, p)
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""Vectorised RSI / EMA / WMA and the RSI -> EMA9/WMA45 chain (NumPy optional).
+
+Inputs are 1-D (bars) or 2-D (symbols x bars) arrays of closes. All rows must be
+aligned and of equal length (pad/trim per symbol before calling). Outputs have
+the same shape; warm-up bars are NaN.
+
+- WMA: `length` shifted multiply-adds over the whole array (no per-bar window).
+- EMA / Wilder RSI smoothing are linear recurrences y = a*y_prev + (1-a)*x; they
+  are solved in fixed-size blocks with one small matrix multiply per block, so
+  the Python loop runs n/BLOCK times instead of n times and every row of a 2-D
+  input is processed in the same call.
+
+Without NumPy every function falls back to the pure-Python implementations in
+snapshot_mtf.py row by row (lists in, lists out, None for warm-up). Both paths
+agree within float tolerance (~1e-9).
+
+Backend switch (snapshot_mtf.compute_indicators, backtest_15m.py,
+walkforward_15m.py, sweep_signal.py, bench.py): --indicators auto|numpy|python
+or env TRADING_INDICATORS. auto = NumPy when installed, and for
+compute_indicators only from VEC_MIN_BARS closes (the live 210-bar windows are
+faster in pure Python); python = the original loops; numpy = always NumPy
+(error when it is missing).
+
+peek_columns() vectorises RsiMaChain.peek for every bar of a replay (the HTF
+chain fed the candles closed so far, peeked at the current 15m close), which
+is what backtest_15m.indicator_columns computes bar by bar.
+
+Example:
+  python3 skills/trading-bot/scripts/indicators_vec.py --bars 100000 --symbols 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import time
+from contextlib import contextmanager
+
+import snapshot_mtf
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+HAS_NUMPY = np is not None
+
+BACKENDS = ("auto", "numpy", "python")
+# compute_indicators under auto: NumPy's fixed per-call cost only pays off from here
+VEC_MIN_BARS = 500
+
+_CONFIG = {"backend": os.environ.get("TRADING_INDICATORS") or "auto"}
+
+# Bars per recurrence block. a**BLOCK must stay far from underflow for the
+# smoothing factors we use (0.8**128 ~ 4e-13, (13/14)**128 ~ 8e-5).
+BLOCK = 128
+
+
+def add_arguments(ap: argparse.ArgumentParser) -> None:
+    ap.add_argument(
+        "--indicators",
+        choices=BACKENDS,
+        default=os.environ.get("TRADING_INDICATORS") or "auto",
+        help="indicator backend: NumPy when installed (auto), or force numpy / python",
+    )
+
+
+def configure(backend: str = "auto") -> None:
+    if backend not in BACKENDS:
+        raise ValueError(f"unknown indicator backend: {backend} ({', '.join(BACKENDS)})")
+    if backend == "numpy" and not HAS_NUMPY:
+        raise RuntimeError("indicator backend numpy: NumPy is not installed")
+    _CONFIG["backend"] = backend
+
+
+@contextmanager
+def use(backend: str):
+    """configure(backend) for the duration of a with-block."""
+    saved = _CONFIG["backend"]
+    configure(backend)
+    try:
+        yield
+    finally:
+        _CONFIG["backend"] = saved
+
+
+def active(bars: int | None = None) -> bool:
+    """Use the NumPy path? `bars`: window size, applies the VEC_MIN_BARS cut-off of auto."""
+    backend = _CONFIG["backend"]
+    if not HAS_NUMPY or backend == "python":
+        return False
+    return backend == "numpy" or bars is None or bars >= VEC_MIN_BARS
+
+
+def backend_name() -> str:
+    return "numpy" if active() else "python"
+
+
+def as_list(values) -> list:
+    """1-D series as a list with None for warm-up (the pure-Python layout)."""
+    if isinstance(values, list):
+        return values
+    return [None if v != v else v for v in values.tolist()]
+
+
+def _rows(values) -> tuple[list[list[float]], bool]:
+    """Normalise pure-Python input to a list of rows; report whether it was 1-D."""
+    if values and isinstance(values[0], (list, tuple)):
+        return [list(r) for r in values], False
+    return [list(values)], True
+
+
+def _py_apply(fn, values, *args):
+    rows, flat = _rows(values)
+    out = [fn(r, *args) for r in rows]
+    return out[0] if flat else out
+
+
+def _linear_filter(x, alpha: float, y0):
+    """y[t] = (1 - alpha) * y[t-1] + alpha * x[t] along the last axis, y[-1] = y0."""
+    a = 1.0 - alpha
+    n = x.shape[-1]
+    out = np.empty_like(x)
+    if n == 0:
+        return out
+    b = min(BLOCK, n)
+    t = np.arange(b)
+    lag = t[:, None] - t[None, :]
+    # M[t, j] = alpha * a**(t-j) for j <= t
+    m = np.where(lag >= 0, alpha * a ** np.maximum(lag, 0), 0.0)
+    carry = a ** (t + 1)
+    y_prev = np.asarray(y0, dtype=float)
+    for s in range(0, n, b):
+        e = min(s + b, n)
+        k = e - s
+        blk = x[..., s:e] @ m[:k, :k].T + y_prev[..., None] * carry[:k]
+        out[..., s:e] = blk
+        y_prev = blk[..., -1]
+    return out
+
+
+def _np_ema(x, length: int):
+    out = np.full(x.shape, np.nan)
+    n = x.shape[-1]
+    if n < length:
+        return out
+    seed = x[..., :length].sum(axis=-1) / length
+    out[..., length - 1] = seed
+    k = 2 / (length + 1)
+    out[..., length:] = _linear_filter(x[..., length:], k, seed)
+    return out
+
+
+def _np_wma(x, length: int):
+    out = np.full(x.shape, np.nan)
+    n = x.shape[-1]
+    if n < length:
+        return out
+    m = n - length + 1
+    acc = np.zeros(x.shape[:-1] + (m,))
+    for i in range(length):
+        acc += (i + 1) * x[..., i : i + m]
+    out[..., length - 1 :] = acc / (length * (length + 1) / 2)
+    return out
+
+
+def _np_rsi_avgs(x, length: int):
+    """Wilder average gain / loss after each close (NaN before index `length`)."""
+    ag_out = np.full(x.shape, np.nan)
+    al_out = np.full(x.shape, np.nan)
+    n = x.shape[-1]
+    if n <= length:
+        return ag_out, al_out
+    change = np.diff(x, axis=-1)
+    gain = np.maximum(change, 0.0)
+    loss = np.maximum(-change, 0.0)
+
+    ag0 = gain[..., :length].sum(axis=-1) / length
+    al0 = loss[..., :length].sum(axis=-1) / length
+    alpha = 1.0 / length
+    ag_out[..., length:] = np.concatenate([ag0[..., None], _linear_filter(gain[..., length:], alpha, ag0)], axis=-1)
+    al_out[..., length:] = np.concatenate([al0[..., None], _linear_filter(loss[..., length:], alpha, al0)], axis=-1)
+    return ag_out, al_out
+
+
+def _np_rsi_value(ag, al):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r = 100.0 - 100.0 / (1.0 + ag / al)
+    return np.where(al == 0, 100.0, r)
+
+
+def _np_rsi(x, length: int):
+    ag, al = _np_rsi_avgs(x, length)
+    return np.where(np.isnan(al), np.nan, _np_rsi_value(ag, al))
+
+
+def ema(values, length: int):
+    if length <= 0:
+        raise ValueError("length must be > 0")
+    if not active():
+        return _py_apply(snapshot_mtf.ema, values, length)
+    return _np_ema(np.asarray(values, dtype=float), length)
+
+
+def wma(values, length: int):
+    if not active():
+        return _py_apply(snapshot_mtf.wma, values, length)
+    return _np_wma(np.asarray(values, dtype=float), length)
+
+
+def rsi(values, length: int = 14):
+    if not active():
+        return _py_apply(snapshot_mtf.rsi, values, length)
+    return _np_rsi(np.asarray(values, dtype=float), length)
+
+
+def _py_chain(closes: list[float], rsi_len: int, ema_len: int, wma_len: int):
+    r = snapshot_mtf.rsi(closes, rsi_len)
+    filled: list[float] = []
+    last_val = 50.0
+    for v in r:
+        if v is not None:
+            last_val = float(v)
+        filled.append(last_val)
+    return r, snapshot_mtf.ema(filled, ema_len), snapshot_mtf.wma(filled, wma_len)
+
+
+def rsi_ma_chain(closes, rsi_len: int = 14, ema_len: int = 9, wma_len: int = 45):
+    """RSI, EMA(RSI), WMA(RSI) series with compute_indicators' fill rule (50 before first RSI)."""
+    if not active():
+        rows, flat = _rows(closes)
+        out = [_py_chain(r, rsi_len, ema_len, wma_len) for r in rows]
+        if flat:
+            return out[0]
+        return tuple([o[i] for o in out] for i in range(3))
+
+    x = np.asarray(closes, dtype=float)
+    r = _np_rsi(x, rsi_len)
+    # rows are aligned, so warm-up NaNs are exactly the leading bars
+    filled = np.where(np.isnan(r), 50.0, r)
+    return r, _np_ema(filled, ema_len), _np_wma(filled, wma_len)
+
+
+def peek_columns(closed, counts, x, rsi_len: int = 14, ema_len: int = 9, wma_len: int = 45):
+    """(RSI, EMA, WMA) arrays: for every i, RsiMaChain fed closed[:counts[i]] then peek(x[i]).
+
+    NumPy only. NaN where the chain would return None (not warmed up yet).
+    """
+    h = np.asarray(closed, dtype=float)
+    c = np.asarray(counts, dtype=np.int64)
+    x = np.asarray(x, dtype=float)
+    nan = np.full(x.shape, np.nan)
+    if h.size == 0:
+        return nan, nan.copy(), nan.copy()
+    last = np.clip(c - 1, 0, None)  # index of the newest closed candle
+    has_prev = c >= 1
+
+    # RSI: one more Wilder step from the averages after closed[c-1]
+    n = rsi_len
+    ag, al = _np_rsi_avgs(h, n)
+    change = np.where(has_prev, x - h[last], 0.0)
+    gain = np.maximum(change, 0.0)
+    loss = np.maximum(-change, 0.0)
+    steps = np.diff(h)
+    seed_g = np.maximum(steps[: n - 1], 0.0).sum() if h.size >= n else 0.0
+    seed_l = np.maximum(-steps[: n - 1], 0.0).sum() if h.size >= n else 0.0
+    pg = np.where(c > n, (ag[last] * (n - 1) + gain) / n, (seed_g + gain) / n)
+    pl = np.where(c > n, (al[last] * (n - 1) + loss) / n, (seed_l + loss) / n)
+    r = np.where(c >= n, _np_rsi_value(pg, pl), np.nan)
+
+    # the filled RSI the EMA / WMA would see
+    r_closed = _np_rsi(h, n)
+    filled = np.where(np.isnan(r_closed), 50.0, r_closed)
+    f = np.where(np.isnan(r), np.where(has_prev, filled[last], 50.0), r)
+
+    k = 2 / (ema_len + 1)
+    e_closed = _np_ema(filled, ema_len)
+    seed_sum = np.concatenate([[0.0], np.cumsum(filled)])[np.minimum(c, h.size)]
+    e = np.where(c >= ema_len, f * k + e_closed[last] * (1 - k), np.nan)
+    e = np.where(c == ema_len - 1, (seed_sum + f) / ema_len, e)
+
+    # WMA: the weighted sum of the newest wma_len-1 filled values + weight wma_len for f
+    denom = wma_len * (wma_len + 1) / 2
+    if wma_len > 1:
+        ws = _np_wma(filled, wma_len - 1) * ((wma_len - 1) * wma_len / 2)
+        w = np.where(c >= wma_len - 1, (ws[last] + wma_len * f) / denom, np.nan)
+    else:
+        w = f.copy()
+    return r, e, w
+
+
+def main() -> None:
+    import random
+
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--bars", type=int, default=100_000)
+    ap.add_argument("--symbols", type=int, default=1)
+    add_arguments(ap)
+    args = ap.parse_args()
+    configure(args.indicators)
+
+    rnd = random.Random(7)
+    rows = []
+    for _ in range(args.symbols):
+        p, row = 100.0, []
+        for _ in range(args.bars):
+            p *= 1 + rnd.gauss(0, 0.003)
+            row.append(p)
+        rows.append(row)
+
+    t0 = time.perf_counter()
+    rsi_ma_chain(rows if args.symbols > 1 else rows[0])
+    dt = time.perf_counter() - t0
+    print(f"backend={backend_name()} symbols={args.symbols} bars={args.bars} chain_s={dt:.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+"""Indexed event journal for bot events, decisions and trades (SQLite, no external deps).
+
+Replaces the append-only CSVs; every writer goes through record():
+- events    (trades_15m.csv schema): cron_15m_bot.py, apply_15m_decision.py
+- decisions (decisions.csv schema):  log_decision.py
+- trades    (trades.csv schema):     manual / LLM trade log
+
+One table per kind with the CSV columns, the id column UNIQUE (re-running a
+writer with the same event_id / decision_id / trade_id is a no-op) and
+indexes on symbol, action and the candle / snapshot ts, so "all CLOSE events
+this month" or "open decisions" stay index lookups at millions of rows. Same
+WAL database settings as state_store.py (trading/journal.db by default).
+
+The legacy CSV of a kind is imported the first time its table is written
+(rows from older schemas, e.g. events without bias1h/4h/1d, exit or
+position_id, are realigned); the CSVs themselves are now exports. Columns added to a kind
+later are appended to existing tables when the journal is opened.
+
+Example:
+  python3 skills/trading-bot/scripts/journal.py query events --action CLOSE --since 2026-10-01
+  python3 skills/trading-bot/scripts/journal.py query decisions --action OPEN --format csv
+  python3 skills/trading-bot/scripts/journal.py export events --out /tmp/trades_15m.csv
+  python3 skills/trading-bot/scripts/journal.py import events trading/trades_15m.csv
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import sys
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Iterable, Iterator, Optional
+
+from state_store import BUSY_TIMEOUT_S, connect
+
+DEFAULT_PATH = Path(__file__).resolve().parents[3] / "trading" / "journal.db"
+
+EVENT_COLUMNS = (
+    "event_id",
+    "event_ts_utc",
+    "symbol",
+    "action",
+    "side",
+    "tf_manage",
+    "entry",
+    "sl",
+    "size_btc",
+    "balance_usdt",
+    "risk_pct",
+    "risk_usdt",
+    "rsi15",
+    "ema9_rsi15",
+    "wma45_rsi15",
+    "bias15m",
+    "bias1h",
+    "bias4h",
+    "bias1d",
+    "snapshot_candle_ts_utc",
+    "notes",
+    "exit",  # fill price of a CLOSE (empty on OPEN and on rows journaled before it was added)
+    "position_id",  # portfolio.py position (empty for the one-position-per-symbol bot state)
+)
+# trades_15m.csv rows written before position_id / exit / bias1h/4h/1d were added
+EVENT_COLUMNS_V2 = EVENT_COLUMNS[:-1]
+EVENT_COLUMNS_V1 = EVENT_COLUMNS_V2[:-1]
+EVENT_COLUMNS_V0 = tuple(c for c in EVENT_COLUMNS_V1 if c not in ("bias1h", "bias4h", "bias1d"))
+
+DECISION_COLUMNS = (
+    "decision_id",
+    "decided_at_local",
+    "symbol",
+    "side",
+    "tf_trigger",
+    "setup",
+    "entry_trigger",
+    "sl",
+    "balance_usdt",
+    "risk_pct_balance",
+    "risk_usdt",
+    "position_size_base",
+    "notes",
+    "snapshot_ts_utc",
+    "price_snapshot",
+    "outcome",
+    "closed_at_local",
+    "exit",
+    "realized_pnl_usdt",
+)
+
+TRADE_COLUMNS = (
+    "trade_id",
+    "opened_at_local",
+    "symbol",
+    "side",
+    "tf_trigger",
+    "setup",
+    "entry",
+    "sl",
+    "balance_usdt",
+    "risk_pct_balance",
+    "risk_usdt",
+    "size_base",
+    "leverage",
+    "opened_reason",
+    "notes",
+    "closed_at_local",
+    "exit",
+    "realized_pnl_usdt",
+    "unrealized_pnl_usdt",
+    "snapshot_ts_utc",
+    "price_snapshot",
+)
+
+
+@dataclass(frozen=True)
+class Kind:
+    table: str
+    id: str
+    columns: tuple[str, ...]
+    ts: str  # candle / snapshot ts (ISO UTC): range filters and ordering
+    action: Optional[str] = None  # column behind --action
+    legacy: tuple[tuple[str, ...], ...] = ()
+
+
+KINDS = {
+    "events": Kind("events", "event_id", EVENT_COLUMNS, "snapshot_candle_ts_utc", "action", (EVENT_COLUMNS_V2, EVENT_COLUMNS_V1, EVENT_COLUMNS_V0)),
+    "decisions": Kind("decisions", "decision_id", DECISION_COLUMNS, "snapshot_ts_utc", "outcome"),
+    "trades": Kind("trades", "trade_id", TRADE_COLUMNS, "snapshot_ts_utc"),
+}
+
+
+def _schema(k: Kind) -> list[str]:
+    cols = ", ".join(f"{c} TEXT NOT NULL DEFAULT ''" for c in k.columns if c != k.id)
+    out = [
+        f"CREATE TABLE IF NOT EXISTS {k.table} (seq INTEGER PRIMARY KEY, {k.id} TEXT NOT NULL UNIQUE, {cols})",
+        f"CREATE INDEX IF NOT EXISTS {k.table}_symbol_ts ON {k.table} (symbol, {k.ts})",
+        f"CREATE INDEX IF NOT EXISTS {k.table}_ts ON {k.table} ({k.ts})",
+    ]
+    if k.action:
+        out.append(f"CREATE INDEX IF NOT EXISTS {k.table}_action_ts ON {k.table} ({k.action}, {k.ts})")
+    return out
+
+
+def _migrate(conn, k: Kind) -> None:
+    """Add columns appended to a kind since its table was created."""
+    have = {row[1] for row in conn.execute(f"PRAGMA table_info({k.table})")}
+    for c in k.columns:
+        if c not in have:
+            conn.execute(f"ALTER TABLE {k.table} ADD COLUMN {c} TEXT NOT NULL DEFAULT ''")
+
+
+def _kind(kind: str) -> Kind:
+    if kind not in KINDS:
+        raise ValueError(f"unknown journal kind: {kind} ({', '.join(KINDS)})")
+    return KINDS[kind]
+
+
+def _values(k: Kind, row: dict) -> tuple:
+    unknown = row.keys() - set(k.columns)
+    if unknown:
+        raise ValueError(f"{k.table}: unknown columns {sorted(unknown)}")
+    if not row.get(k.id):
+        raise ValueError(f"{k.table}: {k.id} is required")
+    return tuple("" if row.get(c) is None else str(row.get(c)) for c in k.columns)
+
+
+def read_csv(k: Kind, path: Path | str) -> Iterator[dict]:
+    """Rows of a legacy CSV; rows shorter than the header are matched to an older layout."""
+    with Path(path).open(newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if not header:
+            return
+        for rec in reader:
+            if not rec:
+                continue
+            cols = header if len(rec) == len(header) else next((c for c in k.legacy if len(c) == len(rec)), None)
+            if cols is None:
+                raise ValueError(f"{path}: row with {len(rec)} fields matches no known layout: {rec[:1]}")
+            yield {c: v for c, v in zip(cols, rec) if c in k.columns}
+
+
+class Journal:
+    """Journal tables in one SQLite file; one connection per thread."""
+
+    def __init__(self, path: Path | str = DEFAULT_PATH, busy_timeout_s: float = BUSY_TIMEOUT_S):
+        self.path = Path(path)
+        self.busy_timeout_s = busy_timeout_s
+        self._local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = connect(self.path, self.busy_timeout_s)
+            for k in KINDS.values():
+                for stmt in _schema(k):
+                    conn.execute(stmt)
+                _migrate(conn, k)
+            self._local.conn = conn
+        return conn
+
+    def record(self, kind: str, row: dict, legacy_csv: Path | str | None = None) -> bool:
+        """Insert one row; False if its id is already journaled (idempotent re-runs)."""
+        k = _kind(kind)
+        if legacy_csv:
+            self.import_legacy(kind, legacy_csv)
+        cur = self._conn().execute(
+            f"INSERT OR IGNORE INTO {k.table} ({', '.join(k.columns)}) VALUES ({', '.join('?' * len(k.columns))})",
+            _values(k, row),
+        )
+        return cur.rowcount == 1
+
+    def record_many(self, kind: str, rows: Iterable[dict]) -> int:
+        """Insert rows in one transaction; returns how many were new."""
+        k = _kind(kind)
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            before = conn.total_changes
+            conn.executemany(
+                f"INSERT OR IGNORE INTO {k.table} ({', '.join(k.columns)}) VALUES ({', '.join('?' * len(k.columns))})",
+                (_values(k, r) for r in rows),
+            )
+            n = conn.total_changes - before
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return n
+
+    def update(self, kind: str, row_id: str, fields: dict) -> bool:
+        """Set columns of an existing row (e.g. a decision's outcome / exit); False if missing."""
+        k = _kind(kind)
+        if not fields:
+            return False
+        vals = _values(k, {k.id: row_id, **fields})
+        cols = [c for c in k.columns if c in fields]
+        cur = self._conn().execute(
+            f"UPDATE {k.table} SET {', '.join(f'{c} = ?' for c in cols)} WHERE {k.id} = ?",
+            [vals[k.columns.index(c)] for c in cols] + [row_id],
+        )
+        return cur.rowcount == 1
+
+    def import_csv(self, kind: str, path: Path | str) -> int:
+        return self.record_many(kind, read_csv(_kind(kind), path))
+
+    def import_legacy(self, kind: str, path: Path | str) -> int:
+        """Import the legacy CSV once, while the table is still empty."""
+        k = _kind(kind)
+        if not Path(path).exists():
+            return 0
+        if self._conn().execute(f"SELECT 1 FROM {k.table} LIMIT 1").fetchone() is not None:
+            return 0
+        return self.import_csv(kind, path)
+
+    def query(
+        self,
+        kind: str,
+        symbol: Optional[str] = None,
+        action: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        where: Optional[dict] = None,
+        limit: Optional[int] = None,
+        desc: bool = False,
+    ) -> Iterator[dict]:
+        """Rows in candle-ts order; since / until are ISO prefixes ("2026-10", "2026-10-01T06")."""
+        k = _kind(kind)
+        conds, args = [], []
+        if symbol:
+            conds.append("symbol = ?")
+            args.append(symbol)
+        if action:
+            if not k.action:
+                raise ValueError(f"{k.table} has no action column")
+            conds.append(f"{k.action} = ?")
+            args.append(action)
+        if since:
+            conds.append(f"{k.ts} >= ?")
+            args.append(since)
+        if until:
+            # inclusive prefix: "2026-10-31" keeps every ts of that day
+            conds.append(f"{k.ts} < ?")
+            args.append(until + "\uffff")
+        for col, val in (where or {}).items():
+            if col not in k.columns:
+                raise ValueError(f"{k.table}: unknown column {col}")
+            conds.append(f"{col} = ?")
+            args.append(val)
+        sql = f"SELECT {', '.join(k.columns)} FROM {k.table}"
+        if conds:
+            sql += " WHERE " + " AND ".join(conds)
+        sql += f" ORDER BY {k.ts} {'DESC' if desc else 'ASC'}, seq {'DESC' if desc else 'ASC'}"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        for rec in self._conn().execute(sql, args):
+            yield dict(zip(k.columns, rec))
+
+    def scan(self, kind: str, after_seq: int = 0) -> Iterator[tuple[int, dict]]:
+        """(seq, row) in insertion order after `after_seq`; incremental readers keep the last seq."""
+        k = _kind(kind)
+        cur = self._conn().execute(f"SELECT seq, {', '.join(k.columns)} FROM {k.table} WHERE seq > ? ORDER BY seq", (int(after_seq),))
+        for rec in cur:
+            yield rec[0], dict(zip(k.columns, rec[1:]))
+
+    def last_seq(self, kind: str) -> int:
+        k = _kind(kind)
+        return self._conn().execute(f"SELECT COALESCE(MAX(seq), 0) FROM {k.table}").fetchone()[0]
+
+    def export_csv(self, kind: str, out: IO[str], **filters) -> int:
+        k = _kind(kind)
+        w = csv.DictWriter(out, fieldnames=list(k.columns))
+        w.writeheader()
+        n = 0
+        for row in self.query(kind, **filters):
+            w.writerow(row)
+            n += 1
+        return n
+
+
+_JOURNALS: dict[str, Journal] = {}
+
+
+def open_journal(path: Path | str = DEFAULT_PATH) -> Journal:
+    """Process-wide Journal per database file (keeps the connections open)."""
+    obj = _JOURNALS.get(str(path))
+    if obj is None:
+        # same file under another spelling -> same instance
+        obj = _JOURNALS.setdefault(str(Path(path).resolve()), Journal(path))
+        _JOURNALS[str(path)] = obj
+    return obj
+
+
+def parse_where(items: list[str]) -> dict:
+    out = {}
+    for item in items:
+        col, sep, val = item.partition("=")
+        if not sep:
+            raise SystemExit(f"--where expects COLUMN=VALUE, got {item!r}")
+        out[col] = val
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--db", default=str(DEFAULT_PATH))
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    for name in ("query", "export"):
+        p = sub.add_parser(name)
+        p.add_argument("kind", choices=list(KINDS))
+        p.add_argument("--symbol", default=None)
+        p.add_argument("--action", default=None, help="events: action; decisions: outcome")
+        p.add_argument("--since", default=None, help="candle / snapshot ts >= (ISO prefix)")
+        p.add_argument("--until", default=None, help="candle / snapshot ts <= (ISO prefix, inclusive)")
+        p.add_argument("--where", action="append", default=[], help="COLUMN=VALUE (repeatable)")
+        p.add_argument("--limit", type=int, default=None)
+        p.add_argument("--desc", action="store_true", help="newest first")
+        if name == "query":
+            p.add_argument("--format", choices=["json", "csv", "count"], default="json")
+        else:
+            p.add_argument("--out", required=True, help="CSV path ('-' = stdout)")
+
+    p = sub.add_parser("import")
+    p.add_argument("kind", choices=list(KINDS))
+    p.add_argument("csv")
+    args = ap.parse_args()
+
+    j = open_journal(args.db)
+    if args.cmd == "import":
+        n = j.import_csv(args.kind, args.csv)
+        print(json.dumps({"module": "journal", "version": "0.1", "kind": args.kind, "imported": n}, ensure_ascii=False))
+        return
+
+    filters = dict(
+        symbol=args.symbol,
+        action=args.action,
+        since=args.since,
+        until=args.until,
+        where=parse_where(args.where),
+        limit=args.limit,
+        desc=args.desc,
+    )
+    if args.cmd == "export":
+        if args.out == "-":
+            j.export_csv(args.kind, sys.stdout, **filters)
+        else:
+            with open(args.out, "w", newline="", encoding="utf-8") as f:
+                j.export_csv(args.kind, f, **filters)
+        return
+    if args.format == "csv":
+        j.export_csv(args.kind, sys.stdout, **filters)
+        return
+    rows = list(j.query(args.kind, **filters))
+    out = {"module": "journal", "version": "0.1", "kind": args.kind, "count": len(rows)}
+    if args.format == "json":
+        out["rows"] = rows
+    print(json.dumps(out, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""Persistent on-disk kline store with delta-only fetching (no external deps).
+
+One JSON file per (symbol, interval) holds the *closed* candles we already know.
+On each call we only ask Binance for candles newer than the last closed one we
+hold (the still-open candle always comes back with that delta), merge, persist
+the closed part and serve the requested window from disk.
+
+The store is shared by every local consumer (trading/cache/klines: cron_15m_bot,
+cron_15m_context, run_signal): the live candle is kept with the closed ones and
+reused for LIVE_TTL_S until the next close, under a per-file lock, so each
+candle is fetched once per host however many consumers run at a close.
+
+Used by snapshot_mtf.build_snapshot(cache_dir=...). Raw kline rows are stored
+unchanged: [ openTime, open, high, low, close, volume, closeTime, ... ].
+
+Example:
+  python3 skills/trading-bot/scripts/kline_cache.py --cache-dir trading/cache/klines \
+    --symbol BTCUSDT --interval 15m --limit 2000
+"""
+
+from __future__ import annotations
+
+import argparse
+import fcntl
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+
+# Binance caps /api/v3/klines at 1000 rows per request.
+MAX_PAGE = 1000
+
+# A candle counts as closed only once its closeTime is this far in the past,
+# so a local clock running slightly ahead never persists a still-moving candle.
+CLOSE_SETTLE_MS = 5_000
+
+# How long the fetched live candle is reused by other consumers (bounded by the
+# next close of its interval, after which it is no longer the live candle).
+LIVE_TTL_S = 30.0
+
+_UNIT_MS = {"m": 60_000, "h": 3_600_000, "d": 86_400_000, "w": 604_800_000}
+
+# fetch(symbol, interval, limit, start_ms=None, end_ms=None) -> kline rows
+Fetcher = Callable[..., list]
+
+
+def interval_ms(interval: str) -> Optional[int]:
+    """Milliseconds per candle, or None for calendar intervals (1M) we don't cache."""
+    unit = interval[-1:]
+    if unit not in _UNIT_MS or not interval[:-1].isdigit():
+        return None
+    return int(interval[:-1]) * _UNIT_MS[unit]
+
+
+def fetch_history(fetch: Fetcher, symbol: str, interval: str, limit: int) -> list[list]:
+    """Fetch the latest `limit` klines, paging backwards when limit > MAX_PAGE."""
+    if limit <= MAX_PAGE:
+        return fetch(symbol, interval, limit)
+
+    rows: list[list] = []
+    end_ms: Optional[int] = None
+    while len(rows) < limit:
+        page = fetch(symbol, interval, min(MAX_PAGE, limit - len(rows)), end_ms=end_ms)
+        if not page:
+            break
+        rows = page + rows
+        end_ms = int(page[0][0]) - 1
+        if len(page) < MAX_PAGE:
+            break  # reached the start of the listing
+    return rows[-limit:]
+
+
+def fetch_since(
+    fetch: Fetcher, symbol: str, interval: str, start_ms: int, step: int, now_ms: int
+) -> list[list]:
+    """Fetch every kline with openTime >= start_ms (including the open candle).
+
+    The page limit is sized to the expected number of new candles so the usual
+    1-2 candle delta is a light (low-weight, tiny body) request.
+    """
+    rows: list[list] = []
+    while True:
+        expected = max(0, (now_ms - start_ms) // step) + 2
+        page_limit = min(MAX_PAGE, expected)
+        page = fetch(symbol, interval, page_limit, start_ms=start_ms)
+        rows.extend(page)
+        if len(page) < page_limit or int(page[-1][0]) < start_ms:
+            return rows
+        start_ms = int(page[-1][0]) + 1
+
+
+class KlineCache:
+    """Kline store shared by every consumer on the host (bot, context, run_signal, scans).
+
+    Each (symbol, interval) file holds the closed candles plus the rows after
+    them (the live candle) as last fetched. Entries are keyed by the candle
+    boundary: until the next close of that interval the closed part is
+    complete, and the live row is served from the file for `live_ttl_s`
+    seconds, so consumers that run at the same close reuse one fetch instead
+    of each asking Binance. A per-file lock (flock) makes concurrent processes
+    wait for the one that is fetching rather than fetching in parallel.
+    """
+
+    def __init__(
+        self,
+        root: Path | str,
+        fetch: Fetcher,
+        max_rows: int = 20_000,
+        memory: bool = False,
+        live_ttl_s: float = LIVE_TTL_S,
+    ):
+        self.root = Path(root)
+        self.fetch = fetch
+        self.max_rows = max_rows
+        self.live_ttl_s = live_ttl_s
+        # long-running callers keep the parsed file in memory until its mtime changes
+        self.mem: Optional[dict[tuple[str, str], tuple[int, dict]]] = {} if memory else None
+
+    def path(self, symbol: str, interval: str) -> Path:
+        return self.root / f"{symbol.upper()}_{interval}.json"
+
+    def load_entry(self, symbol: str, interval: str) -> dict:
+        p = self.path(symbol, interval)
+        try:
+            mtime = p.stat().st_mtime_ns
+        except FileNotFoundError:
+            return {}
+        if self.mem is not None:
+            hit = self.mem.get((symbol, interval))
+            if hit is not None and hit[0] == mtime:
+                return hit[1]
+        try:
+            data = json.loads(p.read_text(encoding="utf-8"))
+            if not isinstance(data.get("klines"), list):
+                return {}
+        except Exception:
+            # a corrupt cache only costs one full refetch
+            return {}
+        if self.mem is not None:
+            self.mem[(symbol, interval)] = (mtime, data)
+        return data
+
+    def load(self, symbol: str, interval: str) -> list[list]:
+        return self.load_entry(symbol, interval).get("klines") or []
+
+    def save(
+        self,
+        symbol: str,
+        interval: str,
+        rows: list[list],
+        live: Optional[list[list]] = None,
+        fetched_ms: int = 0,
+        keep: int = 0,
+    ) -> None:
+        """Persist the closed rows, trimmed to max(max_rows, keep) (keep: rows already stored)."""
+        data = {"symbol": symbol, "interval": interval, "klines": rows[-max(self.max_rows, keep) :]}
+        if live:
+            data["live"] = live
+            data["fetched_ms"] = fetched_ms
+        p = self.path(symbol, interval)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        tmp = p.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps(data), encoding="utf-8")
+        os.replace(tmp, p)
+        if self.mem is not None:
+            self.mem[(symbol, interval)] = (p.stat().st_mtime_ns, data)
+
+    @contextmanager
+    def locked(self, symbol: str, interval: str) -> Iterator[None]:
+        p = self.path(symbol, interval).with_suffix(".lock")
+        p.parent.mkdir(parents=True, exist_ok=True)
+        with open(p, "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def get(self, symbol: str, interval: str, limit: int, now_ms: Optional[int] = None) -> list[list]:
+        """Return the latest `limit` klines (last one may still be open)."""
+        step = interval_ms(interval)
+        if step is None:
+            return fetch_history(self.fetch, symbol, interval, limit)
+
+        now = int(time.time() * 1000) if now_ms is None else now_ms
+        with self.locked(symbol, interval):
+            entry = self.load_entry(symbol, interval)
+            closed = entry.get("klines") or []
+            live = entry.get("live") or []
+
+            # same candle still open and fetched recently: served without a request
+            if (
+                live
+                and len(closed) + len(live) >= limit
+                and int(live[-1][0]) == now // step * step
+                and now - int(entry.get("fetched_ms", 0)) < self.live_ttl_s * 1000
+            ):
+                return (closed + live)[-limit:]
+
+            if closed and len(closed) >= limit - 1:
+                fresh = fetch_since(self.fetch, symbol, interval, int(closed[-1][0]) + step, step, now)
+            else:
+                # not enough history on disk yet: one full fetch seeds the store
+                fresh = fetch_history(self.fetch, symbol, interval, limit)
+
+            merged = {int(k[0]): k for k in closed}
+            for k in fresh:
+                merged[int(k[0])] = k
+            rows = [merged[t] for t in sorted(merged)]
+
+            n_closed = len(rows)
+            while n_closed and int(rows[n_closed - 1][6]) + CLOSE_SETTLE_MS > now:
+                n_closed -= 1
+            # a consumer with a smaller max_rows (the live bot) never shrinks a longer
+            # history another one (backtest) seeded; the store slides at that length
+            self.save(symbol, interval, rows[:n_closed], rows[n_closed:], now, keep=len(closed))
+
+        return rows[-limit:]
+
+
+def main() -> None:
+    import snapshot_mtf
+
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--cache-dir", required=True)
+    ap.add_argument("--symbol", default="BTCUSDT")
+    ap.add_argument("--interval", default="15m")
+    ap.add_argument("--limit", type=int, default=210)
+    args = ap.parse_args()
+
+    cache = KlineCache(args.cache_dir, snapshot_mtf.fetch_klines)
+    t0 = time.time()
+    rows = cache.get(args.symbol, args.interval, args.limit)
+    print(
+        json.dumps(
+            {
+                "symbol": args.symbol,
+                "interval": args.interval,
+                "rows": len(rows),
+                "stored": len(cache.load(args.symbol, args.interval)),
+                "elapsed_s": round(time.time() - t0, 3),
+            }
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+"""Binance kline WebSocket stream consumer (no external deps).
+
+Keeps a live kline buffer per timeframe (same row format as REST
+/api/v3/klines) from the combined `<symbol>@kline_<tf>` streams and calls
+`on_close(tf, stream)` as soon as the final (x=true) kline event of a candle
+arrives, instead of polling REST a minute after the close.
+
+- the buffers are seeded over REST (optionally through KlineCache)
+- on every (re)connect the REST delta since the last known candle is fetched,
+  so a disconnect never leaves a hole; a close that happened while
+  disconnected fires on_close once after the backfill
+- dropped connections / idle timeouts reconnect with exponential backoff
+- server pings are answered; each candle fires on_close at most once
+- optional per-event hooks: on_update(tf, row, closed) for every kline event
+  and on_trade(price, ts_ms) for `<symbol>@aggTrade` (subscribed only when
+  given), for consumers that act inside the candle (trading/exit_monitor.py)
+
+`url` can point at a local stand-in server (mock_kline_ws.py) for testing;
+tests/test_kline_stream.py runs the seed, close handoff and reconnect backfill
+against it (python3 -m pytest tests).
+
+Example:
+  python3 skills/trading-bot/scripts/kline_stream.py --symbol BTCUSDT --tfs 1d,4h,1h,15m
+  python3 skills/trading-bot/scripts/kline_stream.py --url ws://127.0.0.1:9443 --tfs 1m
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import hashlib
+import json
+import os
+import socket
+import ssl
+import struct
+import threading
+import time
+from typing import Callable, Optional
+from urllib.parse import urlsplit
+
+import kline_cache
+import snapshot_mtf
+
+STREAM_URL = "wss://stream.binance.com:9443"
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+OP_CONT, OP_TEXT, OP_BINARY, OP_CLOSE, OP_PING, OP_PONG = 0x0, 0x1, 0x2, 0x8, 0x9, 0xA
+
+
+# --- minimal RFC 6455 framing (shared with mock_kline_ws.py) ---
+
+
+def ws_accept(key: str) -> str:
+    return base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+
+
+def _mask(data: bytes, key: bytes) -> bytes:
+    n = len(data)
+    k = (key * (n // 4 + 1))[:n]
+    return (int.from_bytes(data, "big") ^ int.from_bytes(k, "big")).to_bytes(n, "big")
+
+
+def ws_frame(opcode: int, payload: bytes, mask: bool) -> bytes:
+    """One FIN frame; clients must mask, servers must not."""
+    n = len(payload)
+    mbit = 0x80 if mask else 0
+    head = bytes([0x80 | opcode])
+    if n < 126:
+        head += bytes([mbit | n])
+    elif n < 65536:
+        head += bytes([mbit | 126]) + struct.pack("!H", n)
+    else:
+        head += bytes([mbit | 127]) + struct.pack("!Q", n)
+    if mask:
+        key = os.urandom(4)
+        return head + key + _mask(payload, key)
+    return head + payload
+
+
+def _read_exact(rfile, n: int) -> bytes:
+    buf = rfile.read(n)
+    if buf is None or len(buf) < n:
+        raise ConnectionError("websocket closed")
+    return buf
+
+
+def ws_read_frame(rfile) -> tuple[bool, int, bytes]:
+    """Read one frame -> (fin, opcode, unmasked payload)."""
+    b0, b1 = _read_exact(rfile, 2)
+    n = b1 & 0x7F
+    if n == 126:
+        n = struct.unpack("!H", _read_exact(rfile, 2))[0]
+    elif n == 127:
+        n = struct.unpack("!Q", _read_exact(rfile, 8))[0]
+    key = _read_exact(rfile, 4) if b1 & 0x80 else None
+    payload = _read_exact(rfile, n) if n else b""
+    if key:
+        payload = _mask(payload, key)
+    return bool(b0 & 0x80), b0 & 0x0F, payload
+
+
+class WebSocket:
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self.rfile = sock.makefile("rb")
+        self.send_lock = threading.Lock()
+
+    @classmethod
+    def connect(cls, url: str, timeout_s: float = 10.0) -> "WebSocket":
+        parts = urlsplit(url)
+        secure = parts.scheme == "wss"
+        port = parts.port or (443 if secure else 80)
+        sock = socket.create_connection((parts.hostname, port), timeout=timeout_s)
+        if secure:
+            sock = ssl.create_default_context().wrap_socket(sock, server_hostname=parts.hostname)
+        path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        key = base64.b64encode(os.urandom(16)).decode()
+        req = (
+            f"GET {path} HTTP/1.1\r\nHost: {parts.hostname}:{port}\r\n"
+            "Upgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n"
+            "User-Agent: openclaw-trading-bot\r\n\r\n"
+        )
+        sock.sendall(req.encode())
+        ws = cls(sock)
+        status = ws.rfile.readline().decode("latin-1")
+        headers = {}
+        while True:
+            line = ws.rfile.readline().decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        if " 101 " not in status or headers.get("sec-websocket-accept") != ws_accept(key):
+            ws.close()
+            raise ConnectionError(f"websocket handshake failed: {status.strip()}")
+        return ws
+
+    def send(self, opcode: int, payload: bytes = b"") -> None:
+        with self.send_lock:
+            self.sock.sendall(ws_frame(opcode, payload, mask=True))
+
+    def recv(self) -> Optional[str]:
+        """Next text/binary message; None once the server closed the stream."""
+        parts: list[bytes] = []
+        while True:
+            fin, op, payload = ws_read_frame(self.rfile)
+            if op == OP_PING:
+                self.send(OP_PONG, payload)
+            elif op == OP_CLOSE:
+                try:
+                    self.send(OP_CLOSE, payload[:2])
+                except OSError:
+                    pass
+                return None
+            elif op in (OP_TEXT, OP_BINARY, OP_CONT):
+                parts.append(payload)
+                if fin:
+                    return b"".join(parts).decode("utf-8")
+
+    def close(self) -> None:
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+
+# --- kline buffers ---
+
+
+def event_to_row(k: dict) -> list:
+    """Kline event payload ("k") -> REST kline row."""
+    return [
+        int(k["t"]), k["o"], k["h"], k["l"], k["c"], k["v"], int(k["T"]),
+        k.get("q", "0"), int(k.get("n", 0)), k.get("V", "0"), k.get("Q", "0"), "0",
+    ]  # fmt: skip
+
+
+class KlineBuffer:
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.rows: list[list] = []
+        self.last_closed_ms: Optional[int] = None  # openTime of the newest closed candle
+
+    def apply(self, row: list, closed: bool) -> None:
+        t = int(row[0])
+        if not self.rows or t > int(self.rows[-1][0]):
+            self.rows.append(row)
+            if len(self.rows) > self.limit:
+                del self.rows[: len(self.rows) - self.limit]
+        elif t == int(self.rows[-1][0]):
+            self.rows[-1] = row
+        else:
+            # late update of an older candle (backfill overlap)
+            for i in range(len(self.rows) - 2, -1, -1):
+                if int(self.rows[i][0]) == t:
+                    self.rows[i] = row
+                    break
+                if int(self.rows[i][0]) < t:
+                    break
+        if closed and (self.last_closed_ms is None or t > self.last_closed_ms):
+            self.last_closed_ms = t
+
+    def last_closed(self) -> Optional[list]:
+        for row in reversed(self.rows):
+            if int(row[0]) == self.last_closed_ms:
+                return row
+        return None
+
+
+OnClose = Callable[[str, "KlineStream"], None]
+OnUpdate = Callable[[str, list, bool], None]
+OnTrade = Callable[[float, int], None]
+
+
+class KlineStream:
+    def __init__(
+        self,
+        symbol: str,
+        tfs: list[str],
+        limit: int,
+        on_close: OnClose,
+        url: str = STREAM_URL,
+        fetch: kline_cache.Fetcher = snapshot_mtf.fetch_klines,
+        cache: Optional[kline_cache.KlineCache] = None,
+        idle_timeout_s: float = 60.0,
+        max_backoff_s: float = 30.0,
+        on_update: Optional[OnUpdate] = None,
+        on_trade: Optional[OnTrade] = None,
+    ):
+        self.symbol = symbol.upper()
+        self.tfs = list(tfs)
+        self.limit = limit
+        self.on_close = on_close
+        self.url = url.rstrip("/")
+        self.fetch = fetch
+        self.cache = cache
+        self.idle_timeout_s = idle_timeout_s
+        self.max_backoff_s = max_backoff_s
+        self.buffers = {tf: KlineBuffer(limit + 1) for tf in self.tfs}
+        self.fired: dict[str, Optional[int]] = {tf: None for tf in self.tfs}
+        self.stream_tf = {f"{self.symbol.lower()}@kline_{tf}": tf for tf in self.tfs}
+        self.on_update = on_update
+        self.on_trade = on_trade
+        self.trade_stream = f"{self.symbol.lower()}@aggTrade" if on_trade is not None else None
+        self.stopped = threading.Event()
+        self.ws: Optional[WebSocket] = None
+        self.connects = 0
+        self.errors: list[str] = []
+
+    def stream_url(self) -> str:
+        streams = list(self.stream_tf) + ([self.trade_stream] if self.trade_stream else [])
+        return f"{self.url}/stream?streams=" + "/".join(streams)
+
+    # --- REST seeding / gap backfill ---
+
+    def backfill(self, now_ms: Optional[int] = None) -> list[str]:
+        """Fetch everything since the newest buffered candle; return TFs with a missed close."""
+        now = int(time.time() * 1000) if now_ms is None else now_ms
+        missed = []
+        for tf in self.tfs:
+            buf = self.buffers[tf]
+            step = kline_cache.interval_ms(tf)
+            if not buf.rows or step is None:
+                if self.cache is not None:
+                    rows = self.cache.get(self.symbol, tf, self.limit, now_ms=now)
+                else:
+                    rows = kline_cache.fetch_history(self.fetch, self.symbol, tf, self.limit)
+            else:
+                rows = kline_cache.fetch_since(self.fetch, self.symbol, tf, int(buf.rows[-1][0]), step, now)
+            for row in rows:
+                buf.apply(row, closed=int(row[6]) < now)
+            if self.fired[tf] is None:
+                self.fired[tf] = buf.last_closed_ms  # initial seed: nothing to report
+            elif buf.last_closed_ms is not None and buf.last_closed_ms > self.fired[tf]:
+                missed.append(tf)
+        return missed
+
+    # --- event handling ---
+
+    def handle_message(self, raw: str) -> Optional[str]:
+        """Apply one stream message; return the TF whose candle just closed, if any."""
+        msg = json.loads(raw)
+        data = msg.get("data", msg)
+        if not isinstance(data, dict):
+            return None
+        if data.get("e") == "aggTrade":
+            if self.on_trade is not None:
+                self.on_trade(float(data["p"]), int(data["T"]))
+            return None
+        if data.get("e") != "kline":
+            return None
+        k = data["k"]
+        tf = self.stream_tf.get(msg.get("stream") or f"{data.get('s', '').lower()}@kline_{k.get('i')}")
+        if tf is None:
+            return None
+        closed = bool(k.get("x"))
+        row = event_to_row(k)
+        self.buffers[tf].apply(row, closed)
+        if self.on_update is not None:
+            self.on_update(tf, row, closed)
+        return tf if closed else None
+
+    def _fire(self, tf: str) -> None:
+        t = self.buffers[tf].last_closed_ms
+        if t is None or (self.fired[tf] is not None and t <= self.fired[tf]):
+            return
+        self.fired[tf] = t
+        try:
+            self.on_close(tf, self)
+        except Exception as e:
+            self.errors.append(f"on_close {tf}: {e}")
+
+    def window(self, tf: str, now_ms: int) -> list[list]:
+        """Latest `limit` rows as a REST poll at `now_ms` would return them.
+
+        If the newest buffered candle has already closed (its successor's first
+        event not received yet), a flat just-opened candle at its close price is
+        appended, like the live candle REST returns right after a close.
+        """
+        rows = list(self.buffers[tf].rows)
+        if rows and int(rows[-1][6]) < now_ms:
+            last = rows[-1]
+            step = kline_cache.interval_ms(tf) or (int(last[6]) + 1 - int(last[0]))
+            t = int(last[6]) + 1
+            c = last[4]
+            rows.append([t, c, c, c, c, "0", t + step - 1, "0", 0, "0", "0", "0"])
+        return rows[-self.limit :]
+
+    # --- connection loop ---
+
+    def run(self) -> None:
+        backoff = 1.0
+        while not self.stopped.is_set():
+            try:
+                # subscribe first so events during the backfill queue up in the socket
+                self.ws = WebSocket.connect(self.stream_url(), timeout_s=10.0)
+                self.ws.sock.settimeout(self.idle_timeout_s)
+                self.connects += 1
+                for tf in self.backfill():
+                    self._fire(tf)
+                backoff = 1.0
+                while not self.stopped.is_set():
+                    raw = self.ws.recv()
+                    if raw is None:
+                        break
+                    tf = self.handle_message(raw)
+                    if tf is not None:
+                        self._fire(tf)
+            except Exception as e:
+                if not self.stopped.is_set():
+                    self.errors.append(f"{type(e).__name__}: {e}")
+                    self.errors = self.errors[-50:]
+            finally:
+                if self.ws is not None:
+                    self.ws.close()
+                    self.ws = None
+            if not self.stopped.is_set():
+                self.stopped.wait(backoff)
+                backoff = min(self.max_backoff_s, backoff * 2)
+
+    def stop(self) -> None:
+        self.stopped.set()
+        ws = self.ws
+        if ws is not None:
+            ws.close()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--symbol", default="BTCUSDT")
+    ap.add_argument("--tfs", default="1d,4h,1h,15m")
+    ap.add_argument("--limit", type=int, default=210)
+    ap.add_argument("--url", default=STREAM_URL)
+    ap.add_argument("--cache-dir", default=None, help="persistent kline store for the REST seed")
+    args = ap.parse_args()
+
+    tfs = [tf.strip() for tf in args.tfs.split(",") if tf.strip()]
+    cache = kline_cache.KlineCache(args.cache_dir, snapshot_mtf.fetch_klines) if args.cache_dir else None
+
+    def on_close(tf: str, stream: KlineStream) -> None:
+        row = stream.buffers[tf].last_closed()
+        print(
+            json.dumps(
+                {
+                    "event": "kline_closed",
+                    "symbol": stream.symbol,
+                    "tf": tf,
+                    "ts_utc": snapshot_mtf.iso_utc(int(row[0])),
+                    "close": float(row[4]),
+                    "received_at_utc": snapshot_mtf.iso_utc(int(time.time() * 1000)),
+                }
+            ),
+            flush=True,
+        )
+
+    stream = KlineStream(args.symbol, tfs, args.limit, on_close, url=args.url, cache=cache)
+    try:
+        stream.run()
+    except KeyboardInterrupt:
+        stream.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,445 @@
+#!/usr/bin/env python3
+"""Local stand-in for the Binance REST endpoints the fetchers use (no external deps).
+
+Serves GET /api/v3/klines (symbol, interval, limit, startTime, endTime; Binance
+paging semantics), GET /api/v3/ticker (symbols, windowSize; rolling-window
+open / high / low / last from the 1m klines, as portfolio.fetch_tickers
+reads it) and GET /api/v3/time, over HTTP/1.1 keep-alive with gzip when
+asked, so http_client / snapshot_mtf.fetch_klines / run_signal run unchanged
+against it:
+
+  BINANCE_BASE_URLS=http://127.0.0.1:8090,http://127.0.0.1:8091 python3 .../snapshot_mtf.py
+
+Klines: synthetic (seeded random walk per symbol/interval, the last candle
+open at the current time) or recorded (a KlineCache store, --klines-dir).
+
+Faults, per server (= per "host"; run one server per base URL):
+- latency: "fixed:MS", "uniform:LO:HI", "lognormal:MEDIAN_MS:SIGMA" (added before every reply)
+- p_timeout: hold the request without replying for hang_s (client timeout)
+- p_429 / p_418: rate-limit / IP-ban reply with Retry-After: retry_after_s
+- p_5xx: 503 reply
+- p_partial: full Content-Length, half the body, then close (IncompleteRead)
+- outage: "reset" (close every connection at once), "blackhole" (never
+  reply) or None. A refused connection is simply a port with no server.
+
+GET /mock/stats returns the per-outcome request counters.
+
+In-process (tests):
+  srv = StandInRestServer(("127.0.0.1", 0), faults=Faults(p_429=0.2)).start()
+  snapshot_mtf.BINANCE_BASE_URLS = [srv.url]
+  srv.faults.outage = "blackhole"      # faults can be changed while serving
+
+CLI: two hosts, the second one down; then drive snapshot_mtf.fetch_klines
+against them and report latency percentiles and outcomes:
+  python3 skills/trading-bot/scripts/mock_binance_rest.py --ports 8090,8091 \
+    --latency lognormal:40:0.6 --p-429 0.05 --outage 8091=blackhole --drive 200 --threads 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import math
+import random
+import socket
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional
+from urllib.parse import parse_qs, urlsplit
+
+import kline_cache
+
+MAX_LIMIT = 1000
+DEFAULT_LIMIT = 500
+
+
+def parse_latency(spec: Optional[str]) -> Callable[[random.Random], float]:
+    """Latency spec -> sampler returning milliseconds."""
+    if not spec:
+        return lambda rnd: 0.0
+    kind, _, args = spec.partition(":")
+    vals = [float(x) for x in args.split(":") if x]
+    if kind == "fixed" and len(vals) == 1:
+        return lambda rnd: vals[0]
+    if kind == "uniform" and len(vals) == 2:
+        return lambda rnd: rnd.uniform(vals[0], vals[1])
+    if kind == "lognormal" and len(vals) == 2:
+        mu = math.log(vals[0])
+        return lambda rnd: rnd.lognormvariate(mu, vals[1])
+    raise ValueError(f"bad latency spec: {spec!r} (fixed:MS | uniform:LO:HI | lognormal:MEDIAN_MS:SIGMA)")
+
+
+@dataclass
+class Faults:
+    latency: Optional[str] = None
+    p_timeout: float = 0.0
+    hang_s: float = 60.0
+    p_429: float = 0.0
+    p_418: float = 0.0
+    retry_after_s: int = 1
+    p_5xx: float = 0.0
+    p_partial: float = 0.0
+    outage: Optional[str] = None  # None | "reset" | "blackhole"
+    seed: int = 1
+
+    def __post_init__(self):
+        self.rnd = random.Random(self.seed)
+        self.lock = threading.Lock()
+
+    def draw(self) -> tuple[float, str]:
+        """(latency ms, outcome) for one request."""
+        with self.lock:
+            if self.outage:
+                return 0.0, self.outage
+            delay = parse_latency(self.latency)(self.rnd)
+            x = self.rnd.random()
+        for outcome, p in (
+            ("timeout", self.p_timeout),
+            ("429", self.p_429),
+            ("418", self.p_418),
+            ("5xx", self.p_5xx),
+            ("partial", self.p_partial),
+        ):
+            if x < p:
+                return delay, outcome
+            x -= p
+        return delay, "ok"
+
+
+class KlineSource:
+    """Klines per (symbol, interval): synthetic (extended up to now on demand) or recorded."""
+
+    def __init__(self, klines_dir: Optional[str] = None, history: int = 20_000, seed: int = 7):
+        self.store = kline_cache.KlineCache(klines_dir, fetch=None) if klines_dir else None
+        self.history = history
+        self.seed = seed
+        self.series: dict[tuple[str, str], list[list]] = {}
+        self.lock = threading.Lock()
+
+    def _synth(self, symbol: str, interval: str, step: int, now_ms: int) -> list[list]:
+        key = (symbol, interval)
+        rows = self.series.get(key)
+        live_t = now_ms // step * step
+        if rows is None:
+            rnd = random.Random(f"{self.seed}:{symbol}:{interval}")
+            t, price, rows = live_t - (self.history - 1) * step, 60_000.0, []
+            self.series[key] = rows
+        else:
+            rnd = random.Random(f"{self.seed}:{symbol}:{interval}:{rows[-1][0]}")
+            t, price = int(rows[-1][0]) + step, float(rows[-1][4])
+        while t <= live_t:
+            o = price
+            c = o * (1 + rnd.gauss(0, 0.003 * math.sqrt(step / 900_000)))
+            h = max(o, c) * (1 + abs(rnd.gauss(0, 0.001)))
+            lo = min(o, c) * (1 - abs(rnd.gauss(0, 0.001)))
+            rows.append([t, f"{o:.2f}", f"{h:.2f}", f"{lo:.2f}", f"{c:.2f}", f"{rnd.random() * 100:.5f}", t + step - 1,
+                         "0", 0, "0", "0", "0"])  # fmt: skip
+            price = c
+            t += step
+        return rows
+
+    def rows(self, symbol: str, interval: str, now_ms: int) -> Optional[list[list]]:
+        step = kline_cache.interval_ms(interval)
+        if step is None:
+            return None
+        with self.lock:
+            if self.store is not None:
+                entry = self.store.load_entry(symbol, interval)
+                return (entry.get("klines") or []) + (entry.get("live") or []) or None
+            return self._synth(symbol, interval, step, now_ms)
+
+    def query(self, symbol: str, interval: str, limit: int, start_ms: Optional[int], end_ms: Optional[int], now_ms: int):
+        rows = self.rows(symbol, interval, now_ms)
+        if rows is None:
+            return None
+        lo = 0
+        hi = len(rows)
+        if start_ms is not None:
+            while lo < hi and int(rows[lo][0]) < start_ms:
+                lo += 1
+        if end_ms is not None:
+            while hi > lo and int(rows[hi - 1][0]) > end_ms:
+                hi -= 1
+        # startTime pages forward from the start; otherwise the newest `limit` rows
+        return rows[lo : lo + limit] if start_ms is not None else rows[max(lo, hi - limit) : hi]
+
+    def ticker(self, symbol: str, window_ms: int, now_ms: int) -> Optional[dict]:
+        """Rolling-window ticker (type=MINI fields) over the 1m klines overlapping the window."""
+        rows = self.rows(symbol, "1m", now_ms)
+        if not rows:
+            return None
+        start = now_ms - window_ms
+        win = [k for k in rows[-(window_ms // 60_000 + 2) :] if int(k[6]) >= start and int(k[0]) <= now_ms] or rows[-1:]
+        return {
+            "symbol": symbol,
+            "openPrice": win[0][1],
+            "highPrice": f"{max(float(k[2]) for k in win):.2f}",
+            "lowPrice": f"{min(float(k[3]) for k in win):.2f}",
+            "lastPrice": win[-1][4],
+            "volume": f"{sum(float(k[5]) for k in win):.5f}",
+            "openTime": start,
+            "closeTime": now_ms,
+        }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "StandInRestServer"
+
+    def log_message(self, fmt, *args) -> None:  # quiet
+        pass
+
+    def _send(self, status: int, body: bytes, headers: Optional[dict] = None, partial: bool = False) -> None:
+        if "gzip" in (self.headers.get("Accept-Encoding") or "") and len(body) > 256:
+            body = gzip.compress(body, compresslevel=5)
+            headers = dict(headers or {}, **{"Content-Encoding": "gzip"})
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json;charset=UTF-8")
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, str(v))
+        self.end_headers()
+        if partial:
+            self.wfile.write(body[: len(body) // 2])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+    def _error(self, status: int, code: int, msg: str, headers: Optional[dict] = None) -> None:
+        self._send(status, json.dumps({"code": code, "msg": msg}).encode(), headers)
+
+    def do_GET(self) -> None:  # noqa: N802
+        srv = self.server
+        parts = urlsplit(self.path)
+        if parts.path == "/mock/stats":
+            self._send(200, json.dumps(srv.snapshot_stats()).encode())
+            return
+
+        delay_ms, outcome = srv.faults.draw()
+        srv.count(outcome)
+        if outcome == "reset":
+            self.close_connection = True
+            self.connection.shutdown(socket.SHUT_RDWR)
+            return
+        if outcome in ("blackhole", "timeout"):
+            srv.stopping.wait(srv.faults.hang_s)
+            self.close_connection = True
+            return
+        if delay_ms > 0:
+            srv.stopping.wait(delay_ms / 1000.0)
+
+        retry = {"Retry-After": srv.faults.retry_after_s}
+        if outcome == "429":
+            self._error(429, -1003, "Too many requests; mock rate limit.", retry)
+            return
+        if outcome == "418":
+            self._error(418, -1003, "Way too many requests; IP banned (mock).", retry)
+            return
+        if outcome == "5xx":
+            self._error(503, -1001, "Service unavailable (mock).")
+            return
+
+        now_ms = int(time.time() * 1000)
+        if parts.path == "/api/v3/time":
+            self._send(200, json.dumps({"serverTime": now_ms + srv.clock_offset_ms}).encode(), partial=outcome == "partial")
+            return
+        q = {k: v[0] for k, v in parse_qs(parts.query).items()}
+        if parts.path == "/api/v3/ticker":
+            self._ticker(q, now_ms, outcome)
+            return
+        if parts.path != "/api/v3/klines":
+            self._error(404, -1000, f"unknown path {parts.path}")
+            return
+
+        try:
+            limit = min(MAX_LIMIT, max(1, int(q.get("limit", DEFAULT_LIMIT))))
+            start_ms = int(q["startTime"]) if "startTime" in q else None
+            end_ms = int(q["endTime"]) if "endTime" in q else None
+        except ValueError:
+            self._error(400, -1100, "Illegal characters found in a parameter.")
+            return
+        symbol = q.get("symbol", "").upper()
+        if not symbol:
+            self._error(400, -1102, "Mandatory parameter 'symbol' was not sent.")
+            return
+        rows = srv.source.query(symbol, q.get("interval", ""), limit, start_ms, end_ms, now_ms)
+        if rows is None:
+            self._error(400, -1121, "Invalid symbol or interval.")
+            return
+        self._send(200, json.dumps(rows, separators=(",", ":")).encode(), partial=outcome == "partial")
+
+    def _ticker(self, q: dict, now_ms: int, outcome: str) -> None:
+        try:
+            symbols = json.loads(q["symbols"]) if "symbols" in q else [q["symbol"]]
+        except (KeyError, ValueError):
+            self._error(400, -1102, "Mandatory parameter 'symbol' was not sent.")
+            return
+        window_ms = kline_cache.interval_ms(q.get("windowSize", "1d"))
+        if window_ms is None:
+            self._error(400, -1100, "Illegal characters found in parameter 'windowSize'.")
+            return
+        out = []
+        for symbol in symbols:
+            t = self.server.source.ticker(str(symbol).upper(), window_ms, now_ms)
+            if t is None:
+                self._error(400, -1121, "Invalid symbol.")
+                return
+            out.append(t)
+        body = out if "symbols" in q else out[0]
+        self._send(200, json.dumps(body, separators=(",", ":")).encode(), partial=outcome == "partial")
+
+
+class StandInRestServer(ThreadingHTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(
+        self,
+        address: tuple[str, int] = ("127.0.0.1", 0),
+        faults: Optional[Faults] = None,
+        source: Optional[KlineSource] = None,
+        clock_offset_ms: int = 0,
+    ):
+        super().__init__(address, _Handler)
+        self.faults = faults or Faults()
+        self.source = source or KlineSource()
+        self.clock_offset_ms = clock_offset_ms
+        self.stats: Counter = Counter()
+        self.stats_lock = threading.Lock()
+        self.stopping = threading.Event()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StandInRestServer":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self.stopping.set()  # releases hung (timeout / blackhole) requests
+        self.shutdown()
+        self.server_close()
+
+    def handle_error(self, request, client_address) -> None:
+        # clients hanging up on a slow / faulty reply are expected here
+        if not isinstance(sys.exc_info()[1], (ConnectionError, OSError)):
+            super().handle_error(request, client_address)
+
+    def count(self, outcome: str) -> None:
+        with self.stats_lock:
+            self.stats[outcome] += 1
+
+    def snapshot_stats(self) -> dict:
+        with self.stats_lock:
+            return dict(self.stats)
+
+
+def percentile(sorted_ms: list[float], p: float) -> Optional[float]:
+    if not sorted_ms:
+        return None
+    return round(sorted_ms[max(0, min(len(sorted_ms) - 1, int(round(p / 100.0 * len(sorted_ms) + 0.5)) - 1))], 1)
+
+
+def drive(n: int, threads: int, symbol: str, interval: str, limit: int) -> dict:
+    """n snapshot_mtf.fetch_klines calls from `threads` threads against BINANCE_BASE_URLS."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    import snapshot_mtf
+
+    def one(_: int) -> tuple[float, str]:
+        t0 = time.perf_counter()
+        try:
+            snapshot_mtf.fetch_klines(symbol, interval, limit)
+            outcome = "ok"
+        except Exception as e:
+            outcome = type(e).__name__
+        return (time.perf_counter() - t0) * 1000.0, outcome
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        res = list(pool.map(one, range(n)))
+    ok_ms = sorted(ms for ms, o in res if o == "ok")
+    return {
+        "calls": n,
+        "outcomes": dict(Counter(o for _, o in res)),
+        "ok_p50_ms": percentile(ok_ms, 50),
+        "ok_p95_ms": percentile(ok_ms, 95),
+        "ok_p99_ms": percentile(ok_ms, 99),
+        "ok_max_ms": round(ok_ms[-1], 1) if ok_ms else None,
+        "wall_s": round(time.perf_counter() - t0, 3),
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--ports", default="8090", help="one server per port (= per base URL)")
+    ap.add_argument("--klines-dir", default=None, help="serve recorded klines from a KlineCache store")
+    ap.add_argument("--history", type=int, default=20_000, help="synthetic candles per series")
+    ap.add_argument("--latency", default=None, help="fixed:MS | uniform:LO:HI | lognormal:MEDIAN_MS:SIGMA")
+    ap.add_argument("--p-timeout", type=float, default=0.0)
+    ap.add_argument("--hang-s", type=float, default=60.0)
+    ap.add_argument("--p-429", type=float, default=0.0)
+    ap.add_argument("--p-418", type=float, default=0.0)
+    ap.add_argument("--retry-after-s", type=int, default=1)
+    ap.add_argument("--p-5xx", type=float, default=0.0)
+    ap.add_argument("--p-partial", type=float, default=0.0)
+    ap.add_argument("--outage", action="append", default=[], help="PORT=reset|blackhole (repeatable)")
+    ap.add_argument("--clock-offset-ms", type=int, default=0, help="serverTime skew vs local clock")
+    ap.add_argument("--drive", type=int, default=0, help="run N snapshot_mtf.fetch_klines calls, print stats, exit")
+    ap.add_argument("--threads", type=int, default=8)
+    ap.add_argument("--symbol", default="BTCUSDT")
+    ap.add_argument("--interval", default="15m")
+    ap.add_argument("--limit", type=int, default=210)
+    args = ap.parse_args()
+
+    parse_latency(args.latency)  # fail fast on a bad spec
+    outages = dict(o.split("=", 1) for o in args.outage)
+    source = KlineSource(args.klines_dir, args.history)
+    servers = []
+    for i, port in enumerate(int(p) for p in args.ports.split(",") if p.strip()):
+        faults = Faults(
+            latency=args.latency,
+            p_timeout=args.p_timeout,
+            hang_s=args.hang_s,
+            p_429=args.p_429,
+            p_418=args.p_418,
+            retry_after_s=args.retry_after_s,
+            p_5xx=args.p_5xx,
+            p_partial=args.p_partial,
+            outage=outages.get(str(port)),
+            seed=i + 1,
+        )
+        servers.append(StandInRestServer((args.host, port), faults, source, args.clock_offset_ms).start())
+    urls = [s.url for s in servers]
+    print(json.dumps({"module": "mock_binance_rest", "urls": urls, "env": {"BINANCE_BASE_URLS": ",".join(urls)}}), flush=True)
+
+    if args.drive:
+        import snapshot_mtf
+
+        snapshot_mtf.BINANCE_BASE_URLS = urls
+        # measure the fetch path, not the production weight budget
+        snapshot_mtf.REQUEST_LIMITER = snapshot_mtf.WeightLimiter(weight_per_min=1e9, burst=1e9)
+        out = drive(args.drive, args.threads, args.symbol, args.interval, args.limit)
+        out["servers"] = {s.url: s.snapshot_stats() for s in servers}
+        print(json.dumps(out), flush=True)
+        for s in servers:
+            s.stop()
+        return
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        for s in servers:
+            s.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""Local stand-in for the Binance kline WebSocket stream (no external deps).
+
+Speaks the combined-stream protocol kline_stream.py consumes
+(`/stream?streams=btcusdt@kline_15m/...`, messages `{"stream", "data": {"e": "kline", "k": {...}}}`)
+so the consumer can be exercised without the exchange.
+
+In-process (tests):
+  srv = StandInStreamServer(("127.0.0.1", 0)); srv.start()
+  srv.publish("BTCUSDT", "15m", row, closed=True)   # row = REST kline row
+  srv.publish_trade("BTCUSDT", 60123.5)              # <symbol>@aggTrade
+  srv.drop_clients()                                # force a reconnect
+
+CLI: replays a synthetic random walk with simulated time running `--speed`
+times faster than real time (kline updates every simulated `--tick-s`, plus
+one aggTrade per tick with --trades):
+  python3 skills/trading-bot/scripts/mock_kline_ws.py --port 9443 --tfs 1m,15m --speed 60
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import socketserver
+import threading
+import time
+from urllib.parse import parse_qs, urlsplit
+
+import kline_cache
+from kline_stream import OP_CLOSE, OP_PING, OP_TEXT, ws_accept, ws_frame, ws_read_frame
+
+
+class _Client:
+    def __init__(self, handler: socketserver.StreamRequestHandler, streams: set[str]):
+        self.handler = handler
+        self.streams = streams
+        self.lock = threading.Lock()
+
+    def send(self, opcode: int, payload: bytes) -> None:
+        with self.lock:
+            self.handler.wfile.write(ws_frame(opcode, payload, mask=False))
+            self.handler.wfile.flush()
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    server: "StandInStreamServer"
+
+    def handle(self) -> None:
+        request_line = self.rfile.readline().decode("latin-1")
+        headers = {}
+        while True:
+            line = self.rfile.readline().decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        try:
+            path = request_line.split()[1]
+        except IndexError:
+            return
+        key = headers.get("sec-websocket-key")
+        if not key:
+            self.wfile.write(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\n\r\n")
+            return
+        self.wfile.write(
+            (
+                "HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                f"Sec-WebSocket-Accept: {ws_accept(key)}\r\n\r\n"
+            ).encode()
+        )
+        self.wfile.flush()
+
+        streams = parse_qs(urlsplit(path).query).get("streams", [""])[0]
+        client = _Client(self, {s for s in streams.split("/") if s})
+        self.server.add_client(client)
+        try:
+            while True:
+                _, op, payload = ws_read_frame(self.rfile)
+                if op == OP_CLOSE:
+                    client.send(OP_CLOSE, payload[:2])
+                    return
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            self.server.remove_client(client)
+
+
+class StandInStreamServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address: tuple[str, int] = ("127.0.0.1", 0)):
+        super().__init__(address, _Handler)
+        self.clients: list[_Client] = []
+        self.clients_lock = threading.Lock()
+        self.connections = 0
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"ws://{host}:{port}"
+
+    def start(self) -> "StandInStreamServer":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def add_client(self, client: _Client) -> None:
+        with self.clients_lock:
+            self.clients.append(client)
+            self.connections += 1
+
+    def remove_client(self, client: _Client) -> None:
+        with self.clients_lock:
+            if client in self.clients:
+                self.clients.remove(client)
+
+    def wait_clients(self, n: int = 1, timeout_s: float = 5.0) -> bool:
+        deadline = time.monotonic() + timeout_s
+        while time.monotonic() < deadline:
+            with self.clients_lock:
+                if len(self.clients) >= n:
+                    return True
+            time.sleep(0.01)
+        return False
+
+    def publish(self, symbol: str, tf: str, row: list, closed: bool) -> int:
+        """Send one kline event built from a REST row; returns the number of receivers."""
+        stream = f"{symbol.lower()}@kline_{tf}"
+        msg = {
+            "stream": stream,
+            "data": {
+                "e": "kline",
+                "E": int(time.time() * 1000),
+                "s": symbol.upper(),
+                "k": {
+                    "t": int(row[0]), "T": int(row[6]), "s": symbol.upper(), "i": tf,
+                    "o": str(row[1]), "h": str(row[2]), "l": str(row[3]), "c": str(row[4]), "v": str(row[5]),
+                    "n": int(row[8]) if len(row) > 8 else 0, "x": bool(closed),
+                },
+            },
+        }  # fmt: skip
+        return self._send(stream, msg)
+
+    def publish_trade(self, symbol: str, price: float, ts_ms: int | None = None, qty: float = 0.001) -> int:
+        """Send one aggTrade event; returns the number of receivers."""
+        stream = f"{symbol.lower()}@aggTrade"
+        ts = int(time.time() * 1000) if ts_ms is None else ts_ms
+        msg = {
+            "stream": stream,
+            "data": {"e": "aggTrade", "E": ts, "s": symbol.upper(), "p": f"{price:.2f}", "q": f"{qty:g}", "T": ts, "m": False},
+        }
+        return self._send(stream, msg)
+
+    def _send(self, stream: str, msg: dict) -> int:
+        payload = json.dumps(msg).encode()
+        sent = 0
+        with self.clients_lock:
+            clients = [c for c in self.clients if stream in c.streams]
+        for c in clients:
+            try:
+                c.send(OP_TEXT, payload)
+                sent += 1
+            except OSError:
+                self.remove_client(c)
+        return sent
+
+    def ping_all(self) -> None:
+        with self.clients_lock:
+            clients = list(self.clients)
+        for c in clients:
+            try:
+                c.send(OP_PING, b"ping")
+            except OSError:
+                pass
+
+    def drop_clients(self) -> None:
+        """Cut every connection without a close frame (simulates a network drop)."""
+        with self.clients_lock:
+            clients = list(self.clients)
+            self.clients.clear()
+        for c in clients:
+            try:
+                c.handler.connection.shutdown(2)
+            except OSError:
+                pass
+
+
+def replay(srv: StandInStreamServer, symbol: str, tfs: list[str], speed: float, tick_s: float, price: float, trades: bool = False) -> None:
+    """Random walk; every simulated tick updates each TF's live candle, closing it at its boundary."""
+    rng = random.Random(1)
+    sim_ms = int(time.time() * 1000)
+    live: dict[str, list] = {}
+    while True:
+        price *= 1 + rng.gauss(0, 0.0005)
+        p = f"{price:.2f}"
+        for tf in tfs:
+            step = kline_cache.interval_ms(tf)
+            t = sim_ms // step * step
+            row = live.get(tf)
+            if row is not None and row[0] != t:
+                srv.publish(symbol, tf, row, closed=True)
+                row = None
+            if row is None:
+                row = [t, p, p, p, p, "0", t + step - 1, "0", 0, "0", "0", "0"]
+            row[2] = max(row[2], p, key=float)
+            row[3] = min(row[3], p, key=float)
+            row[4] = p
+            row[5] = f"{float(row[5]) + rng.random():.4f}"
+            row[8] += 1
+            live[tf] = row
+            srv.publish(symbol, tf, row, closed=False)
+        if trades:
+            srv.publish_trade(symbol, float(p), sim_ms)
+        time.sleep(tick_s / speed)
+        sim_ms += int(tick_s * 1000)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=9443)
+    ap.add_argument("--symbol", default="BTCUSDT")
+    ap.add_argument("--tfs", default="1m,15m")
+    ap.add_argument("--speed", type=float, default=1.0, help="simulated seconds per real second")
+    ap.add_argument("--tick-s", type=float, default=2.0, help="simulated seconds between updates")
+    ap.add_argument("--price", type=float, default=60000.0)
+    ap.add_argument("--trades", action="store_true", help="also publish <symbol>@aggTrade")
+    args = ap.parse_args()
+
+    srv = StandInStreamServer((args.host, args.port)).start()
+    print(json.dumps({"module": "mock_kline_ws", "url": srv.url}), flush=True)
+    tfs = [tf.strip() for tf in args.tfs.split(",") if tf.strip()]
+    try:
+        replay(srv, args.symbol, tfs, args.speed, args.tick_s, args.price, args.trades)
+    except KeyboardInterrupt:
+        srv.shutdown()
+
+
+if __name__ == "__main__":
+    main()
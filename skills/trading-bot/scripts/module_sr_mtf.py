@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """MTF Support/Resistance (S/R) zones (skeleton).
 
-Input: snapshot JSON from snapshot_mtf.py (stdin)
+Input: snapshot from snapshot_mtf.py on stdin (any snapshot_codec encoding), or a snapshot dict via `analyze()`
 Output: JSON zones + nearest support/resistance.
 
 Method (v0):
@@ -19,9 +19,12 @@ from __future__ import annotations
 
 import json
 import math
-import sys
 from dataclasses import dataclass
 
+from pivots import find_pivots
+from snapshot_codec import column, load_stdin, n_candles, ts_utc_at
+from zone_book import ZoneBook
+
 
 TF_WEIGHT = {
     "1d": 4.0,
@@ -71,66 +74,41 @@ def is_pivot_low(lows: list[float], i: int, left: int, right: int) -> bool:
     return True
 
 
-def cluster_zones(zones: list[Zone]) -> list[Zone]:
-    # simple overlap clustering per tf+kind
-    out: list[Zone] = []
-    zones_sorted = sorted(zones, key=lambda z: (z.kind, z.lo, z.hi))
+def build_books(zones: list[Zone]) -> dict[str, ZoneBook]:
+    """Cluster zones per kind into indexed ZoneBooks (see zone_book.py)."""
+    books = {kind: ZoneBook(kind, TF_WEIGHT) for kind in ("resistance", "support")}
+    for kind, book in books.items():
+        book.extend(z for z in zones if z.kind == kind)
+    return books
 
-    for z in zones_sorted:
-        if not out:
-            out.append(z)
-            continue
-        last = out[-1]
-        if z.kind == last.kind and z.lo <= last.hi:
-            # merge
-            merged = Zone(
-                tf=last.tf if TF_WEIGHT.get(last.tf, 1) >= TF_WEIGHT.get(z.tf, 1) else z.tf,
-                kind=last.kind,
-                lo=min(last.lo, z.lo),
-                hi=max(last.hi, z.hi),
-                strength=last.strength + z.strength,
-                touches=last.touches + z.touches,
-                last_touch_utc=max(last.last_touch_utc, z.last_touch_utc),
-            )
-            out[-1] = merged
-        else:
-            out.append(z)
 
-    return out
+def cluster_zones(zones: list[Zone]) -> list[Zone]:
+    # overlap clustering per kind (sorted by kind, then lo)
+    books = build_books(zones)
+    return books["resistance"].zones + books["support"].zones
 
 
-def main() -> None:
-    snap = json.load(sys.stdin)
+def analyze(snap: dict) -> dict:
+    """Compute S/R zones for an in-memory snapshot (see snapshot_mtf.build_snapshot)."""
     tfs = snap.get("timeframes", {})
 
     # reference price: last 15m close (fallback: any tf)
     ref_price = None
     ref_ts = None
-    if "15m" in tfs and tfs["15m"].get("candles"):
-        last = tfs["15m"]["candles"][-1]
-        ref_price = float(last["close"])
-        ref_ts = last["ts_utc"]
-    else:
-        for tf, block in tfs.items():
-            if block.get("candles"):
-                last = block["candles"][-1]
-                ref_price = float(last["close"])
-                ref_ts = last["ts_utc"]
-                break
+    ref_block = tfs["15m"] if "15m" in tfs and n_candles(tfs["15m"]) else None
+    if ref_block is None:
+        ref_block = next((b for b in tfs.values() if n_candles(b)), None)
+    if ref_block is not None:
+        ref_price = float(column(ref_block, "close")[-1])
+        ref_ts = ts_utc_at(ref_block, n_candles(ref_block) - 1)
 
     if ref_price is None:
-        print(
-            json.dumps(
-                {
-                    "module": "sr_mtf",
-                    "version": "0.1",
-                    "error": True,
-                    "error_message": "no candles",
-                },
-                ensure_ascii=False,
-            )
-        )
-        return
+        return {
+            "module": "sr_mtf",
+            "version": "0.1",
+            "error": True,
+            "error_message": "no candles",
+        }
 
     # pivot params per timeframe (rough defaults)
     pivot_window = {
@@ -151,20 +129,22 @@ def main() -> None:
     zones: list[Zone] = []
 
     for tf, block in tfs.items():
-        candles = block.get("candles") or []
-        if len(candles) < 20:
+        if n_candles(block) < 20:
             continue
 
-        highs = [float(c["high"]) for c in candles]
-        lows = [float(c["low"]) for c in candles]
-        ts = [c["ts_utc"] for c in candles]
+        highs = column(block, "high")
+        lows = column(block, "low")
 
         left, right = pivot_window.get(tf, (4, 4))
         pct = zone_pct.get(tf, 0.2)
         weight = TF_WEIGHT.get(tf, 1.0)
 
-        for i in range(left, len(candles) - right):
-            if is_pivot_high(highs, i, left, right):
+        # O(n) sliding-window pivots (same rule as is_pivot_high/is_pivot_low)
+        piv_hi = set(find_pivots(highs, left, right, "high"))
+        piv_lo = set(find_pivots(lows, left, right, "low"))
+
+        for i in sorted(piv_hi | piv_lo):
+            if i in piv_hi:
                 lo, hi = pct_band(highs[i], pct)
                 zones.append(
                     Zone(
@@ -174,10 +154,10 @@ def main() -> None:
                         hi=hi,
                         strength=weight,
                         touches=1,
-                        last_touch_utc=ts[i],
+                        last_touch_utc=ts_utc_at(block, i),
                     )
                 )
-            if is_pivot_low(lows, i, left, right):
+            if i in piv_lo:
                 lo, hi = pct_band(lows[i], pct)
                 zones.append(
                     Zone(
@@ -187,31 +167,23 @@ def main() -> None:
                         hi=hi,
                         strength=weight,
                         touches=1,
-                        last_touch_utc=ts[i],
+                        last_touch_utc=ts_utc_at(block, i),
                     )
                 )
 
-    clustered = cluster_zones(zones)
+    books = build_books(zones)
+    clustered = books["resistance"].zones + books["support"].zones
 
     # Score bump for more touches
     for z in clustered:
         z.strength = z.strength + 0.5 * max(0, z.touches - 1)
+    for book in books.values():
+        book.invalidate()
 
-    # Pick nearest support/resistance (prefer HTF implicitly via strength)
-    supports = [z for z in clustered if z.kind == "support" and z.hi <= ref_price]
-    resistances = [z for z in clustered if z.kind == "resistance" and z.lo >= ref_price]
-
-    supports_sorted = sorted(
-        supports,
-        key=lambda z: (-(z.strength), abs(ref_price - z.hi)),
-    )
-    resistances_sorted = sorted(
-        resistances,
-        key=lambda z: (-(z.strength), abs(z.lo - ref_price)),
-    )
-
-    nearest_support = supports_sorted[0] if supports_sorted else None
-    nearest_resistance = resistances_sorted[0] if resistances_sorted else None
+    # Pick nearest support/resistance (prefer HTF implicitly via strength):
+    # strongest zone below/above ref, ties -> closest (bisect + prefix best)
+    nearest_support = books["support"].strongest_below(ref_price)
+    nearest_resistance = books["resistance"].strongest_above(ref_price)
 
     out = {
         "module": "sr_mtf",
@@ -228,8 +200,12 @@ def main() -> None:
             "zones are approximate bands around pivots",
         ],
     }
+    return out
+
 
-    print(json.dumps(out, ensure_ascii=False))
+def main() -> None:
+    snap = load_stdin()  # legacy JSON, columnar JSON or binary (snapshot_codec)
+    print(json.dumps(analyze(snap), ensure_ascii=False))
 
 
 if __name__ == "__main__":
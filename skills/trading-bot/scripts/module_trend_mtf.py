@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """MTF trend labeler based on RSI14 + EMA9(RSI14) + WMA45(RSI14).
 
-Input: snapshot JSON from snapshot_mtf.py (stdin)
+Input: snapshot from snapshot_mtf.py on stdin (any snapshot_codec encoding), or a snapshot dict via `analyze()`
 Output: JSON with per-timeframe trend labels and reasons.
 
 Rules:
@@ -14,14 +14,16 @@ Rules:
   - STRONG_DOWN if RSI<40 AND EMA<WMA
   - else neutral
 
-We keep both A and B and report both.
+We keep both A and B and report both. classify() takes the midline / band as
+keyword arguments (defaults above) so walk-forward runs can vary them.
 """
 
 from __future__ import annotations
 
 import json
 import math
-import sys
+
+from snapshot_codec import load_stdin
 
 
 def fnum(x):
@@ -36,7 +38,14 @@ def fnum(x):
         return None
 
 
-def classify(rsi_v: float, ema_v: float, wma_v: float) -> dict:
+def classify(
+    rsi_v: float,
+    ema_v: float,
+    wma_v: float,
+    midline: float = 50.0,
+    strong_lo: float = 40.0,
+    strong_hi: float = 60.0,
+) -> dict:
     out = {
         "A": "TRANSITION",
         "B": "NEUTRAL",
@@ -48,17 +57,17 @@ def classify(rsi_v: float, ema_v: float, wma_v: float) -> dict:
     ema_lt = ema_v < wma_v
 
     # Rule A
-    if rsi_v > 50 and ema_gt:
+    if rsi_v > midline and ema_gt:
         out["A"] = "UP"
-    elif rsi_v < 50 and ema_lt:
+    elif rsi_v < midline and ema_lt:
         out["A"] = "DOWN"
     else:
         out["A"] = "RANGE"
 
     # Rule B
-    if rsi_v > 60 and ema_gt:
+    if rsi_v > strong_hi and ema_gt:
         out["B"] = "STRONG_UP"
-    elif rsi_v < 40 and ema_lt:
+    elif rsi_v < strong_lo and ema_lt:
         out["B"] = "STRONG_DOWN"
     else:
         out["B"] = "NEUTRAL"
@@ -80,8 +89,8 @@ def classify(rsi_v: float, ema_v: float, wma_v: float) -> dict:
     return out
 
 
-def main() -> None:
-    snapshot = json.load(sys.stdin)
+def analyze(snapshot: dict) -> dict:
+    """Label every timeframe of an in-memory snapshot (see snapshot_mtf.build_snapshot)."""
     tfs = snapshot.get("timeframes", {})
 
     labels = {}
@@ -125,8 +134,12 @@ def main() -> None:
         "overall_bias": bias,
         "errors": errors if errors else [],
     }
+    return out
 
-    print(json.dumps(out, ensure_ascii=False))
+
+def main() -> None:
+    snapshot = load_stdin()  # legacy JSON, columnar JSON or binary (snapshot_codec)
+    print(json.dumps(analyze(snapshot), ensure_ascii=False))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Linear-time fractal pivot detection (no external deps).
+
+A bar i is a pivot high when its high is strictly greater than every high in
+[i-left, i-1] and [i+1, i+right] (pivot low: strictly lower). This is the rule
+used by module_sr_mtf.is_pivot_high/low and cron_15m_bot.pivot_highs/lows.
+
+Instead of rescanning the window for every bar, PivotStream keeps two monotonic
+deques (sliding max of the left and right windows), so each appended bar costs
+amortised O(1) regardless of window size, and a pivot is reported as soon as
+its right window is complete.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from typing import Optional
+
+
+class PivotStream:
+    def __init__(self, left: int, right: int, kind: str = "high"):
+        if kind not in ("high", "low"):
+            raise ValueError("kind must be 'high' or 'low'")
+        self.left = left
+        self.right = right
+        self.kind = kind
+        self.sign = 1.0 if kind == "high" else -1.0
+        self.n = 0
+        # keys of the last right+2 bars: the candidate, its right window and the bar before it
+        self.recent: deque[float] = deque(maxlen=right + 2)
+        self.lq: deque[tuple[int, float]] = deque()  # (idx, key), keys decreasing
+        self.rq: deque[tuple[int, float]] = deque()
+
+    @staticmethod
+    def _push(q: deque, idx: int, key: float) -> None:
+        while q and q[-1][1] <= key:
+            q.pop()
+        q.append((idx, key))
+
+    def append(self, value: float) -> Optional[int]:
+        """Add the next bar; return the index of a pivot confirmed by it, if any."""
+        t = self.n
+        self.n += 1
+        key = self.sign * value
+        self.recent.append(key)
+
+        # right window of the candidate i = t - right is (i, t]
+        self._push(self.rq, t, key)
+        while self.rq and self.rq[0][0] <= t - self.right:
+            self.rq.popleft()
+
+        i = t - self.right
+        if i < 0:
+            return None
+        # left window of the candidate is [i - left, i - 1]
+        if i >= 1:
+            self._push(self.lq, i - 1, self.recent[0])
+        while self.lq and self.lq[0][0] < i - self.left:
+            self.lq.popleft()
+
+        if i < self.left:
+            return None
+        cand = self.recent[-self.right - 1]
+        if self.left and self.lq[0][1] >= cand:
+            return None
+        if self.right and self.rq[0][1] >= cand:
+            return None
+        return i
+
+
+def find_pivots(values: list[float], left: int, right: int, kind: str = "high") -> list[int]:
+    """Indices of all pivot highs (or lows) in `values`, in one O(n) pass."""
+    ps = PivotStream(left, right, kind)
+    out: list[int] = []
+    for v in values:
+        i = ps.append(v)
+        if i is not None:
+            out.append(i)
+    return out
@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+"""Multi-position portfolio with per-position and aggregate risk (no external deps).
+
+The bot state ("<SYMBOL>:15m", cron_15m_bot.py) holds one position per symbol
+and only opens when flat. The portfolio is a single state_store.py document
+(key "portfolio:15m") holding every open position by id, so positions on
+several symbols (the alt branch of trader_spec.yaml) and scale-ins on one
+symbol are tracked side by side.
+
+Risk (trader_spec.yaml `risk:`):
+- per position: risk_usdt = size * |entry - sl|, 0 once the SL is past the
+  entry; a new position is sized to risk_pct (1%) of the balance (less when
+  the daily budget below has less left, but not under MIN_RISK_FRACTION of
+  it), a given size may not risk more than that.
+- aggregate: a position is only opened while today's realized loss + the open
+  risk of all positions + its own risk stays within max_daily_loss_pct (2%)
+  of the balance at the start of the UTC day, so the day cannot lose more than
+  the cap even if every stop is hit. When realized + unrealized loss reaches
+  the cap anyway (gaps), the portfolio is halted until the next UTC day.
+- limits: max_positions in total, max_per_symbol (scale-ins), never both
+  sides of one symbol.
+
+Per-candle update: mark() takes one Quote per symbol (open / high / low / last
+over the window since the previous update) and checks every position's SL in
+one pass over the positions; fetch_tickers() gets the quotes of all symbols in
+one /api/v3/ticker request (rolling window, up to 100 symbols per request).
+The ticker window reaches back at most 7 days (TICKER_MAX_WINDOW_MS); a longer
+gap is covered by fetch_kline_quotes() (15m klines since the last update).
+
+Example:
+  python3 skills/trading-bot/scripts/portfolio.py --db trading/state.db
+  python3 skills/trading-bot/scripts/portfolio.py --db trading/state.db --prices
+
+In-process:
+  with open_store(db).transaction(KEY, defaults()) as doc:
+      book = Portfolio(doc)
+      pos, why = book.open("SOLUSDT", "LONG", entry=142.3, sl=139.9, ts_ms=now_ms)
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional
+from urllib.parse import quote
+
+import kline_cache
+import snapshot_mtf
+import stage_timer
+from state_store import open_store
+
+KEY = "portfolio:15m"
+
+# trader_spec.yaml risk: (risk_per_trade_pct, max_daily_loss_pct)
+RISK_PCT_DEFAULT = 1.0
+MAX_DAILY_LOSS_PCT_DEFAULT = 2.0
+BALANCE_USDT_DEFAULT = 1000.0
+MAX_POSITIONS = 6
+MAX_PER_SYMBOL = 3
+MIN_RISK_FRACTION = 0.5  # auto-sizing: refuse rather than open under half the per-trade risk
+
+TICKER_MAX_SYMBOLS = 100  # Binance limit per /api/v3/ticker request
+TICKER_MAX_WINDOW_MS = 7 * 86_400_000  # largest /api/v3/ticker windowSize (7d)
+SIZE_DECIMALS = 6
+
+
+@dataclass(frozen=True)
+class Quote:
+    """Prices of one symbol over [from_ms, to_ms]."""
+
+    open: float
+    high: float
+    low: float
+    last: float
+    from_ms: int
+    to_ms: int
+
+
+def defaults() -> dict:
+    return {
+        "balance_usdt": BALANCE_USDT_DEFAULT,
+        "risk_pct": RISK_PCT_DEFAULT,
+        "max_daily_loss_pct": MAX_DAILY_LOSS_PCT_DEFAULT,
+        "max_positions": MAX_POSITIONS,
+        "max_per_symbol": MAX_PER_SYMBOL,
+        "positions": {},  # id -> {id, symbol, side, entry, sl, size, risk_usdt, opened_ts_utc, opened_ms, setup, ...}
+        "next_id": 1,
+        "day": None,  # UTC date the daily counters below belong to
+        "day_start_balance": None,
+        "realized_today_usdt": 0.0,
+        "halted": False,
+        "last_update_ms": None,
+    }
+
+
+def utc_day(ms: int) -> str:
+    return datetime.fromtimestamp(ms / 1000.0, tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+def pnl_of(side: str, entry: float, price: float, size: float) -> float:
+    return (price - entry) * size if side == "LONG" else (entry - price) * size
+
+
+def risk_of(pos: dict) -> float:
+    """USDT lost if the position's stop is hit now (0 once the SL locks in profit)."""
+    return max(0.0, -pnl_of(pos["side"], pos["entry"], pos["sl"], pos["size"]))
+
+
+class Portfolio:
+    """Operations on a portfolio document (changed in place; the caller commits it)."""
+
+    def __init__(self, doc: dict):
+        self.doc = doc
+        self.positions: dict = doc.setdefault("positions", {})
+
+    # --- risk accounting -------------------------------------------------
+
+    def roll_day(self, now_ms: int) -> None:
+        """Reset the daily counters at the first call of a new UTC day."""
+        day = utc_day(now_ms)
+        if self.doc.get("day") != day:
+            self.doc.update(day=day, day_start_balance=float(self.doc["balance_usdt"]), realized_today_usdt=0.0, halted=False)
+
+    def per_trade_risk_usdt(self) -> float:
+        return float(self.doc["balance_usdt"]) * float(self.doc["risk_pct"]) / 100.0
+
+    def daily_cap_usdt(self) -> float:
+        start = self.doc.get("day_start_balance")
+        return float(self.doc["balance_usdt"] if start is None else start) * float(self.doc["max_daily_loss_pct"]) / 100.0
+
+    def open_risk_usdt(self) -> float:
+        return sum(risk_of(p) for p in self.positions.values())
+
+    def unrealized_usdt(self) -> float:
+        return sum(pnl_of(p["side"], p["entry"], p["mark"], p["size"]) for p in self.positions.values() if p.get("mark") is not None)
+
+    def budget_usdt(self) -> float:
+        """Risk a new position may still take today (realized profits do not add to it)."""
+        lost = max(0.0, -float(self.doc.get("realized_today_usdt") or 0.0))
+        return self.daily_cap_usdt() - lost - self.open_risk_usdt()
+
+    def symbols(self) -> list[str]:
+        return sorted({p["symbol"] for p in self.positions.values()})
+
+    # --- position changes ------------------------------------------------
+
+    def open(
+        self,
+        symbol: str,
+        side: str,
+        entry: float,
+        sl: float,
+        ts_ms: int,
+        size: Optional[float] = None,
+        setup: str = "",
+        **extra,
+    ) -> tuple[Optional[dict], str]:
+        """New position (sized to risk_pct when size is None); (None, reason) when refused."""
+        self.roll_day(ts_ms)
+        if side not in ("LONG", "SHORT"):
+            return None, f"unknown side {side!r}"
+        dist = entry - sl if side == "LONG" else sl - entry
+        if not dist > 0:
+            return None, f"SL {sl:g} is not on the loss side of entry {entry:g} for {side}"
+        if self.doc.get("halted"):
+            return None, "daily loss cap reached, no new positions until the next UTC day"
+        if len(self.positions) >= int(self.doc["max_positions"]):
+            return None, f"max_positions {self.doc['max_positions']} open"
+        same = [p for p in self.positions.values() if p["symbol"] == symbol]
+        if any(p["side"] != side for p in same):
+            return None, f"{symbol} already has a position on the other side"
+        if len(same) >= int(self.doc["max_per_symbol"]):
+            return None, f"max_per_symbol {self.doc['max_per_symbol']} open on {symbol}"
+
+        per_trade = self.per_trade_risk_usdt()
+        budget = self.budget_usdt()
+        if size is None:
+            target = min(per_trade, budget)
+            if target < per_trade * MIN_RISK_FRACTION:
+                return None, f"daily budget left {max(0.0, budget):.2f} USDT is under {MIN_RISK_FRACTION:g} x the per-trade {per_trade:.2f} (cap {self.daily_cap_usdt():.2f})"
+            size = math.floor(target / dist * 10**SIZE_DECIMALS) / 10**SIZE_DECIMALS
+        risk = size * dist
+        if not (size > 0 and math.isfinite(risk)):
+            return None, "size rounds to 0"
+        if risk > per_trade * (1 + 1e-9):
+            return None, f"risk {risk:.2f} USDT over the per-trade {per_trade:.2f} ({self.doc['risk_pct']}%)"
+        if risk > budget + 1e-9:
+            return None, f"risk {risk:.2f} USDT over the daily budget left {max(0.0, budget):.2f} (cap {self.daily_cap_usdt():.2f})"
+
+        pid = f"{symbol}#{self.doc['next_id']}"
+        self.doc["next_id"] = int(self.doc["next_id"]) + 1
+        pos = {
+            "id": pid,
+            "symbol": symbol,
+            "side": side,
+            "entry": entry,
+            "sl": sl,
+            "size": size,
+            "risk_usdt": round(risk, 4),
+            "opened_ts_utc": snapshot_mtf.iso_utc(ts_ms),
+            "opened_ms": ts_ms,
+            "setup": setup,
+            **extra,
+        }
+        self.positions[pid] = pos
+        return pos, ""
+
+    def close(self, pid: str, price: float, ts_ms: int, reason: str) -> dict:
+        """Remove a position at `price`; its PnL goes to the balance and today's realized."""
+        self.roll_day(ts_ms)
+        pos = self.positions.pop(pid)
+        pnl = pnl_of(pos["side"], pos["entry"], price, pos["size"])
+        self.doc["balance_usdt"] = round(float(self.doc["balance_usdt"]) + pnl, 4)
+        self.doc["realized_today_usdt"] = round(float(self.doc["realized_today_usdt"]) + pnl, 4)
+        r = pnl / pos["risk_usdt"] if pos.get("risk_usdt") else None
+        return dict(pos, exit=price, pnl_usdt=round(pnl, 4), r=None if r is None else round(r, 3), closed_ts_utc=snapshot_mtf.iso_utc(ts_ms), reason=reason)
+
+    def mark(self, quotes: dict[str, Quote], now_ms: int) -> list[dict]:
+        """Per-candle update: stop out positions whose SL traded, mark the rest; returns the closes.
+
+        A position opened after its quote's window started only checks the
+        last price (the window high / low may predate it). Fills at the SL,
+        at the window open when the price gapped past the SL before the
+        window (the first trade was already beyond it), or at the last price
+        for a position opened inside the window.
+        """
+        self.roll_day(now_ms)
+        closed = []
+        for pid, pos in list(self.positions.items()):
+            q = quotes.get(pos["symbol"])
+            if q is None:
+                continue
+            whole = pos.get("opened_ms", 0) <= q.from_ms
+            short = pos["side"] == "SHORT"
+            hi, lo = (q.high, q.low) if whole else (q.last, q.last)
+            if (hi >= pos["sl"]) if short else (lo <= pos["sl"]):
+                if not whole:
+                    fill = q.last
+                elif short:
+                    fill = max(q.open, pos["sl"])
+                else:
+                    fill = min(q.open, pos["sl"])
+                closed.append(self.close(pid, fill, q.to_ms, "SL hit"))
+                continue
+            pos["mark"] = q.last
+            pos["mark_ts_utc"] = snapshot_mtf.iso_utc(q.to_ms)
+        self.doc["last_update_ms"] = now_ms
+        if -(float(self.doc["realized_today_usdt"]) + self.unrealized_usdt()) >= self.daily_cap_usdt():
+            self.doc["halted"] = True
+        return closed
+
+    # --- reporting -------------------------------------------------------
+
+    def report(self) -> dict:
+        bal = float(self.doc["balance_usdt"])
+        rows = []
+        for p in sorted(self.positions.values(), key=lambda p: p["opened_ms"]):
+            u = None if p.get("mark") is None else pnl_of(p["side"], p["entry"], p["mark"], p["size"])
+            rows.append(
+                dict(
+                    p,
+                    risk_now_usdt=round(risk_of(p), 4),
+                    unrealized_usdt=None if u is None else round(u, 4),
+                    r=None if u is None or not p.get("risk_usdt") else round(u / p["risk_usdt"], 3),
+                )
+            )
+        open_risk = self.open_risk_usdt()
+        unrealized = self.unrealized_usdt()
+        realized = float(self.doc.get("realized_today_usdt") or 0.0)
+        by_symbol: dict = {}
+        for p in rows:
+            s = by_symbol.setdefault(p["symbol"], {"positions": 0, "size": 0.0, "risk_usdt": 0.0, "unrealized_usdt": 0.0})
+            s["positions"] += 1
+            s["size"] = round(s["size"] + (p["size"] if p["side"] == "LONG" else -p["size"]), SIZE_DECIMALS)
+            s["risk_usdt"] = round(s["risk_usdt"] + p["risk_now_usdt"], 4)
+            s["unrealized_usdt"] = round(s["unrealized_usdt"] + (p["unrealized_usdt"] or 0.0), 4)
+        return {
+            "balance_usdt": bal,
+            "equity_usdt": round(bal + unrealized, 4),
+            "positions": rows,
+            "by_symbol": by_symbol,
+            "aggregate": {
+                "open_positions": len(rows),
+                "open_risk_usdt": round(open_risk, 4),
+                "open_risk_pct": round(open_risk / bal * 100.0, 3) if bal else None,
+                "unrealized_usdt": round(unrealized, 4),
+                "day": self.doc.get("day"),
+                "realized_today_usdt": round(realized, 4),
+                "daily_cap_usdt": round(self.daily_cap_usdt(), 4),
+                "daily_loss_pct": round(max(0.0, -(realized + unrealized)) / self.doc["day_start_balance"] * 100.0, 3) if self.doc.get("day_start_balance") else 0.0,
+                "budget_left_usdt": round(max(0.0, self.budget_usdt()), 4),
+                "halted": bool(self.doc.get("halted")),
+            },
+        }
+
+
+def ticker_weight(n_symbols: int) -> int:
+    """Request weight of /api/v3/ticker (rolling window) for n symbols."""
+    return min(200, 4 * n_symbols)
+
+
+def fetch_tickers(symbols: list[str], window: str = "15m") -> dict[str, Quote]:
+    """Rolling-window open / high / low / last of all `symbols` (one request per 100 symbols)."""
+    out: dict[str, Quote] = {}
+    tm = stage_timer.ACTIVE
+    for i in range(0, len(symbols), TICKER_MAX_SYMBOLS):
+        chunk = symbols[i : i + TICKER_MAX_SYMBOLS]
+        query = "symbols=" + quote(json.dumps(chunk, separators=(",", ":"))) + f"&windowSize={window}&type=MINI"
+        last_err: Exception | None = None
+        for base in snapshot_mtf.BINANCE_BASE_URLS:
+            for attempt, timeout_s in enumerate([8, 12], start=1):
+                t0 = time.perf_counter()
+                try:
+                    snapshot_mtf.REQUEST_LIMITER.acquire(ticker_weight(len(chunk)))
+                    data = snapshot_mtf.fetch_json(f"{base}/api/v3/ticker?{query}", timeout_s=timeout_s)
+                    assert isinstance(data, list)
+                    if tm is not None:
+                        tm.fetch("ticker", attempt, base, t0)
+                    break
+                except Exception as e:
+                    last_err = e
+                    if tm is not None:
+                        tm.fetch("ticker", attempt, base, t0, e)
+                    if attempt < 2:
+                        time.sleep(0.4 * attempt)
+            else:
+                continue
+            break
+        else:
+            raise last_err  # type: ignore[misc]
+        for t in data:
+            out[t["symbol"]] = Quote(
+                float(t["openPrice"]),
+                float(t["highPrice"]),
+                float(t["lowPrice"]),
+                float(t["lastPrice"]),
+                int(t["openTime"]),
+                int(t["closeTime"]),
+            )
+    return out
+
+
+def fetch_kline_quotes(symbols: list[str], from_ms: int, to_ms: int, interval: str = "15m") -> dict[str, Quote]:
+    """open / high / low / last of each symbol over the klines from from_ms (aligned down) to to_ms.
+
+    For gaps the ticker window cannot reach (> TICKER_MAX_WINDOW_MS); one paged
+    /api/v3/klines walk per symbol.
+    """
+    step = kline_cache.interval_ms(interval)
+    start = from_ms // step * step
+    out: dict[str, Quote] = {}
+    for symbol in symbols:
+        rows = [r for r in kline_cache.fetch_since(snapshot_mtf.fetch_klines, symbol, interval, start, step, to_ms) if int(r[0]) <= to_ms]
+        if not rows:
+            continue
+        out[symbol] = Quote(
+            float(rows[0][1]),
+            max(float(r[2]) for r in rows),
+            min(float(r[3]) for r in rows),
+            float(rows[-1][4]),
+            int(rows[0][0]),
+            to_ms,
+        )
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--db", required=True)
+    ap.add_argument("--key", default=KEY)
+    ap.add_argument("--prices", action="store_true", help="mark the positions with one ticker request (not saved)")
+    ap.add_argument("--window", default="15m", help="ticker window for --prices")
+    args = ap.parse_args()
+
+    book = Portfolio(open_store(args.db).get(args.key, defaults()))
+    if args.prices and book.positions:
+        now_ms = int(time.time() * 1000)
+        quotes = fetch_tickers(book.symbols(), args.window)
+        for p in book.positions.values():
+            q = quotes.get(p["symbol"])
+            if q is not None:
+                p["mark"], p["mark_ts_utc"] = q.last, snapshot_mtf.iso_utc(now_ms)
+    print(json.dumps({"module": "portfolio", "version": "0.1", "db": args.db, "key": args.key, **book.report()}, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,7 @@
 """Simple Binance BTCUSDT signal generator (no external deps).
 
 - Fetches klines from Binance public REST
-- Computes RSI(14), EMA(9), WMA(45)
+- Computes RSI(14), EMA(9), WMA(45) (lengths overridable; tune with sweep_signal.py)
 - Emits a JSON object to stdout
 
 This is intentionally minimal so it can run inside OpenClaw cron via tool exec.
@@ -13,29 +13,52 @@ from __future__ import annotations
 import argparse
 import json
 import math
+import os
 import time
 from datetime import datetime, timezone
-from urllib.request import urlopen, Request
 
+import http_client
+import stage_timer
+from candle_series import CandleSeries
+from kline_cache import KlineCache
 
-def fetch_binance_klines(symbol: str, interval: str, limit: int) -> list[list]:
+# first entry of BINANCE_BASE_URLS (same variable as snapshot_mtf.py), e.g. a local mock_binance_rest.py
+BASE_URL = (os.environ.get("BINANCE_BASE_URLS") or "https://api.binance.com").split(",")[0].strip().rstrip("/")
+
+
+def fetch_binance_klines(
+    symbol: str,
+    interval: str,
+    limit: int,
+    start_ms: int | None = None,
+    end_ms: int | None = None,
+) -> list[list]:
     """Fetch klines with small retry/backoff to survive transient timeouts."""
     # https://binance-docs.github.io/apidocs/spot/en/#kline-candlestick-data
     url = (
-        "https://api.binance.com/api/v3/klines"
+        f"{BASE_URL}/api/v3/klines"
         f"?symbol={symbol}&interval={interval}&limit={limit}"
     )
+    if start_ms is not None:
+        url += f"&startTime={start_ms}"
+    if end_ms is not None:
+        url += f"&endTime={end_ms}"
 
     last_err: Exception | None = None
+    tm = stage_timer.ACTIVE
     # 3 tries: 8s, 12s, 20s timeouts
     for attempt, timeout_s in enumerate([8, 12, 20], start=1):
+        t0 = time.perf_counter()
         try:
-            req = Request(url, headers={"User-Agent": "openclaw-cron"})
-            with urlopen(req, timeout=timeout_s) as resp:
-                raw = resp.read().decode("utf-8")
-            return json.loads(raw)
+            # pooled keep-alive connection + gzip (see http_client.py)
+            data = http_client.get_json(url, timeout_s=timeout_s, headers={"User-Agent": "openclaw-cron"})
+            if tm is not None:
+                tm.fetch(interval, attempt, BASE_URL, t0)
+            return data
         except Exception as e:
             last_err = e
+            if tm is not None:
+                tm.fetch(interval, attempt, BASE_URL, t0, e)
             # brief backoff (attempt 1 -> 0.5s, attempt 2 -> 1.0s)
             if attempt < 3:
                 time.sleep(0.5 * attempt)
@@ -121,10 +144,22 @@ def main() -> None:
     # - SELL only if RSI >= rsi_sell_min
     ap.add_argument("--rsi-buy-max", type=float, default=60.0)
     ap.add_argument("--rsi-sell-min", type=float, default=40.0)
+    # output keys stay ema9/wma45/rsi14 whatever the lengths
+    ap.add_argument("--ema-len", type=int, default=9)
+    ap.add_argument("--wma-len", type=int, default=45)
+    ap.add_argument("--rsi-len", type=int, default=14)
+    ap.add_argument("--cache-dir", default=None, help="shared kline store, e.g. trading/cache/klines")
+    stage_timer.add_arguments(ap)
     args = ap.parse_args()
+    stage_timer.configure(args.timings, args.timings_log)
+    stage_timer.begin()
 
     try:
-        klines = fetch_binance_klines(args.symbol, args.interval, args.limit)
+        with stage_timer.stage(f"fetch.{args.interval}"):
+            if args.cache_dir:
+                klines = KlineCache(args.cache_dir, fetch_binance_klines).get(args.symbol, args.interval, args.limit)
+            else:
+                klines = fetch_binance_klines(args.symbol, args.interval, args.limit)
     except Exception as e:
         # Emit a clean JSON error so cron/agent can relay it predictably.
         err = {
@@ -139,20 +174,21 @@ def main() -> None:
                 "now_ms": int(time.time() * 1000),
             },
         }
+        timings = stage_timer.end("run_signal")
+        if timings is not None:
+            err["meta"]["timings"] = timings
         print(json.dumps(err, ensure_ascii=False))
         return
 
     # kline format: [ openTime, open, high, low, close, volume, closeTime, ...]
-    closes = [float(k[4]) for k in klines]
-    opens = [float(k[1]) for k in klines]
-    highs = [float(k[2]) for k in klines]
-    lows = [float(k[3]) for k in klines]
-    vols = [float(k[5]) for k in klines]
-    open_times = [int(k[0]) for k in klines]
+    with stage_timer.stage(f"convert.{args.interval}"):
+        candles = CandleSeries.from_klines(klines)
+        closes = candles.closes
 
-    ema9 = ema(closes, 9)
-    wma45 = wma(closes, 45)
-    rsi14 = rsi(closes, 14)
+    with stage_timer.stage(f"indicators.{args.interval}"):
+        ema9 = ema(closes, args.ema_len)
+        wma45 = wma(closes, args.wma_len)
+        rsi14 = rsi(closes, args.rsi_len)
 
     i = len(closes) - 1
     if i < 2:
@@ -193,8 +229,11 @@ def main() -> None:
         "filters": {
             "rsi_buy_max": args.rsi_buy_max,
             "rsi_sell_min": args.rsi_sell_min,
+            "ema_len": args.ema_len,
+            "wma_len": args.wma_len,
+            "rsi_len": args.rsi_len,
         },
-        "ts_utc": iso_utc(open_times[i]),
+        "ts_utc": iso_utc(candles.ts_ms[i]),
         "exchange": "binance",
         "symbol": args.symbol,
         "timeframe": args.interval,
@@ -206,17 +245,20 @@ def main() -> None:
         "reason": reason,
         "action": "ALERT_ONLY",
         "raw": {
-            "open": opens[i],
-            "high": highs[i],
-            "low": lows[i],
+            "open": candles.opens[i],
+            "high": candles.highs[i],
+            "low": candles.lows[i],
             "close": closes[i],
-            "volume": vols[i],
+            "volume": candles.volumes[i],
         },
         "meta": {
             "generated_at_utc": datetime.now(timezone.utc).isoformat(),
             "now_ms": int(time.time() * 1000),
         },
     }
+    timings = stage_timer.end("run_signal")
+    if timings is not None:
+        out["meta"]["timings"] = timings
 
     print(json.dumps(out, ensure_ascii=False))
 
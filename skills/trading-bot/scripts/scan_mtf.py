@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""Multi-symbol MTF scanner (Binance public REST, no external deps).
+
+Evaluates the MTF trend labels (module_trend_mtf) and S/R proximity
+(module_sr_mtf) for many USDT pairs per candle close and prints a ranked top-k
+by MTF confluence. Supports the alt branch of trader_spec.yaml
+(`asset_strategy.allow_alt_when`): BTC's own confluence is reported alongside.
+
+Pipeline:
+- fetch: thread pool, every kline request goes through snapshot_mtf.REQUEST_LIMITER
+  (optionally served from the on-disk KlineCache, so repeat scans fetch deltas only)
+- compute: symbols are sharded across a process pool
+
+Example:
+  python3 skills/trading-bot/scripts/scan_mtf.py --top-volume 200 --top-k 20 \
+    --cache-dir trading/cache/klines
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+import module_sr_mtf
+import module_trend_mtf
+import snapshot_mtf
+from kline_cache import KlineCache
+
+BIAS_SCORE = {
+    "BUY_BIAS": 2,
+    "BUY_BIAS_WEAK": 1,
+    "WAIT": 0,
+    "SELL_BIAS_WEAK": -1,
+    "SELL_BIAS": -2,
+}
+
+# leveraged tokens are not tradeable alts for this strategy
+EXCLUDE_SUFFIXES = ("UPUSDT", "DOWNUSDT", "BULLUSDT", "BEARUSDT")
+
+
+def list_symbols(quote: str, top_volume: int) -> list[str]:
+    """Trading pairs quoted in `quote`, most liquid first (24h quote volume)."""
+    last_err: Exception | None = None
+    for base in snapshot_mtf.BINANCE_BASE_URLS:
+        try:
+            snapshot_mtf.REQUEST_LIMITER.acquire(80)  # /ticker/24hr without symbol
+            data = snapshot_mtf.fetch_json(f"{base}/api/v3/ticker/24hr", timeout_s=20)
+            assert isinstance(data, list)
+            break
+        except Exception as e:
+            last_err = e
+    else:
+        raise last_err  # type: ignore[misc]
+
+    rows = [
+        t
+        for t in data
+        if t["symbol"].endswith(quote)
+        and not t["symbol"].endswith(EXCLUDE_SUFFIXES)
+        and int(t.get("count") or 0) > 0
+    ]
+    rows.sort(key=lambda t: -float(t.get("quoteVolume") or 0))
+    return [t["symbol"] for t in rows[:top_volume]]
+
+
+def fetch_symbol(symbol: str, tfs: list[str], limit: int, cache: KlineCache | None) -> dict:
+    out = {}
+    for tf in tfs:
+        if cache is not None:
+            out[tf] = cache.get(symbol, tf, limit)
+        else:
+            out[tf] = snapshot_mtf.fetch_klines(symbol, tf, limit)
+    return out
+
+
+def confluence(labels: dict) -> float:
+    """Weighted bias agreement across TFs in [-1, 1] (+1 = all TFs BUY_BIAS)."""
+    num = 0.0
+    den = 0.0
+    for tf, lab in labels.items():
+        w = module_sr_mtf.TF_WEIGHT.get(tf, 1.0)
+        num += w * BIAS_SCORE.get(lab.get("bias", "WAIT"), 0)
+        den += w * 2
+    return num / den if den else 0.0
+
+
+def evaluate_symbol(symbol: str, tf_klines: dict) -> dict:
+    snap = {"exchange": "binance", "symbol": symbol, "timeframes": {}}
+    for tf, klines in tf_klines.items():
+        candles = snapshot_mtf.klines_to_candles(klines)
+        snap["timeframes"][tf] = {
+            "interval": tf,
+            "candles": candles,
+            "indicators": snapshot_mtf.compute_indicators(candles),
+        }
+
+    trend = module_trend_mtf.analyze(snap)
+    sr = module_sr_mtf.analyze(snap)
+
+    score = confluence(trend["labels"])
+    price = (sr.get("ref") or {}).get("price")
+    sup = sr.get("nearest_support")
+    res = sr.get("nearest_resistance")
+
+    def dist_pct(level: float | None) -> float | None:
+        if price is None or level is None:
+            return None
+        return round(abs(price - level) / price * 100.0, 3)
+
+    return {
+        "symbol": symbol,
+        "direction": "LONG" if score > 0 else "SHORT" if score < 0 else "WAIT",
+        "confluence": round(score, 4),
+        "overall_bias": trend["overall_bias"],
+        "biases": {tf: lab["bias"] for tf, lab in trend["labels"].items()},
+        "price": price,
+        "nearest_support": sup,
+        "nearest_resistance": res,
+        "support_dist_pct": dist_pct(sup["hi"] if sup else None),
+        "resistance_dist_pct": dist_pct(res["lo"] if res else None),
+    }
+
+
+def evaluate_chunk(items: list[tuple[str, dict]]) -> list[dict]:
+    out = []
+    for symbol, tf_klines in items:
+        try:
+            out.append(evaluate_symbol(symbol, tf_klines))
+        except Exception as e:
+            out.append({"symbol": symbol, "error": str(e)})
+    return out
+
+
+def rank_key(row: dict):
+    # strongest agreement first; then more room towards the opposing zone
+    room = row["resistance_dist_pct"] if row["direction"] == "LONG" else row["support_dist_pct"]
+    return (-abs(row["confluence"]), -(room if room is not None else 0.0))
+
+
+def scan(
+    symbols: list[str],
+    tfs: list[str],
+    limit: int,
+    top_k: int = 20,
+    fetch_workers: int = 16,
+    procs: int | None = None,
+    cache_dir: Path | str | None = None,
+) -> dict:
+    cache = KlineCache(cache_dir, snapshot_mtf.fetch_klines) if cache_dir else None
+    errors: list[str] = []
+    fetched: list[tuple[str, dict]] = []
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, fetch_workers)) as pool:
+        futures = [(s, pool.submit(fetch_symbol, s, tfs, limit, cache)) for s in symbols]
+        for s, fut in futures:
+            try:
+                fetched.append((s, fut.result()))
+            except Exception as e:
+                errors.append(f"{s}: {e}")
+    t_fetch = time.perf_counter() - t0
+
+    procs = procs or os.cpu_count() or 1
+    # a few chunks per process keeps the pool busy without pickling per symbol
+    n_chunks = max(1, min(len(fetched), procs * 4))
+    chunks = [fetched[i::n_chunks] for i in range(n_chunks)]
+
+    t1 = time.perf_counter()
+    results: list[dict] = []
+    if procs <= 1:
+        for c in chunks:
+            results.extend(evaluate_chunk(c))
+    else:
+        with ProcessPoolExecutor(max_workers=procs) as pool:
+            for part in pool.map(evaluate_chunk, chunks):
+                results.extend(part)
+    t_compute = time.perf_counter() - t1
+
+    ok = []
+    for r in results:
+        if "error" in r:
+            errors.append(f"{r['symbol']}: {r['error']}")
+        else:
+            ok.append(r)
+    ranked = sorted((r for r in ok if r["direction"] != "WAIT"), key=rank_key)
+    btc = next((r for r in ok if r["symbol"] == "BTCUSDT"), None)
+
+    return {
+        "module": "scan_mtf",
+        "version": "0.1",
+        "exchange": "binance",
+        "generated_at_utc": datetime.now(timezone.utc).isoformat(),
+        "tfs": tfs,
+        "scanned": len(ok),
+        "btc": {"confluence": btc["confluence"], "overall_bias": btc["overall_bias"]} if btc else None,
+        "top": ranked[:top_k],
+        "errors": errors,
+        "meta": {"fetch_s": round(t_fetch, 3), "compute_s": round(t_compute, 3), "procs": procs},
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--symbols", default="", help="comma list; default: top USDT pairs by volume")
+    ap.add_argument("--quote", default="USDT")
+    ap.add_argument("--top-volume", type=int, default=200)
+    ap.add_argument("--tfs", default="1d,4h,1h,15m")
+    ap.add_argument("--limit", type=int, default=210)
+    ap.add_argument("--top-k", type=int, default=20)
+    ap.add_argument("--fetch-workers", type=int, default=16)
+    ap.add_argument("--procs", type=int, default=None, help="compute processes (default: cpu count)")
+    ap.add_argument("--weight-per-min", type=float, default=None, help="override request-weight budget")
+    ap.add_argument("--cache-dir", default=None, help="persistent kline store (delta-only fetching)")
+    args = ap.parse_args()
+
+    if args.weight_per_min:
+        snapshot_mtf.REQUEST_LIMITER = snapshot_mtf.WeightLimiter(
+            weight_per_min=args.weight_per_min, burst=args.weight_per_min / 20
+        )
+
+    tfs = [tf.strip() for tf in args.tfs.split(",") if tf.strip()]
+    if args.symbols:
+        symbols = [s.strip().upper() for s in args.symbols.split(",") if s.strip()]
+    else:
+        symbols = list_symbols(args.quote, args.top_volume)
+
+    out = scan(
+        symbols,
+        tfs,
+        args.limit,
+        top_k=args.top_k,
+        fetch_workers=args.fetch_workers,
+        procs=args.procs,
+        cache_dir=args.cache_dir,
+    )
+    print(json.dumps(out, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
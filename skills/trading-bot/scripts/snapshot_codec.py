@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""Columnar snapshot encoding (versioned; JSON or binary; no external deps).
+
+The legacy snapshot (snapshot.schema.json) stores one dict per candle with an
+ISO-8601 `ts_utc`. The columnar form keeps, per timeframe, parallel columns:
+
+  ts_ms (int64 epoch ms of the candle open), open, high, low, close, volume (float64)
+
+Top level: {"format": FORMAT, "version": VERSION, "exchange", "symbol",
+"generated_at_utc", "timeframes": {tf: {"interval", "ts_ms", "open", ...,
+"indicators"}}} (plus "error"/"error_message" when present).
+
+Binary layout (little-endian):
+  MAGIC | u32 header length | header JSON (the top level without the columns,
+  each TF with "n" = candle count, TFs in a list to keep their order) |
+  per TF: ts_ms int64[n], then open/high/low/close/volume float64[n]
+
+load_bytes() auto-detects binary / columnar JSON / legacy JSON, and
+module_trend_mtf / module_sr_mtf accept both in-memory shapes through
+n_candles() / column() / ts_utc_at().
+
+Example:
+  python3 skills/trading-bot/scripts/snapshot_mtf.py --format binary > /tmp/snap.bin
+  python3 skills/trading-bot/scripts/module_sr_mtf.py < /tmp/snap.bin
+  python3 skills/trading-bot/scripts/snapshot_codec.py --to json < /tmp/snap.bin   # legacy JSON
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import struct
+import sys
+from array import array
+from datetime import datetime, timezone
+from typing import Any, Sequence
+
+import candle_series
+
+FORMAT = "openclaw.snapshot.columnar"
+VERSION = 1
+MAGIC = b"OCSNAPB\x01"
+
+PRICE_COLS = ("open", "high", "low", "close", "volume")
+META_KEYS = ("exchange", "symbol", "generated_at_utc", "error", "error_message")
+
+_SWAP = sys.byteorder != "little"
+
+
+def iso_utc(ms: int) -> str:
+    return datetime.fromtimestamp(ms / 1000.0, tz=timezone.utc).isoformat()
+
+
+def parse_iso_ms(ts: str) -> int:
+    return int(round(datetime.fromisoformat(ts).timestamp() * 1000))
+
+
+def is_columnar(snapshot: dict) -> bool:
+    return snapshot.get("format") == FORMAT
+
+
+# --- accessors that work on both block shapes ---
+
+
+def n_candles(block: dict) -> int:
+    if "ts_ms" in block:
+        return len(block["ts_ms"])
+    return len(block.get("candles") or [])
+
+
+def column(block: dict, name: str) -> Sequence[float]:
+    """One price/volume column of a TF block (zero-copy unless the candles are dicts)."""
+    if "ts_ms" in block:
+        return block[name]
+    return candle_series.column(block.get("candles") or [], name)
+
+
+def ts_utc_at(block: dict, i: int) -> str:
+    if "ts_ms" in block:
+        return iso_utc(int(block["ts_ms"][i]))
+    return block["candles"][i]["ts_utc"]
+
+
+# --- conversions ---
+
+
+def to_columnar(snapshot: dict) -> dict:
+    if is_columnar(snapshot):
+        return snapshot
+    out: dict[str, Any] = {"format": FORMAT, "version": VERSION}
+    for k in META_KEYS:
+        if k in snapshot:
+            out[k] = snapshot[k]
+    out["timeframes"] = {}
+    for tf, block in (snapshot.get("timeframes") or {}).items():
+        candles = block.get("candles") or []
+        cols: dict[str, Any] = {"interval": block.get("interval", tf)}
+        if isinstance(candles, candle_series.CandleSeries):
+            cols.update(candles.columns())
+        else:
+            cols["ts_ms"] = array("q", [parse_iso_ms(c["ts_utc"]) for c in candles])
+            for name in PRICE_COLS:
+                cols[name] = array("d", [float(c[name]) for c in candles])
+        if "indicators" in block:
+            cols["indicators"] = block["indicators"]
+        out["timeframes"][tf] = cols
+    return out
+
+
+def to_legacy(snapshot: dict) -> dict:
+    """Columnar -> the list-of-dicts snapshot (snapshot.schema.json)."""
+    if not is_columnar(snapshot):
+        return snapshot
+    out: dict[str, Any] = {k: snapshot[k] for k in META_KEYS if k in snapshot}
+    out["timeframes"] = {}
+    for tf, block in (snapshot.get("timeframes") or {}).items():
+        ts = block["ts_ms"]
+        o, h, lo, c, v = (block[name] for name in PRICE_COLS)
+        tb = {
+            "interval": block.get("interval", tf),
+            "candles": [
+                {
+                    "ts_utc": iso_utc(int(ts[i])),
+                    "open": float(o[i]),
+                    "high": float(h[i]),
+                    "low": float(lo[i]),
+                    "close": float(c[i]),
+                    "volume": float(v[i]),
+                }
+                for i in range(len(ts))
+            ],
+        }
+        if "indicators" in block:
+            tb["indicators"] = block["indicators"]
+        out["timeframes"][tf] = tb
+    return out
+
+
+# --- serialisation ---
+
+
+def encode_json(snapshot: dict) -> bytes:
+    col = to_columnar(snapshot)
+    out = dict(col)
+    out["timeframes"] = {
+        tf: {k: (v.tolist() if isinstance(v, array) else v) for k, v in block.items()}
+        for tf, block in col["timeframes"].items()
+    }
+    return json.dumps(out, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def encode_binary(snapshot: dict) -> bytes:
+    col = to_columnar(snapshot)
+    header: dict[str, Any] = {k: v for k, v in col.items() if k != "timeframes"}
+    header["timeframes"] = []
+    chunks: list[bytes] = []
+    for tf, block in col["timeframes"].items():
+        meta = {k: v for k, v in block.items() if k != "ts_ms" and k not in PRICE_COLS}
+        meta["tf"] = tf
+        meta["n"] = len(block["ts_ms"])
+        header["timeframes"].append(meta)
+        for name, code in (("ts_ms", "q"),) + tuple((c, "d") for c in PRICE_COLS):
+            a = block[name] if isinstance(block[name], array) else array(code, block[name])
+            if _SWAP:
+                a = array(code, a)
+                a.byteswap()
+            chunks.append(a.tobytes())
+    head = json.dumps(header, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return MAGIC + struct.pack("<I", len(head)) + head + b"".join(chunks)
+
+
+def decode_binary(data: bytes) -> dict:
+    if data[: len(MAGIC)] != MAGIC:
+        raise ValueError("not a binary columnar snapshot")
+    (hlen,) = struct.unpack_from("<I", data, len(MAGIC))
+    pos = len(MAGIC) + 4
+    header = json.loads(data[pos : pos + hlen].decode("utf-8"))
+    pos += hlen
+    if header.get("version") != VERSION:
+        raise ValueError(f"unsupported snapshot version: {header.get('version')}")
+    view = memoryview(data)
+    out = {k: v for k, v in header.items() if k != "timeframes"}
+    out["timeframes"] = {}
+    for meta in header["timeframes"]:
+        n = meta.pop("n")
+        tf = meta.pop("tf")
+        block = dict(meta)
+        for name, code in (("ts_ms", "q"),) + tuple((c, "d") for c in PRICE_COLS):
+            a = array(code)
+            a.frombytes(view[pos : pos + n * 8])
+            if _SWAP:
+                a.byteswap()
+            block[name] = a
+            pos += n * 8
+        out["timeframes"][tf] = block
+    return out
+
+
+def dumps(snapshot: dict, fmt: str = "json") -> bytes:
+    """fmt: json (legacy, compatibility), columnar (JSON) or binary."""
+    if fmt == "binary":
+        return encode_binary(snapshot)
+    if fmt == "columnar":
+        return encode_json(snapshot)
+    if fmt == "json":
+        return json.dumps(to_legacy(snapshot), ensure_ascii=False, default=candle_series.json_default).encode("utf-8")
+    raise ValueError(f"unknown snapshot format: {fmt}")
+
+
+def load_bytes(data: bytes) -> dict:
+    """Binary, columnar JSON or legacy JSON -> snapshot dict (shape kept as sent)."""
+    if data[: len(MAGIC)] == MAGIC:
+        return decode_binary(data)
+    snap = json.loads(data.decode("utf-8"))
+    if is_columnar(snap) and snap.get("version") != VERSION:
+        raise ValueError(f"unsupported snapshot version: {snap.get('version')}")
+    return snap
+
+
+def load_stdin() -> dict:
+    return load_bytes(sys.stdin.buffer.read())
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="convert a snapshot between encodings (stdin -> stdout)")
+    ap.add_argument("--to", choices=["json", "columnar", "binary"], default="json")
+    args = ap.parse_args()
+    sys.stdout.buffer.write(dumps(load_stdin(), args.to))
+    if args.to != "binary":
+        sys.stdout.buffer.write(b"\n")
+
+
+if __name__ == "__main__":
+    main()
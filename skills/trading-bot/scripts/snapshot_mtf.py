@@ -6,15 +6,32 @@ Designed to match `skills/trading-bot/references/schemas/snapshot.schema.json`.
 
 Example:
   python3 skills/trading-bot/scripts/snapshot_mtf.py --symbol BTCUSDT --tfs 1d,4h,1h,15m --limit 210
+  python3 skills/trading-bot/scripts/snapshot_mtf.py --format binary | python3 skills/trading-bot/scripts/module_sr_mtf.py
+
+In-process (no subprocess / JSON round trip):
+  snap = snapshot_mtf.build_snapshot("BTCUSDT", ["1d", "4h", "1h", "15m"], 210)
 """
 
 from __future__ import annotations
 
 import argparse
 import json
+import os
+import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
-from urllib.request import urlopen, Request
+from pathlib import Path
+from typing import Sequence
+
+import http_client
+import indicators_vec
+import snapshot_codec
+import stage_timer
+from candle_series import CandleSeries, column, json_default
+from indicators_stream import RsiMaChain, chain_key, load_chains, save_chains
+from kline_cache import KlineCache
 
 
 def ema(values: list[float], length: int) -> list[float | None]:
@@ -84,6 +101,51 @@ BINANCE_BASE_URLS = [
     # Fallback for connectivity / geofencing scenarios
     "https://data-api.binance.vision",
 ]
+# e.g. BINANCE_BASE_URLS=http://127.0.0.1:8090,http://127.0.0.1:8091 (mock_binance_rest.py)
+if os.environ.get("BINANCE_BASE_URLS"):
+    BINANCE_BASE_URLS = [u.strip().rstrip("/") for u in os.environ["BINANCE_BASE_URLS"].split(",") if u.strip()]
+
+
+class WeightLimiter:
+    """Token bucket over Binance request weight, shared by all fetch threads.
+
+    Replaces the fixed sleep between timeframes: requests go out immediately
+    while the budget allows and only block once the per-minute weight is spent.
+    """
+
+    def __init__(self, weight_per_min: float, burst: float):
+        self.rate = weight_per_min / 60.0
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, weight: float) -> None:
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= weight:
+                    self.tokens -= weight
+                    return
+                wait_s = (weight - self.tokens) / self.rate
+            time.sleep(wait_s)
+
+
+# Binance allows 6000 weight/min per IP; stay well below it since other jobs share the host.
+REQUEST_LIMITER = WeightLimiter(weight_per_min=1200, burst=60)
+
+
+def kline_weight(limit: int) -> int:
+    """Request weight of /api/v3/klines for a given limit."""
+    if limit <= 100:
+        return 1
+    if limit <= 500:
+        return 2
+    if limit <= 1000:
+        return 5
+    return 10
 
 
 def iso_utc(ms: int) -> str:
@@ -91,50 +153,61 @@ def iso_utc(ms: int) -> str:
 
 
 def fetch_json(url: str, timeout_s: int) -> object:
-    req = Request(url, headers={"User-Agent": "openclaw-trading-bot"})
-    with urlopen(req, timeout=timeout_s) as resp:
-        return json.loads(resp.read().decode("utf-8"))
+    # pooled keep-alive connection + gzip (see http_client.py)
+    return http_client.get_json(url, timeout_s=timeout_s, headers={"User-Agent": "openclaw-trading-bot"})
 
 
-def fetch_klines(symbol: str, interval: str, limit: int) -> list[list]:
+def fetch_klines(
+    symbol: str,
+    interval: str,
+    limit: int,
+    start_ms: int | None = None,
+    end_ms: int | None = None,
+) -> list[list]:
     """Fetch klines with retries across base URLs and timeouts."""
+    query = f"symbol={symbol}&interval={interval}&limit={limit}"
+    if start_ms is not None:
+        query += f"&startTime={start_ms}"
+    if end_ms is not None:
+        query += f"&endTime={end_ms}"
+
     last_err: Exception | None = None
+    tm = stage_timer.ACTIVE
     for base in BINANCE_BASE_URLS:
-        url = f"{base}/api/v3/klines?symbol={symbol}&interval={interval}&limit={limit}"
+        url = f"{base}/api/v3/klines?{query}"
         for attempt, timeout_s in enumerate([8, 12, 20], start=1):
             try:
+                REQUEST_LIMITER.acquire(kline_weight(limit))
+                t0 = time.perf_counter()
                 data = fetch_json(url, timeout_s=timeout_s)
                 assert isinstance(data, list)
+                if tm is not None:
+                    tm.fetch(interval, attempt, base, t0)
                 return data  # type: ignore[return-value]
             except Exception as e:
                 last_err = e
+                if tm is not None:
+                    tm.fetch(interval, attempt, base, t0, e)
                 if attempt < 3:
                     time.sleep(0.4 * attempt)
                 continue
     raise last_err  # type: ignore[misc]
 
 
-def klines_to_candles(klines: list[list]) -> list[dict]:
-    candles: list[dict] = []
+def klines_to_candles(klines: list[list]) -> CandleSeries:
     # kline format: [ openTime, open, high, low, close, volume, closeTime, ...]
-    for k in klines:
-        open_time = int(k[0])
-        candles.append(
-            {
-                "ts_utc": iso_utc(open_time),
-                "open": float(k[1]),
-                "high": float(k[2]),
-                "low": float(k[3]),
-                "close": float(k[4]),
-                "volume": float(k[5]),
-            }
-        )
-    return candles
-
-
-def compute_indicators(candles: list[dict]) -> dict:
-    """Compute RSI14 + EMA9(RSI14) + WMA45(RSI14)."""
-    closes = [float(c["close"]) for c in candles]
+    # array-backed columns; candles[i]["close"] / ["ts_utc"] still work (candle_series.Candle)
+    return CandleSeries.from_klines(klines)
+
+
+def rsi_ma_values(closes: Sequence[float]) -> tuple:
+    """(RSI14, EMA9(RSI14), WMA45(RSI14)) at the last close, from the full series.
+
+    Long windows go through indicators_vec (NumPy) when that backend is active.
+    """
+    if indicators_vec.active(len(closes)):
+        series = indicators_vec.rsi_ma_chain(list(closes))
+        return tuple(None if s.size == 0 or s[-1] != s[-1] else float(s[-1]) for s in series)
     rsi14 = rsi(closes, 14)
 
     # For EMA/WMA of RSI, replace None with previous value to keep series usable.
@@ -150,11 +223,15 @@ def compute_indicators(candles: list[dict]) -> dict:
     ema9_rsi14 = ema(rsi_filled, 9)
     wma45_rsi14 = wma(rsi_filled, 45)
 
-    i = len(candles) - 1
+    i = len(closes) - 1
+    return rsi14[i], ema9_rsi14[i], wma45_rsi14[i]
+
+
+def indicators_block(rsi_v, ema_v, wma_v) -> dict:
     return {
-        "rsi": {"length": 14, "value": rsi14[i]},
-        "ema_rsi": {"length": 9, "value": ema9_rsi14[i]},
-        "wma_rsi": {"length": 45, "value": wma45_rsi14[i]},
+        "rsi": {"length": 14, "value": rsi_v},
+        "ema_rsi": {"length": 9, "value": ema_v},
+        "wma_rsi": {"length": 45, "value": wma_v},
         "rules": {
             "A": {"kind": "midline", "mid": 50},
             "B": {"kind": "band", "low": 40, "high": 60},
@@ -162,43 +239,170 @@ def compute_indicators(candles: list[dict]) -> dict:
     }
 
 
-def main() -> None:
-    ap = argparse.ArgumentParser()
-    ap.add_argument("--symbol", default="BTCUSDT")
-    ap.add_argument("--tfs", default="1d,4h,1h,15m")
-    ap.add_argument("--limit", type=int, default=210)
-    args = ap.parse_args()
+def compute_indicators(candles: CandleSeries | list[dict], chain: RsiMaChain | None = None) -> dict:
+    """Compute RSI14 + EMA9(RSI14) + WMA45(RSI14).
+
+    With a persisted `chain` only the newly closed candles are pushed (O(1) each)
+    instead of recomputing the whole series.
+    """
+    if chain is not None:
+        return indicators_block(*chain.sync(candles))
+    return indicators_block(*rsi_ma_values(column(candles, "close")))
+
+
+def build_timeframe(
+    symbol: str,
+    tf: str,
+    limit: int,
+    cache: KlineCache | None = None,
+    chain: RsiMaChain | None = None,
+    columnar: bool = False,
+) -> dict:
+    with stage_timer.stage(f"fetch.{tf}"):
+        if cache is not None:
+            klines = cache.get(symbol, tf, limit)
+        else:
+            klines = fetch_klines(symbol, tf, limit)
+    return timeframe_block(tf, klines, chain, columnar)
+
+
+def timeframe_block(
+    tf: str, klines: list[list], chain: RsiMaChain | None = None, columnar: bool = False
+) -> dict:
+    with stage_timer.stage(f"convert.{tf}"):
+        candles = klines_to_candles(klines)
+    with stage_timer.stage(f"indicators.{tf}"):
+        indicators = compute_indicators(candles, chain)
+    if columnar:
+        return {"interval": tf, **candles.columns(), "indicators": indicators}
+    return {
+        "interval": tf,
+        "candles": candles,
+        "indicators": indicators,
+    }
 
-    tfs = [tf.strip() for tf in args.tfs.split(",") if tf.strip()]
+
+def snapshot_from_klines(symbol: str, tf_klines: dict, chains: dict | None = None) -> dict:
+    """Snapshot dict from kline rows already in memory (e.g. kline_stream buffers)."""
+    snapshot = {
+        "exchange": "binance",
+        "symbol": symbol,
+        "generated_at_utc": datetime.now(timezone.utc).isoformat(),
+        "timeframes": {},
+    }
+    for tf, klines in tf_klines.items():
+        chain = chains.setdefault(chain_key(symbol, tf), RsiMaChain()) if chains is not None else None
+        snapshot["timeframes"][tf] = timeframe_block(tf, klines, chain)
+    return snapshot
+
+
+def build_snapshot(
+    symbol: str,
+    tfs: list[str],
+    limit: int,
+    workers: int = 8,
+    cache_dir: Path | str | None = None,
+    indicator_state: Path | str | None = None,
+    cache: KlineCache | None = None,
+    chains: dict | None = None,
+    columnar: bool = False,
+) -> dict:
+    """Fetch all timeframes and return the snapshot dict (in-process API).
+
+    Timeframes are fetched concurrently on `workers` threads (1 = sequential);
+    pacing is left to REQUEST_LIMITER. With `cache_dir`, candles come from the
+    on-disk KlineCache and only the delta since the last closed candle is fetched.
+    With `indicator_state`, streaming indicator state is loaded from / saved to
+    that JSON file so only newly closed candles are pushed through RSI/EMA/WMA.
+    A long-running caller passes its own `cache` / `chains` to keep them warm
+    between calls (chains are still saved to `indicator_state` if given).
+    With `columnar`, TF blocks hold snapshot_codec columns instead of candle dicts.
+    """
+    if cache is None and cache_dir:
+        cache = KlineCache(cache_dir, fetch_klines)
+    if chains is None and indicator_state:
+        with stage_timer.stage("indicator_state.load"):
+            chains = load_chains(indicator_state)
+
+    def tf_chain(tf: str) -> RsiMaChain | None:
+        if chains is None:
+            return None
+        return chains.setdefault(chain_key(symbol, tf), RsiMaChain())
 
     snapshot = {
         "exchange": "binance",
-        "symbol": args.symbol,
+        "symbol": symbol,
         "generated_at_utc": datetime.now(timezone.utc).isoformat(),
         "timeframes": {},
     }
+    if columnar:
+        snapshot = {"format": snapshot_codec.FORMAT, "version": snapshot_codec.VERSION, **snapshot}
 
     errors: list[str] = []
 
-    for tf in tfs:
-        try:
-            klines = fetch_klines(args.symbol, tf, args.limit)
-            candles = klines_to_candles(klines)
-            snapshot["timeframes"][tf] = {
-                "interval": tf,
-                "candles": candles,
-                "indicators": compute_indicators(candles),
-            }
-            # small spacing to be gentle to API
-            time.sleep(0.15)
-        except Exception as e:
-            errors.append(f"{tf}: {e}")
+    with stage_timer.stage("snapshot"), ThreadPoolExecutor(max_workers=max(1, min(workers, len(tfs) or 1))) as pool:
+        futures = [
+            (tf, pool.submit(build_timeframe, symbol, tf, limit, cache, tf_chain(tf), columnar)) for tf in tfs
+        ]
+        # collect in requested order so output and error_message stay deterministic
+        for tf, fut in futures:
+            try:
+                snapshot["timeframes"][tf] = fut.result()
+            except Exception as e:
+                errors.append(f"{tf}: {e}")
+
+    if chains is not None and indicator_state:
+        with stage_timer.stage("indicator_state.save"):
+            save_chains(indicator_state, chains)
 
     if errors:
         snapshot["error"] = True
         snapshot["error_message"] = "; ".join(errors)
 
-    print(json.dumps(snapshot, ensure_ascii=False))
+    return snapshot
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--symbol", default="BTCUSDT")
+    ap.add_argument("--tfs", default="1d,4h,1h,15m")
+    ap.add_argument("--limit", type=int, default=210)
+    ap.add_argument("--workers", type=int, default=8, help="concurrent TF fetches (1 = sequential)")
+    ap.add_argument("--cache-dir", default=None, help="persistent kline store (delta-only fetching)")
+    ap.add_argument("--indicator-state", default=None, help="JSON file for streaming indicator state")
+    ap.add_argument(
+        "--format",
+        choices=["json", "columnar", "binary"],
+        default="json",
+        help="json = legacy candle dicts; columnar / binary = snapshot_codec encodings",
+    )
+    stage_timer.add_arguments(ap)
+    indicators_vec.add_arguments(ap)
+    args = ap.parse_args()
+    stage_timer.configure(args.timings, args.timings_log)
+    indicators_vec.configure(args.indicators)
+    stage_timer.begin()
+
+    tfs = [tf.strip() for tf in args.tfs.split(",") if tf.strip()]
+    snapshot = build_snapshot(
+        args.symbol,
+        tfs,
+        args.limit,
+        workers=args.workers,
+        cache_dir=args.cache_dir,
+        indicator_state=args.indicator_state,
+        columnar=args.format != "json",
+    )
+    timings = stage_timer.end("snapshot_mtf")
+    if timings is not None:
+        snapshot["meta"] = {"timings": timings}
+
+    if args.format == "json":
+        print(json.dumps(snapshot, ensure_ascii=False, default=json_default))
+    else:
+        sys.stdout.buffer.write(snapshot_codec.dumps(snapshot, args.format))
+        if args.format == "columnar":
+            sys.stdout.buffer.write(b"\n")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""Per-stage wall-clock timings for one run (no external deps).
+
+Off by default. When off, ACTIVE is None and stage() hands back a shared no-op
+context manager, so the instrumented code pays one global lookup per stage.
+
+Turn on with --timings / --timings-log (cron_15m_bot, cron_15m_context,
+snapshot_mtf, run_signal) or the env vars TRADING_TIMINGS=1 /
+TRADING_TIMINGS_LOG=<path>. Each run then carries
+  meta.timings = {"total_ms", "stages": {name: ms}, "fetches": [per attempt]}
+(cron_15m_bot prints it to stderr as "TIMINGS: {...}" since stdout is the
+TELEGRAM/NOOP line), and with a log path one JSON line per run is appended
+to a rolling log (trimmed to the newest half past LOG_MAX_BYTES).
+
+Stage names: fetch.<tf> / convert.<tf> / indicators.<tf> (per TF, run
+concurrently, so they overlap in wall time), snapshot (all TFs),
+indicator_state.load / .save, state.load / .save, module.trend, decide,
+journal.append. fetches lists every HTTP attempt: tf, attempt, base, ms, error.
+
+Summary (p50/p95/p99 per stage and per fetch base URL):
+  python3 skills/trading-bot/scripts/stage_timer.py trading/timings.jsonl --script cron_15m_bot --last 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+LOG_MAX_BYTES = 5_000_000
+
+_NOOP = nullcontext()
+
+
+class _Span:
+    __slots__ = ("timer", "name", "t0")
+
+    def __init__(self, timer: "StageTimer", name: str):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timer.add(self.name, (time.perf_counter() - self.t0) * 1000.0)
+        return False
+
+
+class StageTimer:
+    """Accumulates ms per stage name (thread-safe; TFs are fetched on a pool)."""
+
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.stages: dict[str, float] = {}
+        self.fetches: list[dict] = []
+        self.lock = threading.Lock()
+
+    def stage(self, name: str) -> _Span:
+        return _Span(self, name)
+
+    def add(self, name: str, ms: float) -> None:
+        with self.lock:
+            self.stages[name] = self.stages.get(name, 0.0) + ms
+
+    def fetch(self, tf: str, attempt: int, base: str, t0: float, error: Optional[Exception] = None) -> None:
+        """One HTTP attempt started at perf_counter() t0."""
+        row = {"tf": tf, "attempt": attempt, "base": base, "ms": round((time.perf_counter() - t0) * 1000.0, 3)}
+        if error is not None:
+            row["error"] = f"{type(error).__name__}: {error}"[:200]
+        with self.lock:
+            self.fetches.append(row)
+
+    def as_meta(self) -> dict:
+        with self.lock:
+            return {
+                "total_ms": round((time.perf_counter() - self.t0) * 1000.0, 3),
+                "stages": {k: round(v, 3) for k, v in self.stages.items()},
+                "fetches": list(self.fetches),
+            }
+
+
+# the run being timed; None = timings off
+ACTIVE: Optional[StageTimer] = None
+_CONFIG = {"enabled": False, "log": None}
+
+
+def stage(name: str):
+    tm = ACTIVE
+    return _NOOP if tm is None else tm.stage(name)
+
+
+def add_arguments(ap: argparse.ArgumentParser) -> None:
+    ap.add_argument("--timings", action="store_true", default=bool(os.environ.get("TRADING_TIMINGS")), help="per-stage timings in meta")
+    ap.add_argument("--timings-log", default=os.environ.get("TRADING_TIMINGS_LOG") or None, help="append one JSON line per run (implies --timings)")
+
+
+def configure(enabled: bool = False, log: Optional[str] = None) -> None:
+    _CONFIG.update(enabled=bool(enabled or log), log=log)
+
+
+def begin() -> Optional[StageTimer]:
+    """Start timing a run (a no-op unless configure()d on)."""
+    global ACTIVE
+    ACTIVE = StageTimer() if _CONFIG["enabled"] else None
+    return ACTIVE
+
+
+def end(script: str) -> Optional[dict]:
+    """Stop the run: its meta.timings dict (None when off); appended to the log if set."""
+    global ACTIVE
+    tm, ACTIVE = ACTIVE, None
+    if tm is None:
+        return None
+    meta = tm.as_meta()
+    if _CONFIG["log"]:
+        try:
+            append_log(_CONFIG["log"], {"ts_utc": datetime.now(timezone.utc).isoformat(), "script": script, **meta})
+        except OSError:
+            pass  # timings never fail a run
+    return meta
+
+
+def append_log(path: Path | str, record: dict, max_bytes: int = LOG_MAX_BYTES) -> None:
+    p = Path(path)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    with p.open("a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        size = f.tell()
+    if size > max_bytes:
+        lines = p.read_text(encoding="utf-8").splitlines(keepends=True)
+        tmp = p.with_suffix(p.suffix + ".tmp")
+        tmp.write_text("".join(lines[len(lines) // 2 :]), encoding="utf-8")
+        os.replace(tmp, p)
+
+
+def percentile(sorted_ms: list[float], p: float) -> float:
+    return sorted_ms[max(0, min(len(sorted_ms) - 1, int(round(p / 100.0 * len(sorted_ms) + 0.5)) - 1))]
+
+
+def summarize(records: list[dict]) -> dict:
+    """p50/p95/p99/max per stage, per fetch base URL (ok attempts) and of total_ms."""
+    series: dict[str, list[float]] = {}
+    errors: dict[str, int] = {}
+    for r in records:
+        series.setdefault("total", []).append(float(r.get("total_ms", 0.0)))
+        for name, ms in (r.get("stages") or {}).items():
+            series.setdefault(name, []).append(float(ms))
+        for f in r.get("fetches") or []:
+            key = f"fetch_attempt@{f.get('base')}"
+            if f.get("error"):
+                errors[key] = errors.get(key, 0) + 1
+            else:
+                series.setdefault(key, []).append(float(f["ms"]))
+
+    out = {}
+    for name in sorted(series):
+        xs = sorted(series[name])
+        out[name] = {
+            "n": len(xs),
+            "p50_ms": round(percentile(xs, 50), 3),
+            "p95_ms": round(percentile(xs, 95), 3),
+            "p99_ms": round(percentile(xs, 99), 3),
+            "max_ms": round(xs[-1], 3),
+        }
+        if name in errors:
+            out[name]["errors"] = errors[name]
+    for name in errors.keys() - series.keys():
+        out[name] = {"n": 0, "errors": errors[name]}
+    return out
+
+
+def read_log(path: Path | str, script: Optional[str] = None, last: Optional[int] = None) -> list[dict]:
+    records = []
+    with Path(path).open(encoding="utf-8") as f:
+        for line in f:
+            try:
+                r = json.loads(line)
+            except ValueError:
+                continue  # a line cut by a concurrent trim
+            if script is None or r.get("script") == script:
+                records.append(r)
+    return records[-last:] if last else records
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("log", help="timings log written with --timings-log")
+    ap.add_argument("--script", default=None, help="only runs of this script (cron_15m_bot, snapshot_mtf, ...)")
+    ap.add_argument("--last", type=int, default=None, help="only the newest N runs")
+    args = ap.parse_args()
+
+    records = read_log(args.log, args.script, args.last)
+    out = {
+        "module": "stage_timer",
+        "version": "0.1",
+        "log": args.log,
+        "runs": len(records),
+        "from_utc": records[0].get("ts_utc") if records else None,
+        "to_utc": records[-1].get("ts_utc") if records else None,
+        "stages": summarize(records),
+    }
+    print(json.dumps(out, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""Transactional bot state on SQLite (WAL), with a JSON export (no external deps).
+
+One JSON document per key (e.g. "BTCUSDT:15m": position, balance_usdt,
+risk_pct, last_candle_ts_utc) in a single database file shared by every bot /
+symbol on the host.
+
+- transaction(key) is an atomic read-modify-write: BEGIN IMMEDIATE takes the
+  write lock before the read, so the cron bot and apply_15m_decision.py can
+  no longer interleave and lose an update; an exception rolls back.
+- reads (get) never block on a writer (WAL) and never see a half-written doc.
+- commits are fsynced (synchronous=FULL): a crash loses at most the
+  transaction in flight, never the open position.
+- the legacy JSON (e.g. trading/state_15m.json) is imported the first time a
+  key is read, and rewritten atomically (tmp + rename) on every change as an
+  export for humans / the LLM. A corrupt legacy file raises StateError
+  instead of silently resetting the state to defaults.
+
+Example:
+  python3 skills/trading-bot/scripts/state_store.py --db trading/state.db
+  python3 skills/trading-bot/scripts/state_store.py --db trading/state.db --key BTCUSDT:15m --export /tmp/state.json
+
+In-process:
+  store = open_store("trading/state.db")
+  with store.transaction("BTCUSDT:15m", defaults, legacy_json=..., export=...) as state:
+      state["position"] = None     # committed when the block exits
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+import stage_timer
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS state (
+    key TEXT PRIMARY KEY,
+    doc TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    updated_ms INTEGER NOT NULL
+)
+"""
+
+BUSY_TIMEOUT_S = 10.0
+
+
+class StateError(RuntimeError):
+    pass
+
+
+def connect(path: Path | str, busy_timeout_s: float = BUSY_TIMEOUT_S) -> sqlite3.Connection:
+    """WAL + fsynced commits; autocommit, transactions are explicit BEGIN IMMEDIATE / COMMIT."""
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path), timeout=busy_timeout_s, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=FULL")
+    return conn
+
+
+def export_json(path: Path | str, doc: dict) -> None:
+    """Atomic JSON write (same layout as the old state_15m.json)."""
+    p = Path(path)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    tmp = p.with_name(f".{p.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(doc, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    os.replace(tmp, p)
+
+
+def _read_legacy(path: Path | str | None) -> Optional[dict]:
+    if not path or not Path(path).exists():
+        return None
+    try:
+        doc = json.loads(Path(path).read_text(encoding="utf-8"))
+    except ValueError as e:
+        raise StateError(f"corrupt state file {path}: {e} (fix or remove it to start from defaults)") from e
+    if not isinstance(doc, dict):
+        raise StateError(f"corrupt state file {path}: not a JSON object")
+    return doc
+
+
+class StateStore:
+    """Per-key JSON documents in one SQLite file; one connection per thread."""
+
+    def __init__(self, path: Path | str, busy_timeout_s: float = BUSY_TIMEOUT_S):
+        self.path = Path(path)
+        self.busy_timeout_s = busy_timeout_s
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = connect(self.path, self.busy_timeout_s)
+            conn.execute(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str, defaults: Optional[dict] = None, legacy_json: Path | str | None = None) -> dict:
+        """Current document (defaults filled in); a copy, changes are not saved."""
+        row = self._conn().execute("SELECT doc FROM state WHERE key = ?", (key,)).fetchone()
+        if row is None and legacy_json and Path(legacy_json).exists():
+            with self.transaction(key, defaults, legacy_json) as state:
+                return dict(state)
+        state = dict(defaults or {})
+        if row is not None:
+            state.update(json.loads(row[0]))
+        return state
+
+    @contextmanager
+    def transaction(
+        self,
+        key: str,
+        defaults: Optional[dict] = None,
+        legacy_json: Path | str | None = None,
+        export: Path | str | None = None,
+    ) -> Iterator[dict]:
+        """Atomic read-modify-write of one document.
+
+        Yields the document as a dict; when the block exits normally the
+        changed document is written (and exported), an exception rolls back.
+        Other writers of any key wait (up to busy_timeout_s) meanwhile.
+        """
+        conn = self._conn()
+        with stage_timer.stage("state.load"):
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT doc FROM state WHERE key = ?", (key,)).fetchone()
+                stored = json.loads(row[0]) if row is not None else _read_legacy(legacy_json)
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        state = dict(defaults or {})
+        state.update(stored or {})
+        before = json.dumps(state, sort_keys=True)
+        try:
+            yield state
+            with stage_timer.stage("state.save"):
+                if row is None or json.dumps(state, sort_keys=True) != before:
+                    conn.execute(
+                        "INSERT INTO state (key, doc, version, updated_ms) VALUES (?, ?, 1, ?) "
+                        "ON CONFLICT(key) DO UPDATE SET doc = excluded.doc, version = version + 1, updated_ms = excluded.updated_ms",
+                        (key, json.dumps(state, ensure_ascii=False), int(time.time() * 1000)),
+                    )
+                    # still under the write lock, so exports land in commit order
+                    if export:
+                        export_json(export, state)
+                conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def delete(self, key: str) -> None:
+        conn = self._conn()
+        conn.execute("DELETE FROM state WHERE key = ?", (key,))
+
+    def rows(self) -> list[dict]:
+        cur = self._conn().execute("SELECT key, doc, version, updated_ms FROM state ORDER BY key")
+        return [{"key": k, "version": v, "updated_ms": u, "doc": json.loads(d)} for k, d, v, u in cur]
+
+
+_STORES: dict[str, StateStore] = {}
+
+
+def open_store(path: Path | str) -> StateStore:
+    """Process-wide StateStore per database file (keeps the connections open)."""
+    obj = _STORES.get(str(path))
+    if obj is None:
+        # same file under another spelling -> same instance
+        obj = _STORES.setdefault(str(Path(path).resolve()), StateStore(path))
+        _STORES[str(path)] = obj
+    return obj
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--db", required=True)
+    ap.add_argument("--key", default=None, help="only this key (e.g. BTCUSDT:15m)")
+    ap.add_argument("--export", default=None, help="write the --key document to this JSON file")
+    args = ap.parse_args()
+
+    store = open_store(args.db)
+    rows = [r for r in store.rows() if args.key is None or r["key"] == args.key]
+    if args.export:
+        if args.key is None or not rows:
+            raise SystemExit("--export needs an existing --key")
+        export_json(args.export, rows[0]["doc"])
+    print(json.dumps({"module": "state_store", "version": "0.1", "db": args.db, "keys": rows}, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
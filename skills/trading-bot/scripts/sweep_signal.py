@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""Parameter sweep for the run_signal.py strategy (no external deps).
+
+Strategy (as run_signal.py, evaluated on every closed bar):
+- BUY  when EMA(ema_len) crosses above WMA(wma_len) and RSI(rsi_len) <= rsi_buy_max
+- SELL when EMA crosses below WMA and RSI >= rsi_sell_min
+- fills at the signal bar's close; a position is held until the opposite
+  signal (--sides both = stop-and-reverse, long / short = one side only);
+  a position still open at the end is closed at the last close
+
+Every combination of the grid is scored on the same bars (after --warmup):
+trades, win rate, expectancy (mean % per trade after fees), profit factor,
+compounded return and max drawdown. Drawdown is measured from the closed-trade
+equity peak down to the worst low (long) / high (short) while in a trade.
+
+How the work is shared:
+- one RSI / EMA / WMA series per distinct length, computed once (indicators_vec
+  on NumPy when installed, else the run_signal.py functions; --indicators)
+  and handed to each worker process once (initializer)
+- crosses are found once per (ema_len, wma_len) pair; a task is one pair and
+  replays only the cross bars for every (rsi_len, buy_max, sell_min)
+- intra-trade extremes come from sparse tables (O(1) range min/max)
+
+Grid values: comma list ("9,12,21") or inclusive range "start:stop:step".
+rsi_buy_max 100 / rsi_sell_min 0 mean "no filter".
+
+Example:
+  python3 skills/trading-bot/scripts/sweep_signal.py --days 365 --cache-dir trading/cache/klines \
+    --ema-lens 5:21:2 --wma-lens 20:100:10 --rsi-lens 7,14,21 \
+    --rsi-buy-max 50:100:5 --rsi-sell-min 0:50:5 --out-csv /tmp/sweep.csv
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from itertools import product
+from typing import Optional, Sequence
+
+import indicators_vec
+import kline_cache
+import run_signal
+
+COLUMNS = [
+    "ema_len",
+    "wma_len",
+    "rsi_len",
+    "rsi_buy_max",
+    "rsi_sell_min",
+    "trades",
+    "win_rate",
+    "expectancy_pct",
+    "profit_factor",
+    "return_pct",
+    "max_drawdown_pct",
+]
+
+# per-process inputs set by init_worker (shared by every task of the process)
+_SHARED: dict = {}
+
+
+def parse_grid(spec: str, cast=float) -> list:
+    """"9,12,21" or "start:stop:step" (stop included) -> sorted unique values."""
+    values: set = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if ":" in part:
+            start, stop, step = (float(x) for x in part.split(":"))
+            if step <= 0:
+                raise ValueError(f"grid step must be > 0: {part}")
+            n = int((stop - start) / step + 1e-9)
+            values.update(cast(round(start + k * step, 10)) for k in range(n + 1))
+        else:
+            values.add(cast(float(part)))
+    if not values:
+        raise ValueError(f"empty grid: {spec!r}")
+    return sorted(values)
+
+
+def load_history(symbol: str, interval: str, bars: int, cache_dir: Optional[str]) -> list[list]:
+    """The latest `bars` closed klines (live candle dropped)."""
+    fetch = run_signal.fetch_binance_klines
+    if cache_dir:
+        cache = kline_cache.KlineCache(cache_dir, fetch, max_rows=max(20_000, bars + 1))
+        rows = cache.get(symbol, interval, bars + 1)
+    else:
+        rows = kline_cache.fetch_history(fetch, symbol, interval, bars + 1)
+    return rows[:-1]
+
+
+# --- range min / max ---
+
+
+def sparse_table(values: Sequence[float], fn) -> list[list[float]]:
+    table = [list(values)]
+    span = 1
+    while span * 2 <= len(values):
+        prev = table[-1]
+        table.append([fn(prev[i], prev[i + span]) for i in range(len(prev) - span)])
+        span *= 2
+    return table
+
+
+def range_query(table: list[list[float]], lo: int, hi: int, fn) -> float:
+    """fn over values[lo..hi] (inclusive), O(1)."""
+    k = (hi - lo + 1).bit_length() - 1
+    return fn(table[k][lo], table[k][hi - (1 << k) + 1])
+
+
+# --- evaluation ---
+
+
+def find_crosses(ema_s: Sequence, wma_s: Sequence, start: int) -> list[tuple[int, int]]:
+    """(bar, +1 up / -1 down) for every EMA x WMA cross at bar >= start."""
+    out = []
+    for i in range(max(start, 1), len(ema_s)):
+        e0, w0, e1, w1 = ema_s[i - 1], wma_s[i - 1], ema_s[i], wma_s[i]
+        if e0 is None or w0 is None or e1 is None or w1 is None:
+            continue
+        if e0 <= w0 and e1 > w1:
+            out.append((i, 1))
+        elif e0 >= w0 and e1 < w1:
+            out.append((i, -1))
+    return out
+
+
+def simulate(signals: list[tuple[int, int]], fee_pct: float, sides: str) -> tuple:
+    """Replay BUY (+1) / SELL (-1) signals -> the metric columns of one combination."""
+    closes = _SHARED["closes"]
+    lows, highs = _SHARED["lows"], _SHARED["highs"]
+    last = len(closes) - 1
+    allow_long = sides != "short"
+    allow_short = sides != "long"
+
+    rets: list[float] = []
+    equity = peak = 1.0
+    max_dd = 0.0
+    pos = 0
+    entry = 0.0
+    entry_i = 0
+
+    def close_at(i: int) -> None:
+        nonlocal equity, peak, max_dd
+        if i > entry_i:
+            if pos > 0:
+                worst = range_query(lows, entry_i + 1, i, min)
+            else:
+                worst = range_query(highs, entry_i + 1, i, max)
+            trough = equity * (1.0 + pos * (worst / entry - 1.0) - fee_pct / 100.0)
+            max_dd = max(max_dd, (peak - trough) / peak)
+        r = pos * (closes[i] / entry - 1.0) * 100.0 - 2.0 * fee_pct
+        rets.append(r)
+        equity *= 1.0 + r / 100.0
+        max_dd = max(max_dd, (peak - equity) / peak)
+        peak = max(peak, equity)
+
+    for i, d in signals:
+        if d == pos:
+            continue
+        if pos:
+            close_at(i)
+            pos = 0
+        if (d > 0 and allow_long) or (d < 0 and allow_short):
+            pos, entry, entry_i = d, closes[i], i
+    if pos:
+        close_at(last)
+
+    wins = [r for r in rets if r > 0]
+    loss = -sum(r for r in rets if r <= 0)
+    return (
+        len(rets),
+        round(len(wins) / len(rets), 4) if rets else None,
+        round(sum(rets) / len(rets), 4) if rets else None,
+        round(sum(wins) / loss, 3) if loss > 0 else None,
+        round((equity - 1.0) * 100.0, 2),
+        round(max_dd * 100.0, 2),
+    )
+
+
+def init_worker(shared: dict) -> None:
+    _SHARED.clear()
+    _SHARED.update(shared)
+
+
+def evaluate_pair(ema_len: int, wma_len: int) -> list[tuple]:
+    """Every (rsi_len, buy_max, sell_min) for one EMA/WMA pair."""
+    grid = _SHARED["grid"]
+    crosses = find_crosses(_SHARED["ema"][ema_len], _SHARED["wma"][wma_len], _SHARED["start"])
+    rows = []
+    for rsi_len in grid["rsi_len"]:
+        rsi_s = _SHARED["rsi"][rsi_len]
+        events = [(i, d, rsi_s[i]) for i, d in crosses if rsi_s[i] is not None]
+        for buy_max, sell_min in product(grid["rsi_buy_max"], grid["rsi_sell_min"]):
+            signals = [(i, d) for i, d, r in events if (r <= buy_max if d > 0 else r >= sell_min)]
+            metrics = simulate(signals, _SHARED["fee_pct"], _SHARED["sides"])
+            rows.append((ema_len, wma_len, rsi_len, buy_max, sell_min) + metrics)
+    return rows
+
+
+def _evaluate_task(pair: tuple[int, int]) -> list[tuple]:
+    return evaluate_pair(*pair)
+
+
+def rank_key(sort: str):
+    # missing expectancy (no trades) never outranks a scored row
+    def expectancy(row: dict) -> float:
+        return row["expectancy_pct"] if row["expectancy_pct"] is not None else float("-inf")
+
+    if sort == "drawdown":
+        return lambda row: (row["max_drawdown_pct"], -expectancy(row))
+    return lambda row: (-expectancy(row), row["max_drawdown_pct"])
+
+
+def sweep(
+    klines: list[list],
+    grid: dict,
+    warmup: int = 300,
+    fee_pct: float = 0.0,
+    sides: str = "both",
+    procs: Optional[int] = None,
+) -> tuple[list[dict], dict]:
+    """All combinations of `grid` over closed `klines` -> (rows, timings)."""
+    closes = [float(k[4]) for k in klines]
+    t0 = time.perf_counter()
+    # lists with None for warm-up either way (what find_crosses / the workers expect)
+    ind = indicators_vec if indicators_vec.active() else run_signal
+    shared = {
+        "closes": closes,
+        "lows": sparse_table([float(k[3]) for k in klines], min),
+        "highs": sparse_table([float(k[2]) for k in klines], max),
+        "ema": {n: indicators_vec.as_list(ind.ema(closes, n)) for n in grid["ema_len"]},
+        "wma": {n: indicators_vec.as_list(ind.wma(closes, n)) for n in grid["wma_len"]},
+        "rsi": {n: indicators_vec.as_list(ind.rsi(closes, n)) for n in grid["rsi_len"]},
+        "grid": grid,
+        "start": warmup,
+        "fee_pct": fee_pct,
+        "sides": sides,
+    }
+    t_ind = time.perf_counter() - t0
+
+    # the EMA is the fast line: pairs with ema_len >= wma_len are skipped
+    pairs = [(e, w) for e, w in product(grid["ema_len"], grid["wma_len"]) if e < w]
+    procs = max(1, min(procs or os.cpu_count() or 1, len(pairs) or 1))
+    t1 = time.perf_counter()
+    raw: list[tuple] = []
+    if procs <= 1:
+        init_worker(shared)
+        for p in pairs:
+            raw.extend(evaluate_pair(*p))
+    else:
+        with ProcessPoolExecutor(max_workers=procs, initializer=init_worker, initargs=(shared,)) as pool:
+            for part in pool.map(_evaluate_task, pairs):
+                raw.extend(part)
+    t_sweep = time.perf_counter() - t1
+
+    rows = [dict(zip(COLUMNS, r)) for r in raw]
+    return rows, {"indicators": indicators_vec.backend_name(), "indicators_s": round(t_ind, 3), "sweep_s": round(t_sweep, 3), "procs": procs}
+
+
+def write_csv(path: str, rows: list[dict]) -> None:
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=COLUMNS)
+        w.writeheader()
+        w.writerows(rows)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--symbol", default="BTCUSDT")
+    ap.add_argument("--interval", default="15m")
+    ap.add_argument("--days", type=int, default=365)
+    ap.add_argument("--warmup", type=int, default=300, help="bars before the scored window")
+    ap.add_argument("--cache-dir", default=None, help="shared kline store, e.g. trading/cache/klines")
+    ap.add_argument("--ema-lens", default="9")
+    ap.add_argument("--wma-lens", default="45")
+    ap.add_argument("--rsi-lens", default="14")
+    ap.add_argument("--rsi-buy-max", default="50:100:5")
+    ap.add_argument("--rsi-sell-min", default="0:50:5")
+    ap.add_argument("--sides", choices=["both", "long", "short"], default="both")
+    ap.add_argument("--fee-pct", type=float, default=0.0, help="per side, in percent of notional")
+    ap.add_argument("--min-trades", type=int, default=10, help="rows with fewer trades are not ranked")
+    ap.add_argument("--sort", choices=["expectancy", "drawdown"], default="expectancy")
+    ap.add_argument("--top-k", type=int, default=20)
+    ap.add_argument("--procs", type=int, default=None, help="worker processes (default: cpu count)")
+    ap.add_argument("--out-csv", default=None, help="full results table, ranked rows first")
+    indicators_vec.add_arguments(ap)
+    args = ap.parse_args()
+    indicators_vec.configure(args.indicators)
+
+    grid = {
+        "ema_len": parse_grid(args.ema_lens, int),
+        "wma_len": parse_grid(args.wma_lens, int),
+        "rsi_len": parse_grid(args.rsi_lens, int),
+        "rsi_buy_max": parse_grid(args.rsi_buy_max),
+        "rsi_sell_min": parse_grid(args.rsi_sell_min),
+    }
+    step = kline_cache.interval_ms(args.interval)
+    if step is None:
+        raise SystemExit(f"unsupported interval: {args.interval}")
+
+    errors: list[str] = []
+    t0 = time.perf_counter()
+    try:
+        klines = load_history(args.symbol, args.interval, args.days * 86_400_000 // step + args.warmup, args.cache_dir)
+    except Exception as e:
+        klines = []
+        errors.append(f"fetch: {e}")
+    t_fetch = time.perf_counter() - t0
+
+    rows: list[dict] = []
+    timings: dict = {}
+    if len(klines) <= args.warmup + 1:
+        errors.append(f"not enough history: {len(klines)} bars for warmup {args.warmup}")
+    else:
+        rows, timings = sweep(klines, grid, args.warmup, args.fee_pct, args.sides, args.procs)
+
+    ranked = sorted((r for r in rows if r["trades"] >= args.min_trades), key=rank_key(args.sort))
+    if args.out_csv:
+        write_csv(args.out_csv, ranked + [r for r in rows if r["trades"] < args.min_trades])
+
+    scored = klines[args.warmup :]
+    out = {
+        "module": "sweep_signal",
+        "version": "0.1",
+        "exchange": "binance",
+        "symbol": args.symbol,
+        "timeframe": args.interval,
+        "generated_at_utc": datetime.now(timezone.utc).isoformat(),
+        "from_utc": run_signal.iso_utc(int(scored[0][0])) if scored else None,
+        "to_utc": run_signal.iso_utc(int(scored[-1][0])) if scored else None,
+        "bars": len(scored),
+        "grid": grid,
+        "sides": args.sides,
+        "fee_pct": args.fee_pct,
+        "combinations": len(rows),
+        "ranked": len(ranked),
+        "sort": args.sort,
+        "top": ranked[: args.top_k],
+        "errors": errors,
+        "meta": {"fetch_s": round(t_fetch, 3), **timings},
+    }
+    print(json.dumps(out, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""Sorted, indexed S/R zone book (no external deps).
+
+One ZoneBook per kind (support|resistance) keeps clustered zones as disjoint
+intervals sorted by `lo` (hence also by `hi`), so every query is a bisect:
+
+- below(P, n) / above(P, n): nearest zones fully below / above P
+- containing(P): zones whose [lo, hi] contains P
+- strongest_below(P) / strongest_above(P): module_sr_mtf's nearest_support /
+  nearest_resistance pick (max strength, tie -> closest), via prefix/suffix
+  "best so far" arrays built lazily after the last change
+- strongest_within(P, pct, n): top-n by strength intersecting P +/- pct
+
+Zones are any dataclass with tf/kind/lo/hi/strength/touches/last_touch_utc
+(module_sr_mtf.Zone). Overlapping zones are merged the same way as
+module_sr_mtf.cluster_zones. Call invalidate() after editing zone fields in place.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import heapq
+from bisect import bisect_left, bisect_right
+from typing import Any, Iterable, Optional
+
+
+def merge_zones(last: Any, z: Any, tf_weight: dict) -> Any:
+    """Merge `z` into `last` (last.lo <= z.lo), keeping the heavier TF label."""
+    return dataclasses.replace(
+        last,
+        tf=last.tf if tf_weight.get(last.tf, 1) >= tf_weight.get(z.tf, 1) else z.tf,
+        lo=min(last.lo, z.lo),
+        hi=max(last.hi, z.hi),
+        strength=last.strength + z.strength,
+        touches=last.touches + z.touches,
+        last_touch_utc=max(last.last_touch_utc, z.last_touch_utc),
+    )
+
+
+class ZoneBook:
+    def __init__(self, kind: str, tf_weight: Optional[dict] = None):
+        self.kind = kind
+        self.tf_weight = tf_weight or {}
+        self.zones: list[Any] = []
+        self._los: list[float] = []
+        self._his: list[float] = []
+        self._best_below: Optional[list[int]] = None
+        self._best_above: Optional[list[int]] = None
+
+    def __len__(self) -> int:
+        return len(self.zones)
+
+    def invalidate(self) -> None:
+        self._los = [z.lo for z in self.zones]
+        self._his = [z.hi for z in self.zones]
+        self._best_below = None
+        self._best_above = None
+
+    def extend(self, zones: Iterable[Any]) -> None:
+        """Bulk load: one sort + linear merge (same result as cluster_zones)."""
+        merged: list[Any] = []
+        for z in sorted(list(self.zones) + list(zones), key=lambda z: (z.lo, z.hi)):
+            if merged and z.lo <= merged[-1].hi:
+                merged[-1] = merge_zones(merged[-1], z, self.tf_weight)
+            else:
+                merged.append(z)
+        self.zones = merged
+        self.invalidate()
+
+    def add(self, z: Any) -> Any:
+        """Insert one zone, merging it with every zone it overlaps; returns the result."""
+        i = bisect_left(self._his, z.lo)  # first zone that can overlap (hi >= z.lo)
+        j = bisect_right(self._los, z.hi)  # past the last one (lo <= z.hi)
+        group = sorted(self.zones[i:j] + [z], key=lambda x: (x.lo, x.hi))
+        out = group[0]
+        for g in group[1:]:
+            out = merge_zones(out, g, self.tf_weight)
+        self.zones[i:j] = [out]
+        self._los[i:j] = [out.lo]
+        self._his[i:j] = [out.hi]
+        self._best_below = None
+        self._best_above = None
+        return out
+
+    def below(self, price: float, n: int = 1) -> list[Any]:
+        """Up to n zones with hi <= price, closest first."""
+        j = bisect_right(self._his, price)
+        return self.zones[max(0, j - n) : j][::-1]
+
+    def above(self, price: float, n: int = 1) -> list[Any]:
+        """Up to n zones with lo >= price, closest first."""
+        i = bisect_left(self._los, price)
+        return self.zones[i : i + n]
+
+    def containing(self, price: float) -> list[Any]:
+        j = bisect_right(self._los, price) - 1
+        if j >= 0 and self._his[j] >= price:
+            return [self.zones[j]]
+        return []
+
+    def strongest_below(self, price: float) -> Optional[Any]:
+        """Strongest zone with hi <= price; ties go to the closest one."""
+        if self._best_below is None:
+            best: list[int] = []
+            for k, z in enumerate(self.zones):
+                # later zones have higher hi, i.e. are closer for any price above them
+                if not best or z.strength >= self.zones[best[-1]].strength:
+                    best.append(k)
+                else:
+                    best.append(best[-1])
+            self._best_below = best
+        j = bisect_right(self._his, price)
+        return self.zones[self._best_below[j - 1]] if j else None
+
+    def strongest_above(self, price: float) -> Optional[Any]:
+        """Strongest zone with lo >= price; ties go to the closest one."""
+        if self._best_above is None:
+            n = len(self.zones)
+            best = [0] * n
+            for k in range(n - 1, -1, -1):
+                z = self.zones[k]
+                if k == n - 1 or z.strength >= self.zones[best[k + 1]].strength:
+                    best[k] = k
+                else:
+                    best[k] = best[k + 1]
+            self._best_above = best
+        i = bisect_left(self._los, price)
+        return self.zones[self._best_above[i]] if i < len(self.zones) else None
+
+    def strongest_within(self, price: float, pct: float, n: int = 5) -> list[Any]:
+        """Top-n zones by strength that intersect [price*(1-pct%), price*(1+pct%)]."""
+        lo = price * (1 - pct / 100.0)
+        hi = price * (1 + pct / 100.0)
+        i = bisect_left(self._his, lo)
+        j = bisect_right(self._los, hi)
+        return heapq.nlargest(n, self.zones[i:j], key=lambda z: z.strength)
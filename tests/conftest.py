@@ -0,0 +1,11 @@
+"""Put the trading-bot scripts and trading/ on sys.path, as the scripts do for each other."""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+for p in (ROOT / "skills" / "trading-bot" / "scripts", ROOT / "trading"):
+    if str(p) not in sys.path:
+        sys.path.insert(0, str(p))
@@ -0,0 +1,111 @@
+"""exit_monitor: same 15m indicators as cron_15m_bot on the same window; CLOSE rows in the bot's shape."""
+
+from __future__ import annotations
+
+import random
+
+import pytest
+
+import apply_15m_decision as apply
+import exit_monitor
+import snapshot_mtf
+from indicators_stream import RsiMaChain, chain_key, load_chains, save_chains
+from journal import open_journal
+from kline_cache import interval_ms
+
+STEP = interval_ms("15m")
+SYMBOL = "BTCUSDT"
+
+
+def klines(n: int, seed: int = 3, t0: int = 1_700_000_000_000 // STEP * STEP) -> list[list]:
+    rnd = random.Random(seed)
+    rows, price = [], 60_000.0
+    for i in range(n):
+        c = price * (1 + rnd.gauss(0, 0.004))
+        t = t0 + i * STEP
+        rows.append([t, f"{price:.2f}", f"{max(price, c):.2f}", f"{min(price, c):.2f}", f"{c:.2f}", "1", t + STEP - 1])
+        price = c
+    return rows
+
+
+def live_window(rows: list[list], n: int = 210) -> list[list]:
+    """The bot's window right after the close of rows[-1]: the last n-1 closed + a flat live candle."""
+    last = rows[-1]
+    t = int(last[6]) + 1
+    c = last[4]
+    return rows[-(n - 1) :] + [[t, c, c, c, c, "0", t + STEP - 1]]
+
+
+def test_monitor_uses_the_bots_persisted_chain(tmp_path):
+    history = klines(2000)
+    # the bot's chain has seen far more than the 210-bar window
+    path = tmp_path / "indicator_state_15m.json"
+    chains = {chain_key(SYMBOL, "15m"): RsiMaChain()}
+    snapshot_mtf.compute_indicators(snapshot_mtf.klines_to_candles(live_window(history[:1900], 1900)), chains[chain_key(SYMBOL, "15m")])
+    save_chains(path, chains)
+
+    # the bot at the next close: its persisted chain synced on the window
+    window = live_window(history)
+    bot_chain = load_chains(path)[chain_key(SYMBOL, "15m")]
+    bot_ind = snapshot_mtf.compute_indicators(snapshot_mtf.klines_to_candles(window), bot_chain)
+
+    mon = exit_monitor.ExitMonitor(SYMBOL, lambda *a: None, lambda: None, chains_path=path)
+    mon.sync_chain(window)
+    got = mon.chain.peek(float(window[-1][4]))
+    assert got == (bot_ind["rsi"]["value"], bot_ind["ema_rsi"]["value"], bot_ind["wma_rsi"]["value"])
+
+    # a chain seeded from the window alone drifts from the bot's
+    fresh = exit_monitor.ExitMonitor(SYMBOL, lambda *a: None, lambda: None)
+    fresh.sync_chain(window)
+    assert fresh.chain.peek(float(window[-1][4])) != got
+
+    # the persisted file is only read
+    assert load_chains(path)[chain_key(SYMBOL, "15m")].last_ts == chains[chain_key(SYMBOL, "15m")].last_ts
+
+
+@pytest.fixture
+def journal_paths(tmp_path, monkeypatch):
+    monkeypatch.setattr(apply, "STATE_DB_PATH", tmp_path / "state.db")
+    monkeypatch.setattr(apply, "STATE_PATH", tmp_path / "state_15m.json")
+    monkeypatch.setattr(apply, "JOURNAL_PATH", tmp_path / "journal.db")
+    monkeypatch.setattr(apply, "CSV_PATH", tmp_path / "trades_15m.csv")
+    return tmp_path
+
+
+def test_close_row_matches_the_bot_shape(journal_paths):
+    pos = {"side": "SHORT", "entry": 60_000.0, "sl": 60_500.0, "size_btc": 0.02, "opened_ts_utc": "2026-10-01T00:15:00+00:00"}
+    with apply.state_transaction(SYMBOL) as state:
+        state["position"] = dict(pos)
+    w = exit_monitor.Watch(pos)
+    ts_ms = 1_790_000_000_000 + 7 * 60_000  # inside a 15m candle
+    candle_ts = snapshot_mtf.iso_utc(ts_ms // STEP * STEP)
+
+    row = exit_monitor.close_position(SYMBOL, w, 60_500.0, "SL hit (sl=60500.00)", ts_ms, None, {"15m": "BUY_BIAS", "1h": "SELL_BIAS"})
+    assert row["event_id"] == f"{candle_ts}_CLOSE_exit_monitor"
+    assert row["snapshot_candle_ts_utc"] == candle_ts
+    assert (row["bias15m"], row["bias1h"], row["bias4h"], row["bias1d"]) == ("BUY_BIAS", "SELL_BIAS", "NOT_EVALUATED", "NOT_EVALUATED")
+    assert apply.load_state(SYMBOL)["position"] is None
+    journaled = [r for _, r in open_journal(apply.JOURNAL_PATH).scan("events")]
+    assert [r["event_id"] for r in journaled] == [row["event_id"]]
+
+    # already closed (by the bot or an earlier trigger): nothing journaled
+    assert exit_monitor.close_position(SYMBOL, w, 60_600.0, "SL hit", ts_ms + 60_000) is None
+
+
+def test_biases_from_persisted_htf_chains(tmp_path):
+    history = klines(600)
+    path = tmp_path / "indicator_state_15m.json"
+    chains = {}
+    for tf in ["1h", "4h"]:
+        c = chains[chain_key(SYMBOL, tf)] = RsiMaChain()
+        for row in history[:400]:
+            c.update(float(row[4]))
+    save_chains(path, chains)
+
+    mon = exit_monitor.ExitMonitor(SYMBOL, lambda *a: None, lambda: None, chains_path=path)
+    mon.sync_chain(live_window(history))
+    price = float(history[-1][4])
+    biases = mon.biases(price)
+    assert biases["15m"] != exit_monitor.NOT_EVALUATED
+    assert biases["1h"] == biases["4h"] != exit_monitor.NOT_EVALUATED
+    assert biases["1d"] == exit_monitor.NOT_EVALUATED
@@ -0,0 +1,98 @@
+"""indicators_vec (NumPy and pure-Python backends) against the streaming indicators_stream.RsiMaChain."""
+
+from __future__ import annotations
+
+import math
+import random
+
+import pytest
+
+import indicators_vec
+from indicators_stream import Ema, RsiMaChain, Wma
+
+needs_numpy = pytest.mark.skipif(not indicators_vec.HAS_NUMPY, reason="NumPy not installed")
+TOL = 1e-9
+
+
+def closes(n: int, seed: int) -> list[float]:
+    rnd = random.Random(seed)
+    p, out = 100.0, []
+    for _ in range(n):
+        p *= 1 + rnd.gauss(0, 0.01)
+        out.append(p)
+    return out
+
+
+def same(a, b) -> bool:
+    """Both warm-up (None / NaN) or equal within TOL."""
+    a = None if a is None or a != a else a
+    b = None if b is None or b != b else b
+    return a is None and b is None or a is not None and b is not None and math.isclose(a, b, rel_tol=0, abs_tol=TOL)
+
+
+def streamed(values: list[float], lengths=(14, 9, 45)) -> tuple[list, list, list]:
+    chain = RsiMaChain(*lengths)
+    out = [chain.update(v) for v in values]
+    return tuple(list(col) for col in zip(*out)) if out else ([], [], [])
+
+
+@pytest.mark.parametrize("backend", [pytest.param("numpy", marks=needs_numpy), "python"])
+@pytest.mark.parametrize("n", [0, 5, 14, 15, 60, 700])
+def test_rsi_ma_chain_matches_the_stream(backend, n):
+    values = closes(n, n)
+    with indicators_vec.use(backend):
+        got = [indicators_vec.as_list(s) for s in indicators_vec.rsi_ma_chain(values)]
+    for g, w in zip(got, streamed(values)):
+        assert len(g) == n
+        assert all(same(a, b) for a, b in zip(g, w))
+
+
+@needs_numpy
+def test_rows_are_independent_series():
+    rows = [closes(300, s) for s in range(4)]
+    with indicators_vec.use("numpy"):
+        r, e, w = indicators_vec.rsi_ma_chain(rows)
+    for k, row in enumerate(rows):
+        for got, want in zip((r[k], e[k], w[k]), streamed(row)):
+            assert all(same(a, b) for a, b in zip(got.tolist(), want))
+
+
+@pytest.mark.parametrize("backend", [pytest.param("numpy", marks=needs_numpy), "python"])
+def test_ema_wma_match_the_stream(backend):
+    values = closes(400, 1)
+    ema, wma = Ema(9), Wma(45)
+    want_e = [ema.update(v) for v in values]
+    want_w = [wma.update(v) for v in values]
+    with indicators_vec.use(backend):
+        got_e = indicators_vec.as_list(indicators_vec.ema(values, 9))
+        got_w = indicators_vec.as_list(indicators_vec.wma(values, 45))
+    assert all(same(a, b) for a, b in zip(got_e, want_e))
+    assert all(same(a, b) for a, b in zip(got_w, want_w))
+
+
+@needs_numpy
+@pytest.mark.parametrize("lengths", [(14, 9, 45), (3, 2, 1), (5, 1, 2)])
+def test_peek_columns_match_chain_peek(lengths):
+    rnd = random.Random(sum(lengths))
+    closed = closes(200, 7)
+    counts = sorted(rnd.randint(0, len(closed)) for _ in range(120))
+    x = [c * (1 + rnd.gauss(0, 0.005)) for c in closes(120, 9)]
+    r, e, w = indicators_vec.peek_columns(closed, counts, x, *lengths)
+    for i, (c, xi) in enumerate(zip(counts, x)):
+        chain = RsiMaChain(*lengths)
+        for v in closed[:c]:
+            chain.update(v)
+        want = chain.peek(xi)
+        assert [same(a, b) for a, b in zip((r[i], e[i], w[i]), want)] == [True] * 3, (c, want)
+
+
+def test_backend_switch():
+    with pytest.raises(ValueError):
+        indicators_vec.configure("fortran")
+    with indicators_vec.use("python"):
+        assert not indicators_vec.active() and indicators_vec.backend_name() == "python"
+    if indicators_vec.HAS_NUMPY:
+        with indicators_vec.use("auto"):
+            assert indicators_vec.active() and not indicators_vec.active(indicators_vec.VEC_MIN_BARS - 1)
+        with indicators_vec.use("numpy"):
+            assert indicators_vec.active(10)
@@ -0,0 +1,115 @@
+"""kline_stream.KlineStream against the mock_kline_ws stand-in server and a fake REST feed."""
+
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+
+import kline_cache
+from kline_stream import KlineStream
+from mock_kline_ws import StandInStreamServer
+
+SYMBOL = "BTCUSDT"
+TF = "1m"
+STEP = kline_cache.interval_ms(TF)
+
+
+def kline(t: int, close: float) -> list:
+    c = f"{close:.2f}"
+    return [t, c, c, c, c, "1", t + STEP - 1, "0", 1, "0", "0", "0"]
+
+
+class FakeRest:
+    """REST /api/v3/klines over an in-memory list of rows (the "exchange" history)."""
+
+    def __init__(self, rows: list[list]):
+        self.rows = rows
+        self.calls: list[tuple] = []
+
+    def __call__(self, symbol, interval, limit, start_ms=None, end_ms=None):
+        self.calls.append((interval, limit, start_ms, end_ms))
+        rows = self.rows
+        if start_ms is not None:
+            rows = [r for r in rows if r[0] >= start_ms][:limit]
+        else:
+            if end_ms is not None:
+                rows = [r for r in rows if r[0] <= end_ms]
+            rows = rows[-limit:]
+        return [list(r) for r in rows]
+
+
+def wait_for(cond, timeout_s: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        if cond():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+@pytest.fixture
+def setup():
+    # closed candles well in the past, so the REST seed treats them all as closed
+    base = (int(time.time() * 1000) // STEP - 100) * STEP
+    rest = FakeRest([kline(base + i * STEP, 100.0 + i) for i in range(30)])
+    srv = StandInStreamServer().start()
+    closes: list[tuple[str, int]] = []
+
+    def on_close(tf: str, stream: KlineStream) -> None:
+        closes.append((tf, int(stream.buffers[tf].last_closed()[0])))
+
+    stream = KlineStream(SYMBOL, [TF], 20, on_close, url=srv.url, fetch=rest, max_backoff_s=1.0)
+    thread = threading.Thread(target=stream.run, daemon=True)
+    thread.start()
+    assert srv.wait_clients(1)
+    assert wait_for(lambda: stream.fired[TF] is not None)
+    yield base, rest, srv, stream, closes
+    stream.stop()
+    srv.shutdown()
+    srv.server_close()
+    thread.join(5.0)
+
+
+def test_seed_fires_nothing(setup):
+    base, rest, srv, stream, closes = setup
+    buf = stream.buffers[TF]
+    assert buf.last_closed_ms == base + 29 * STEP
+    assert [int(r[0]) for r in buf.rows] == [base + i * STEP for i in range(10, 30)]  # the REST seed window
+    assert closes == []
+
+
+def test_closed_candle_handoff(setup):
+    base, rest, srv, stream, closes = setup
+    t = base + 30 * STEP
+    srv.publish(SYMBOL, TF, kline(t, 131.0), closed=False)
+    srv.publish(SYMBOL, TF, kline(t, 132.0), closed=True)
+    assert wait_for(lambda: closes)
+    # a repeated final event of the same candle fires nothing
+    srv.publish(SYMBOL, TF, kline(t, 132.0), closed=True)
+    time.sleep(0.2)
+    assert closes == [(TF, t)]
+    row = stream.buffers[TF].last_closed()
+    assert row[0] == t and row[4] == "132.00"
+    assert stream.window(TF, t + STEP)[-2][0] == t
+
+
+def test_reconnect_backfills_the_gap(setup):
+    base, rest, srv, stream, closes = setup
+    # two candles close while the connection is down
+    rest.rows += [kline(base + 30 * STEP, 131.0), kline(base + 31 * STEP, 132.0)]
+    srv.drop_clients()
+    assert wait_for(lambda: stream.connects >= 2 and closes)
+    assert srv.wait_clients(1)
+    buf = stream.buffers[TF]
+    assert [int(r[0]) for r in buf.rows[-3:]] == [base + 29 * STEP, base + 30 * STEP, base + 31 * STEP]
+    # the missed closes collapse into one on_close for the newest candle
+    assert closes == [(TF, base + 31 * STEP)]
+    assert rest.calls[-1][2] == base + 29 * STEP  # delta from the newest buffered candle
+
+    # the live stream carries on after the backfill
+    t = base + 32 * STEP
+    srv.publish(SYMBOL, TF, kline(t, 133.0), closed=True)
+    assert wait_for(lambda: len(closes) == 2)
+    assert closes[-1] == (TF, t)
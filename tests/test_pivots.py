@@ -0,0 +1,45 @@
+"""pivots.find_pivots / PivotStream against the reference scan module_sr_mtf.is_pivot_high / is_pivot_low."""
+
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from module_sr_mtf import is_pivot_high, is_pivot_low
+from pivots import PivotStream, find_pivots
+
+
+def scan(values: list[float], left: int, right: int, kind: str) -> list[int]:
+    """The per-bar window rescan the pivots module replaced (bars with complete windows only)."""
+    check = is_pivot_high if kind == "high" else is_pivot_low
+    return [i for i in range(left, len(values) - right) if check(values, i, left, right)]
+
+
+@pytest.mark.parametrize("kind", ["high", "low"])
+def test_find_pivots_matches_the_scan(kind):
+    rnd = random.Random(8)
+    for _ in range(1500):
+        n = rnd.randint(0, 60)
+        # small integer prices: plenty of ties, which must never make a pivot
+        values = [float(rnd.randint(0, 6)) for _ in range(n)] if rnd.random() < 0.5 else [rnd.gauss(100, 5) for _ in range(n)]
+        left, right = rnd.randint(0, 6), rnd.randint(0, 6)
+        assert find_pivots(values, left, right, kind) == scan(values, left, right, kind), (values, left, right)
+
+
+def test_stream_confirms_each_pivot_once_its_right_window_closes():
+    # bar 1 (3.0) is outranked by bar 3 inside its right window
+    values = [1.0, 3.0, 2.0, 5.0, 4.0, 4.0, 6.0, 1.0, 0.0]
+    ps = PivotStream(1, 2, "high")
+    confirmed = [(t, ps.append(v)) for t, v in enumerate(values)]
+    assert [(t, i) for t, i in confirmed if i is not None] == [(5, 3), (8, 6)]
+
+
+def test_equal_neighbours_are_not_pivots():
+    assert find_pivots([1.0, 2.0, 2.0, 1.0], 1, 1, "high") == []
+    assert find_pivots([3.0, 1.0, 1.0, 3.0], 1, 1, "low") == []
+
+
+def test_unknown_kind():
+    with pytest.raises(ValueError):
+        PivotStream(2, 2, "mid")
@@ -0,0 +1,170 @@
+"""portfolio.Portfolio: SL fills, gap quotes and the per-position / daily risk caps of open and mark."""
+
+from __future__ import annotations
+
+import pytest
+
+import portfolio
+import portfolio_15m
+import snapshot_mtf
+from portfolio import Portfolio, Quote
+
+T0 = 1_790_000_000_000 // 900_000 * 900_000
+STEP = 900_000
+
+
+def book(**doc) -> Portfolio:
+    return Portfolio({**portfolio.defaults(), **doc})
+
+
+def quote(o: float, h: float, lo: float, last: float, from_ms: int = T0, to_ms: int = T0 + STEP) -> Quote:
+    return Quote(o, h, lo, last, from_ms, to_ms)
+
+
+@pytest.mark.parametrize(
+    "side, sl, q, fill",
+    [
+        # traded through the SL inside the window: filled at the SL
+        ("LONG", 95.0, quote(99.0, 100.0, 94.0, 96.0), 95.0),
+        ("SHORT", 105.0, quote(101.0, 106.0, 100.0, 104.0), 105.0),
+        # window opened already past the SL (gap): filled at the open
+        ("LONG", 95.0, quote(90.0, 92.0, 88.0, 91.0), 90.0),
+        ("SHORT", 105.0, quote(110.0, 112.0, 108.0, 109.0), 110.0),
+    ],
+)
+def test_mark_fills_at_sl_or_gap_open(side, sl, q, fill):
+    b = book()
+    pos, why = b.open("SOLUSDT", side, entry=100.0, sl=sl, ts_ms=T0 - STEP)
+    assert pos is not None, why
+    closed = b.mark({"SOLUSDT": q}, T0 + STEP)
+    assert [(c["id"], c["exit"], c["reason"]) for c in closed] == [(pos["id"], fill, "SL hit")]
+    assert b.positions == {}
+
+
+def test_mark_opened_inside_the_window_uses_the_last_price():
+    b = book()
+    pos, _ = b.open("SOLUSDT", "LONG", entry=100.0, sl=95.0, ts_ms=T0 + 60_000)
+    # the window low predates the position: not a hit
+    assert b.mark({"SOLUSDT": quote(90.0, 101.0, 90.0, 99.0)}, T0 + STEP) == []
+    assert b.positions[pos["id"]]["mark"] == 99.0
+    # the next window covers it whole: traded through the SL, filled at the SL
+    closed = b.mark({"SOLUSDT": quote(99.0, 99.0, 93.0, 93.0, T0 + STEP, T0 + 2 * STEP)}, T0 + 2 * STEP)
+    assert closed[0]["exit"] == 95.0
+
+    # opened inside the window with the last price already past the SL: filled there
+    pos, _ = b.open("SOLUSDT", "LONG", entry=100.0, sl=95.0, ts_ms=T0 + 2 * STEP + 60_000)
+    closed = b.mark({"SOLUSDT": quote(100.0, 100.0, 93.0, 93.0, T0 + 2 * STEP, T0 + 3 * STEP)}, T0 + 3 * STEP)
+    assert closed[0]["exit"] == 93.0
+
+
+def test_window_since_beyond_the_ticker_window():
+    assert portfolio_15m.window_since(None, T0) == "15m"
+    assert portfolio_15m.window_since(T0, T0 + 10 * 60_000) == "15m"
+    assert portfolio_15m.window_since(T0, T0 + 5 * 3_600_000) == "6h"
+    assert portfolio_15m.window_since(T0, T0 + 6 * 86_400_000) == "7d"
+    assert portfolio_15m.window_since(T0, T0 + 8 * 86_400_000) is None
+
+
+def test_fetch_kline_quotes_covers_the_whole_gap(monkeypatch):
+    n = 10 * 96  # 10 days of 15m candles
+
+    def fake(symbol, interval, limit, start_ms=None, end_ms=None):
+        out = []
+        for i in range(n):
+            t = T0 + i * STEP
+            if t >= start_ms and len(out) < limit:
+                p = 100.0 - (20.0 if i == 100 else 0.0)  # one deep wick 1 day in
+                out.append([t, "100", "101", f"{p - 1:.2f}", "100.5", "1", t + STEP - 1])
+        return out
+
+    monkeypatch.setattr(snapshot_mtf, "fetch_klines", fake)
+    now = T0 + n * STEP - 1
+    quotes = portfolio.fetch_kline_quotes(["SOLUSDT"], T0 + 60_000, now)
+    q = quotes["SOLUSDT"]
+    assert (q.open, q.high, q.low, q.last, q.from_ms, q.to_ms) == (100.0, 101.0, 79.0, 100.5, T0, now)
+
+    b = book()
+    b.open("SOLUSDT", "LONG", entry=100.0, sl=90.0, ts_ms=T0 - STEP)
+    assert [c["exit"] for c in b.mark(quotes, now)] == [90.0]
+
+
+# --- risk caps (balance 1000: 1% = 10 USDT per trade, 2% = 20 USDT a day) ---
+
+
+def test_open_sizes_to_the_per_trade_risk():
+    b = book()
+    pos, why = b.open("BTCUSDT", "SHORT", entry=60_000.0, sl=60_300.0, ts_ms=T0)
+    assert why == ""
+    assert pos["size"] == pytest.approx(10.0 / 300.0, abs=1e-6) and pos["size"] * 300.0 <= 10.0
+    assert pos["risk_usdt"] == pytest.approx(10.0, abs=1e-3)
+    assert pos["id"] == "BTCUSDT#1" and b.doc["next_id"] == 2
+
+
+@pytest.mark.parametrize(
+    "kw, why",
+    [
+        ({"side": "LONG", "entry": 100.0, "sl": 101.0}, "not on the loss side"),
+        ({"side": "FLAT", "entry": 100.0, "sl": 99.0}, "unknown side"),
+        ({"side": "LONG", "entry": 100.0, "sl": 99.0, "size": 11.0}, "over the per-trade"),
+    ],
+)
+def test_open_refuses_bad_orders(kw, why):
+    pos, reason = book().open("SOLUSDT", ts_ms=T0, **kw)
+    assert pos is None and why in reason
+
+
+def test_daily_budget_caps_the_open_risk():
+    b = book()
+    assert b.open("SOLUSDT", "LONG", entry=100.0, sl=99.0, ts_ms=T0)[0] is not None
+    assert b.open("ETHUSDT", "LONG", entry=100.0, sl=99.0, ts_ms=T0)[0] is not None
+    # 2 x 10 USDT open = the 20 USDT daily cap: nothing left, even for a small explicit size
+    pos, why = b.open("ADAUSDT", "LONG", entry=100.0, sl=99.0, ts_ms=T0)
+    assert pos is None and "daily budget" in why
+    pos, why = b.open("ADAUSDT", "LONG", entry=100.0, sl=99.0, ts_ms=T0, size=1.0)
+    assert pos is None and "over the daily budget" in why
+    assert b.report()["aggregate"]["open_risk_usdt"] == pytest.approx(20.0, abs=1e-3)
+
+    # an SL moved to break-even frees its risk
+    b.positions["SOLUSDT#1"]["sl"] = 100.0
+    assert b.open("ADAUSDT", "LONG", entry=100.0, sl=99.0, ts_ms=T0)[0] is not None
+
+
+def test_realized_losses_count_against_the_day_and_roll_over():
+    b = book()
+    b.open("SOLUSDT", "LONG", entry=100.0, sl=99.0, ts_ms=T0)
+    b.close("SOLUSDT#1", 98.4, T0 + STEP, "manual")  # -16 USDT, past the SL
+    # 4 USDT left of the cap is under half the per-trade 9.84: refused
+    pos, why = b.open("SOLUSDT", "LONG", entry=100.0, sl=99.0, ts_ms=T0 + STEP)
+    assert pos is None and "daily budget left 4.00" in why
+    # next UTC day: a fresh cap off the new balance
+    pos, why = b.open("SOLUSDT", "LONG", entry=100.0, sl=99.0, ts_ms=T0 + 86_400_000)
+    assert pos is not None, why
+    assert b.doc["day_start_balance"] == pytest.approx(984.0) and b.doc["realized_today_usdt"] == 0.0
+
+
+def test_position_limits():
+    b = book(max_positions=3, max_per_symbol=2, max_daily_loss_pct=10.0)
+    assert b.open("SOLUSDT", "LONG", entry=100.0, sl=99.0, ts_ms=T0)[0] is not None
+    assert b.open("SOLUSDT", "LONG", entry=101.0, sl=100.0, ts_ms=T0)[0] is not None  # scale-in
+    assert "max_per_symbol" in b.open("SOLUSDT", "LONG", entry=102.0, sl=101.0, ts_ms=T0)[1]
+    assert "other side" in b.open("SOLUSDT", "SHORT", entry=100.0, sl=101.0, ts_ms=T0)[1]
+    assert b.open("ETHUSDT", "LONG", entry=100.0, sl=99.0, ts_ms=T0)[0] is not None
+    assert "max_positions" in b.open("ADAUSDT", "LONG", entry=100.0, sl=99.0, ts_ms=T0)[1]
+
+
+def test_mark_halts_at_the_daily_loss_cap():
+    b = book()
+    b.open("SOLUSDT", "LONG", entry=100.0, sl=90.0, ts_ms=T0 - STEP)  # 10 USDT at risk, size 1
+    b.open("ETHUSDT", "LONG", entry=100.0, sl=90.0, ts_ms=T0 - STEP)
+    # both 9 under water, SL not hit: 18 USDT unrealized < 20 cap
+    quotes = {s: quote(100.0, 100.0, 91.0, 91.0) for s in ("SOLUSDT", "ETHUSDT")}
+    assert b.mark(quotes, T0 + STEP) == [] and not b.doc["halted"]
+    # one stopped out (-10 realized), the other at -10: the cap is reached
+    quotes = {"SOLUSDT": quote(91.0, 91.0, 89.0, 89.0, T0 + STEP), "ETHUSDT": quote(91.0, 91.0, 90.0, 90.0, T0 + STEP)}
+    closed = b.mark(quotes, T0 + 2 * STEP)
+    assert [c["id"] for c in closed] == ["SOLUSDT#1", "ETHUSDT#2"]
+    assert b.doc["halted"]
+    pos, why = b.open("ADAUSDT", "LONG", entry=100.0, sl=99.9, ts_ms=T0 + 2 * STEP, size=0.1)
+    assert pos is None and "daily loss cap" in why
+    # the halt ends with the UTC day
+    assert b.open("ADAUSDT", "LONG", entry=100.0, sl=99.0, ts_ms=T0 + 86_400_000)[0] is not None
@@ -0,0 +1,127 @@
+"""state_store.StateStore: atomic read-modify-write, rollback, WAL reads and the legacy JSON import."""
+
+from __future__ import annotations
+
+import json
+import threading
+
+import pytest
+
+from state_store import StateError, StateStore
+
+KEY = "BTCUSDT:15m"
+DEFAULTS = {"position": None, "balance_usdt": 1000.0, "n": 0}
+
+
+def versions(store: StateStore) -> dict:
+    return {r["key"]: r["version"] for r in store.rows()}
+
+
+def test_commit_exports_and_versions(tmp_path):
+    store = StateStore(tmp_path / "state.db")
+    export = tmp_path / "state_15m.json"
+    with store.transaction(KEY, DEFAULTS, export=export) as state:
+        state["position"] = {"side": "SHORT", "entry": 60_000.0}
+    assert store.get(KEY, DEFAULTS)["position"] == {"side": "SHORT", "entry": 60_000.0}
+    assert json.loads(export.read_text())["position"]["side"] == "SHORT"
+    assert versions(store) == {KEY: 1}
+
+    # an unchanged document is not rewritten
+    with store.transaction(KEY, DEFAULTS, export=export) as state:
+        pass
+    assert versions(store) == {KEY: 1}
+    with store.transaction(KEY, DEFAULTS, export=export) as state:
+        state["position"] = None
+    assert versions(store) == {KEY: 2}
+    assert json.loads(export.read_text())["position"] is None
+
+
+def test_exception_rolls_back(tmp_path):
+    store = StateStore(tmp_path / "state.db")
+    export = tmp_path / "state_15m.json"
+    with store.transaction(KEY, DEFAULTS, export=export) as state:
+        state["n"] = 1
+    with pytest.raises(ZeroDivisionError):
+        with store.transaction(KEY, DEFAULTS, export=export) as state:
+            state["n"] = 2
+            1 / 0
+    assert store.get(KEY, DEFAULTS)["n"] == 1
+    assert json.loads(export.read_text())["n"] == 1
+    # the lock is released: the next writer gets through
+    with store.transaction(KEY, DEFAULTS) as state:
+        state["n"] += 1
+    assert store.get(KEY)["n"] == 2
+
+
+def test_concurrent_writers_lose_no_update(tmp_path):
+    path = tmp_path / "state.db"
+    StateStore(path).get(KEY, DEFAULTS)
+    errors: list[BaseException] = []
+
+    def worker() -> None:
+        store = StateStore(path)  # its own connection, like another process
+        try:
+            for _ in range(25):
+                with store.transaction(KEY, DEFAULTS) as state:
+                    state["n"] += 1
+        except BaseException as e:  # surfaced below
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    assert StateStore(path).get(KEY, DEFAULTS)["n"] == 200
+
+
+def test_readers_see_the_last_commit_while_a_writer_holds_the_lock(tmp_path):
+    path = tmp_path / "state.db"
+    writer, reader = StateStore(path), StateStore(path, busy_timeout_s=0.5)
+    with writer.transaction(KEY, DEFAULTS) as state:
+        state["n"] = 1
+    seen = []
+    with writer.transaction(KEY, DEFAULTS) as state:
+        state["n"] = 2
+        t = threading.Thread(target=lambda: seen.append(reader.get(KEY, DEFAULTS)["n"]))
+        t.start()
+        t.join(5.0)
+    assert seen == [1]
+    assert reader.get(KEY)["n"] == 2
+
+
+def test_legacy_json_is_imported_once(tmp_path):
+    legacy = tmp_path / "state_15m.json"
+    legacy.write_text(json.dumps({"position": {"side": "SHORT", "entry": 59_000.0}, "balance_usdt": 950.0}))
+    store = StateStore(tmp_path / "state.db")
+
+    state = store.get(KEY, DEFAULTS, legacy_json=legacy)
+    assert state == {"position": {"side": "SHORT", "entry": 59_000.0}, "balance_usdt": 950.0, "n": 0}
+    assert versions(store) == {KEY: 1}
+
+    # the database is the state from now on; the file is only an export
+    legacy.write_text(json.dumps({"position": None, "balance_usdt": 1.0}))
+    assert store.get(KEY, DEFAULTS, legacy_json=legacy)["balance_usdt"] == 950.0
+    with store.transaction(KEY, DEFAULTS, legacy_json=legacy, export=legacy) as state:
+        state["n"] = 5
+    assert json.loads(legacy.read_text())["balance_usdt"] == 950.0
+
+
+def test_missing_legacy_file_starts_from_defaults(tmp_path):
+    store = StateStore(tmp_path / "state.db")
+    assert store.get(KEY, DEFAULTS, legacy_json=tmp_path / "none.json") == DEFAULTS
+    assert store.rows() == []
+
+
+@pytest.mark.parametrize("text", ["{not json", "[1, 2]"])
+def test_corrupt_legacy_file_raises(tmp_path, text):
+    legacy = tmp_path / "state_15m.json"
+    legacy.write_text(text)
+    store = StateStore(tmp_path / "state.db")
+    with pytest.raises(StateError):
+        store.get(KEY, DEFAULTS, legacy_json=legacy)
+    # nothing was imported and the lock is free
+    assert store.rows() == []
+    with store.transaction(KEY, DEFAULTS) as state:
+        state["n"] = 1
@@ -1,121 +1,161 @@
 #!/usr/bin/env python3
-"""Apply an LLM decision (OPEN/CLOSE/NOOP) to local state + CSV log.
+"""Apply an LLM decision (OPEN/CLOSE/NOOP) to local state + event journal.
 
 This script does NOT decide; it only records:
-- state_15m.json (position open/closed)
-- trades_15m.csv (append on OPEN/CLOSE)
+- state.db key "<SYMBOL>:15m" (position open/closed), one atomic read-modify-write
+  shared with cron_15m_bot.py (state_store.py); exported to state_15m.json
+- journal.db "events" (on OPEN/CLOSE; journal.py, same schema as cron_15m_bot.py,
+  idempotent per event_id; replaces the trades_15m.csv append)
+
+--portfolio records into the multi-position portfolio instead (portfolio.py,
+state.db key "portfolio:15m", exported to portfolio_15m.json): OPEN adds a
+position (sized to the risk % when --size is omitted) or is REJECTED by the
+per-trade / daily-loss risk limits; CLOSE needs --exit and closes
+--position-id, else every position of --symbol (and --side). Journal rows
+carry the position_id.
 
 Usage examples:
   python3 trading/apply_15m_decision.py \
-    --action OPEN --side SHORT --tf 15m --entry 83920 --sl 84120 --size 0.05 \
+    --action OPEN --side SHORT --tf 15m --entry 83920 --sl 84120 --size 0.05 --tp-ref 81320 \
     --candle-ts 2026-01-31T06:00:00+00:00 --notes "..." \
     --rsi 34.7 --ema9 33.2 --wma45 42.9 --bias15m SELL_BIAS
 
   python3 trading/apply_15m_decision.py \
     --action CLOSE --side SHORT --tf 15m --entry 83920 --sl 84120 --size 0.05 \
-    --candle-ts ... --notes "bad force" --rsi ... --ema9 ... --wma45 ... --bias15m WAIT
+    --exit 83410 --candle-ts ... --notes "bad force" --rsi ... --ema9 ... --wma45 ... --bias15m WAIT
+
+  python3 trading/apply_15m_decision.py --portfolio \
+    --action OPEN --symbol SOLUSDT --side LONG --entry 142.3 --sl 139.9 \
+    --candle-ts ... --notes "..." --rsi ... --ema9 ... --wma45 ... --bias15m BUY_BIAS
 
 """
 
 from __future__ import annotations
 
 import argparse
-import csv
-import json
+import sys
+import time
 from datetime import datetime, timezone
 from pathlib import Path
 
 WORKSPACE = Path(__file__).resolve().parents[1]
+SCRIPTS_DIR = WORKSPACE / "skills" / "trading-bot" / "scripts"
 STATE_PATH = WORKSPACE / "trading" / "state_15m.json"
-CSV_PATH = WORKSPACE / "trading" / "trades_15m.csv"
+STATE_DB_PATH = WORKSPACE / "trading" / "state.db"
+CSV_PATH = WORKSPACE / "trading" / "trades_15m.csv"  # legacy log, imported into the journal
+JOURNAL_PATH = WORKSPACE / "trading" / "journal.db"
+PORTFOLIO_PATH = WORKSPACE / "trading" / "portfolio_15m.json"
+
+sys.path.insert(0, str(SCRIPTS_DIR))
+import portfolio  # noqa: E402
+from journal import open_journal  # noqa: E402
+from state_store import open_store  # noqa: E402
 
 
 def utc_now_iso() -> str:
     return datetime.now(timezone.utc).replace(microsecond=0).isoformat()
 
 
-def load_state() -> dict:
-    if not STATE_PATH.exists():
-        return {"position": None, "last_candle_ts_utc": None, "balance_usdt": 1000.0, "risk_pct": 1.0}
-    try:
-        return json.loads(STATE_PATH.read_text(encoding="utf-8"))
-    except Exception:
-        return {"position": None, "last_candle_ts_utc": None, "balance_usdt": 1000.0, "risk_pct": 1.0}
+STATE_DEFAULTS = {"position": None, "last_candle_ts_utc": None, "balance_usdt": 1000.0, "risk_pct": 1.0}
 
 
-def save_state(state: dict):
-    STATE_PATH.parent.mkdir(parents=True, exist_ok=True)
-    STATE_PATH.write_text(json.dumps(state, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+def state_export_path(symbol: str) -> Path:
+    # BTCUSDT keeps the historical export name
+    return STATE_PATH if symbol == "BTCUSDT" else STATE_PATH.with_name(f"state_15m_{symbol}.json")
 
 
-def ensure_csv():
-    CSV_PATH.parent.mkdir(parents=True, exist_ok=True)
-    if CSV_PATH.exists():
-        return
-    # Schema aligned with cron_15m_bot.py
-    headers = [
-        "event_id",
-        "event_ts_utc",
-        "symbol",
-        "action",
-        "side",
-        "tf_manage",
-        "entry",
-        "sl",
-        "size_btc",
-        "balance_usdt",
-        "risk_pct",
-        "risk_usdt",
-        "rsi15",
-        "ema9_rsi15",
-        "wma45_rsi15",
-        "bias15m",
-        "bias1h",
-        "bias4h",
-        "bias1d",
-        "snapshot_candle_ts_utc",
-        "notes",
-    ]
-    with CSV_PATH.open("w", newline="", encoding="utf-8") as f:
-        csv.writer(f).writerow(headers)
-
-
-def append_row(row: dict):
-    with CSV_PATH.open("a", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(f, fieldnames=row.keys())
-        w.writerow(row)
+def load_state(symbol: str) -> dict:
+    """Read-only copy of the symbol's 15m state."""
+    return open_store(STATE_DB_PATH).get(f"{symbol}:15m", STATE_DEFAULTS, legacy_json=state_export_path(symbol))
 
 
-def main():
-    ap = argparse.ArgumentParser()
-    ap.add_argument("--action", required=True, choices=["OPEN", "CLOSE", "NOOP"])
-    ap.add_argument("--symbol", default="BTCUSDT")
-    ap.add_argument("--side", default="")
-    ap.add_argument("--tf", default="15m")
-    ap.add_argument("--entry", type=float, default=None)
-    ap.add_argument("--sl", type=float, default=None)
-    ap.add_argument("--size", type=float, default=None)
-    ap.add_argument("--candle-ts", required=True)
-    ap.add_argument("--notes", default="")
-    ap.add_argument("--rsi", type=float, required=True)
-    ap.add_argument("--ema9", type=float, required=True)
-    ap.add_argument("--wma45", type=float, required=True)
-    ap.add_argument("--bias15m", required=True)
-    # Added to match cron_15m_bot.py schema
-    ap.add_argument("--bias1h", default="")
-    ap.add_argument("--bias4h", default="")
-    ap.add_argument("--bias1d", default="")
+def state_transaction(symbol: str):
+    """Atomic read-modify-write of the symbol's 15m state (same key as cron_15m_bot.py)."""
+    export = state_export_path(symbol)
+    return open_store(STATE_DB_PATH).transaction(f"{symbol}:15m", STATE_DEFAULTS, legacy_json=export, export=export)
+
+
+def load_portfolio() -> dict:
+    """Read-only copy of the portfolio document."""
+    return open_store(STATE_DB_PATH).get(portfolio.KEY, portfolio.defaults())
+
+
+def portfolio_transaction():
+    """Atomic read-modify-write of the portfolio (shared with portfolio_15m.py)."""
+    return open_store(STATE_DB_PATH).transaction(portfolio.KEY, portfolio.defaults(), export=PORTFOLIO_PATH)
 
-    args = ap.parse_args()
 
-    state = load_state()
+def portfolio_event(doc: dict, action: str, pos: dict, candle_ts: str, notes: str, exit_price: float | None = None, **fields) -> dict:
+    """Journal "events" row of a portfolio OPEN / CLOSE (one row per position, keyed by its id)."""
+    row = {
+        "event_id": f"{candle_ts}_{action}_{pos['id']}",
+        "event_ts_utc": utc_now_iso(),
+        "symbol": pos["symbol"],
+        "action": action,
+        "side": pos["side"],
+        "tf_manage": "15m",
+        "entry": f"{pos['entry']:.10g}",
+        "sl": f"{pos['sl']:.10g}",
+        "size_btc": f"{pos['size']:.6f}",
+        "balance_usdt": f"{float(doc['balance_usdt']):g}",
+        "risk_pct": f"{float(doc['risk_pct']):g}",
+        "risk_usdt": f"{pos['risk_usdt']:g}",
+        "snapshot_candle_ts_utc": candle_ts,
+        "notes": notes,
+        "exit": "" if exit_price is None else f"{exit_price:.10g}",
+        "position_id": pos["id"],
+    }
+    row.update(fields)
+    return row
+
+
+def apply_portfolio(doc: dict, args: argparse.Namespace) -> list[dict]:
+    """--portfolio: OPEN / CLOSE positions of the portfolio document; returns the journal rows."""
+    if args.action == "NOOP":
+        return []
+    book = portfolio.Portfolio(doc)
+    now_ms = int(time.time() * 1000)
+    ind = {
+        "rsi15": f"{args.rsi:.2f}",
+        "ema9_rsi15": f"{args.ema9:.2f}",
+        "wma45_rsi15": f"{args.wma45:.2f}",
+        "bias15m": args.bias15m,
+        "bias1h": args.bias1h,
+        "bias4h": args.bias4h,
+        "bias1d": args.bias1d,
+        "tf_manage": args.tf,
+    }
+
+    if args.action == "OPEN":
+        if args.entry is None or args.sl is None:
+            raise SystemExit("--portfolio OPEN needs --entry and --sl")
+        extra = {} if args.tp_ref is None else {"tp_ref": args.tp_ref}
+        pos, why = book.open(args.symbol, args.side, args.entry, args.sl, now_ms, size=args.size, **extra)
+        if pos is None:
+            raise SystemExit(f"REJECTED: {why}")
+        return [portfolio_event(doc, "OPEN", pos, args.candle_ts, args.notes, **ind)]
+
+    if args.exit is None:
+        raise SystemExit("--portfolio CLOSE needs --exit (realized PnL)")
+    if args.position_id:
+        pids = [args.position_id] if args.position_id in book.positions else []
+    else:
+        pids = [pid for pid, p in book.positions.items() if p["symbol"] == args.symbol and args.side in ("", p["side"])]
+    if not pids:
+        raise SystemExit(f"no open portfolio position for {args.position_id or args.symbol}")
+    rows = []
+    for pid in pids:
+        closed = book.close(pid, args.exit, now_ms, args.notes)
+        rows.append(portfolio_event(doc, "CLOSE", closed, args.candle_ts, args.notes, exit_price=args.exit, **ind))
+    return rows
+
+
+def apply(state: dict, args: argparse.Namespace) -> None:
     state["last_candle_ts_utc"] = args.candle_ts
 
     if args.action == "NOOP":
-        save_state(state)
         return
 
-    ensure_csv()
     bal = float(state.get("balance_usdt", 1000.0))
     risk_pct = float(state.get("risk_pct", 1.0))
     risk_usdt = bal * risk_pct / 100.0
@@ -142,8 +182,9 @@ def main():
         "bias1d": args.bias1d,
         "snapshot_candle_ts_utc": args.candle_ts,
         "notes": args.notes,
+        "exit": "" if args.exit is None else f"{args.exit:.2f}",
     }
-    append_row(row)
+    open_journal(JOURNAL_PATH).record("events", row, legacy_csv=CSV_PATH)
 
     if args.action == "OPEN":
         state["position"] = {
@@ -154,11 +195,53 @@ def main():
             "size_btc": args.size,
             "opened_ts_utc": utc_now_iso(),
         }
+        if args.tp_ref is not None:
+            # target zone for the adaptive-TP exit (exit_monitor.py); not an order
+            state["position"]["tp_ref"] = args.tp_ref
 
     if args.action == "CLOSE":
         state["position"] = None
 
-    save_state(state)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--action", required=True, choices=["OPEN", "CLOSE", "NOOP"])
+    ap.add_argument("--symbol", default="BTCUSDT")
+    ap.add_argument("--side", default="")
+    ap.add_argument("--tf", default="15m")
+    ap.add_argument("--entry", type=float, default=None)
+    ap.add_argument("--sl", type=float, default=None)
+    ap.add_argument("--size", type=float, default=None)
+    ap.add_argument("--exit", type=float, default=None, help="CLOSE fill price (PnL in pnl_report.py)")
+    ap.add_argument("--tp-ref", type=float, default=None, help="OPEN: TP reference price (adaptive TP in exit_monitor.py)")
+    ap.add_argument("--portfolio", action="store_true", help="record into the multi-position portfolio (portfolio.py)")
+    ap.add_argument("--position-id", default="", help="--portfolio CLOSE: only this position (default: all of --symbol)")
+    ap.add_argument("--candle-ts", required=True)
+    ap.add_argument("--notes", default="")
+    ap.add_argument("--rsi", type=float, required=True)
+    ap.add_argument("--ema9", type=float, required=True)
+    ap.add_argument("--wma45", type=float, required=True)
+    ap.add_argument("--bias15m", required=True)
+    # Added to match cron_15m_bot.py schema
+    ap.add_argument("--bias1h", default="")
+    ap.add_argument("--bias4h", default="")
+    ap.add_argument("--bias1d", default="")
+
+    args = ap.parse_args()
+
+    if args.portfolio:
+        with portfolio_transaction() as doc:
+            rows = apply_portfolio(doc, args)
+            # inside the transaction: a failed journal write rolls the state back
+            journal = open_journal(JOURNAL_PATH)
+            for row in rows:
+                journal.record("events", row, legacy_csv=CSV_PATH)
+        for row in rows:
+            print(f"{row['action']} {row['position_id']}")
+        return
+
+    with state_transaction(args.symbol) as state:
+        apply(state, args)
 
 
 if __name__ == "__main__":
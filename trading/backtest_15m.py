@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""Event-driven backtest of the cron_15m_bot rules over historical klines.
+
+Replays 15m bars one by one through the same decision code as the live bot
+(`cron_15m_bot.decide`): trend labels from module_trend_mtf.classify, OPEN SHORT
+on HTF+15m STRONG_DOWN with SL above the nearest 15m pivot high, 1% risk sizing,
+CLOSE on 15m bias flip.
+
+How a live run is mirrored at each 15m close:
+- every TF's RSI/EMA/WMA come from a streaming RsiMaChain (closed candles pushed,
+  the live candle peeked at the current 15m close), i.e. O(1) per bar instead of
+  recomputing 210-bar windows or spawning a process per bar; they are
+  computed once into per-bar columns (indicator_columns) and replay() runs
+  any bar range / rule set over them (walkforward_15m.py reuses both);
+  with NumPy the columns are built in one vectorised pass per TF
+  (indicators_vec.peek_columns), --indicators python keeps the bar loop
+- HTF candles are pushed only once they have closed at the replay time
+- the 15m window passed to decide() is the last LIMIT candles plus a flat
+  "just opened" candle at the current close (what the bot sees at minute 01);
+  windows are copied out of one CandleSeries (no per-candle dicts)
+
+Added on top of the live bot: the stored SL is checked against each bar's
+high/low (fill at SL, or at the open on a gap), since the live bot never does.
+
+Example:
+  python3 trading/backtest_15m.py --days 365 --cache-dir trading/cache/klines \
+    --trades-csv /tmp/bt_trades.csv --equity-csv /tmp/bt_equity.csv
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import math
+import sys
+import time
+from array import array
+from pathlib import Path
+from typing import Optional
+
+import cron_15m_bot as bot
+
+sys.path.insert(0, str(bot.SCRIPTS_DIR))
+import indicators_vec  # noqa: E402
+import kline_cache  # noqa: E402
+import module_trend_mtf  # noqa: E402
+import snapshot_mtf  # noqa: E402
+from candle_series import CandleSeries, iso_utc  # noqa: E402
+from indicators_stream import RsiMaChain  # noqa: E402
+
+HTFS = ["1d", "4h", "1h"]
+NAN = float("nan")
+
+
+def load_history(symbol: str, days: int, cache_dir: Path | str | None, warmup: int = bot.LIMIT) -> dict:
+    """Closed klines per TF covering `days` of 15m bars plus indicator warm-up."""
+    limits = {tf: days * 86_400_000 // kline_cache.interval_ms(tf) + warmup + 1 for tf in bot.TFS}
+    cache = None
+    if cache_dir:
+        # the store must hold the whole range, else every save trims it and the next run refetches
+        cache = kline_cache.KlineCache(cache_dir, snapshot_mtf.fetch_klines, max_rows=max(20_000, *limits.values()))
+    out = {}
+    for tf, limit in limits.items():
+        if cache is not None:
+            rows = cache.get(symbol, tf, limit)
+        else:
+            rows = kline_cache.fetch_history(snapshot_mtf.fetch_klines, symbol, tf, limit)
+        out[tf] = rows[:-1]  # drop the live candle
+    return out
+
+
+def stats(trades: list[dict], equity: list[tuple[int, float]], start_balance: float) -> dict:
+    pnl = [t["pnl"] for t in trades]
+    wins = [p for p in pnl if p > 0]
+    losses = [p for p in pnl if p <= 0]
+    peak = start_balance
+    max_dd = 0.0
+    for _, e in equity:
+        peak = max(peak, e)
+        max_dd = max(max_dd, (peak - e) / peak * 100.0 if peak > 0 else 0.0)
+    end_balance = equity[-1][1] if equity else start_balance
+    return {
+        "trades": len(trades),
+        "wins": len(wins),
+        "win_rate": round(len(wins) / len(trades), 4) if trades else None,
+        "net_pnl": round(sum(pnl), 2),
+        "return_pct": round((end_balance / start_balance - 1) * 100.0, 2),
+        "max_drawdown_pct": round(max_dd, 2),
+        "profit_factor": round(sum(wins) / -sum(losses), 3) if losses and sum(losses) < 0 else None,
+        "expectancy_usdt": round(sum(pnl) / len(pnl), 4) if pnl else None,
+        "avg_r": round(sum(t["r"] for t in trades) / len(trades), 3) if trades else None,
+        "end_balance": round(end_balance, 2),
+    }
+
+
+# live rule set (cron_15m_bot / module_trend_mtf defaults); walkforward_15m.py fits these
+DEFAULT_PARAMS = {
+    "strong_lo": 40.0,
+    "strong_hi": 60.0,
+    "close_rule": "flip",
+    "sl_buffer": bot.SL_BUFFER_USDT,
+    "pivot_k": bot.PIVOT_K,
+}
+
+
+def indicator_columns(tf_klines: dict) -> tuple[CandleSeries, dict]:
+    """15m candles + per-bar (RSI, EMA(RSI), WMA(RSI)) columns for every TF.
+
+    Bar i holds the values the live bot sees at that bar's close: each TF's
+    chain with its closed candles pushed and the live candle peeked at the
+    15m close. NaN where a TF is not warmed up yet. Computed once and shared
+    by every replay (run_backtest, walk-forward folds and candidates).
+    """
+    candles = snapshot_mtf.klines_to_candles(tf_klines["15m"])
+    if indicators_vec.active():
+        return candles, indicator_columns_vec(candles, tf_klines)
+    ts_ms = candles.ts_ms
+    closes = candles.closes
+    step15 = kline_cache.interval_ms("15m")
+    n = len(candles)
+
+    cols = {tf: tuple(array("d", [NAN]) * n for _ in range(3)) for tf in HTFS + ["15m"]}
+    chain15 = RsiMaChain()
+    htf = {}
+    for tf in HTFS:
+        rows = tf_klines[tf]
+        htf[tf] = {
+            "close_ms": [int(k[0]) + kline_cache.interval_ms(tf) for k in rows],
+            "close": [float(k[4]) for k in rows],
+            "next": 0,
+            "chain": RsiMaChain(),
+        }
+
+    for i in range(n):
+        close = closes[i]
+        _, _, w15 = chain15.update(close, iso_utc(ts_ms[i]))
+        now_ms = ts_ms[i] + step15
+
+        ready = w15 is not None
+        for tf, h in htf.items():
+            while h["next"] < len(h["close"]) and h["close_ms"][h["next"]] <= now_ms:
+                h["chain"].update(h["close"][h["next"]])
+                h["next"] += 1
+            r, e, w = h["chain"].peek(close)
+            if r is None or w is None:
+                ready = False
+                break
+            rc, ec, wc = cols[tf]
+            rc[i], ec[i], wc[i] = r, e, w
+        if ready:
+            rc, ec, wc = cols["15m"]
+            rc[i], ec[i], wc[i] = chain15.peek(close)
+    return candles, cols
+
+
+def indicator_columns_vec(candles: CandleSeries, tf_klines: dict) -> dict:
+    """indicator_columns() on NumPy: every bar's chain peek in one pass per TF.
+
+    Same cells as the bar loop (within float tolerance), including which
+    columns stay NaN: a TF is filled only while it and every HTF before it are
+    warmed up, 15m only once its WMA and all HTFs are.
+    """
+    np = indicators_vec.np
+    closes = np.asarray(candles.closes, dtype=float)
+    n = len(closes)
+    now_ms = np.asarray(candles.ts_ms, dtype=np.int64) + kline_cache.interval_ms("15m")
+
+    def column(values) -> array:
+        out = array("d")
+        out.frombytes(np.ascontiguousarray(values, dtype=float).tobytes())
+        return out
+
+    cols = {}
+    ready = np.ones(n, dtype=bool)
+    for tf in HTFS:
+        rows = tf_klines[tf]
+        close_ms = np.array([int(k[0]) for k in rows], dtype=np.int64) + kline_cache.interval_ms(tf)
+        counts = np.searchsorted(close_ms, now_ms, side="right")
+        r, e, w = indicators_vec.peek_columns([float(k[4]) for k in rows], counts, closes)
+        ready &= ~np.isnan(r) & ~np.isnan(w)
+        cols[tf] = tuple(column(np.where(ready, v, np.nan)) for v in (r, e, w))
+    # the 15m chain has pushed bar i when it peeks at its close
+    r, e, w = indicators_vec.peek_columns(closes, np.arange(1, n + 1), closes)
+    ready &= np.arange(n) >= RsiMaChain().wma.length - 1
+    cols["15m"] = tuple(column(np.where(ready, v, np.nan)) for v in (r, e, w))
+    return cols
+
+
+def label_columns(cols: dict, strong_lo: float = 40.0, strong_hi: float = 60.0) -> list[Optional[dict]]:
+    """Per-bar {tf: module_trend_mtf.classify(...)} for one Rule B band (None = not warmed up)."""
+    rsi15 = cols["15m"][0]
+    out: list[Optional[dict]] = [None] * len(rsi15)
+    for i in range(len(rsi15)):
+        if not math.isnan(rsi15[i]):
+            out[i] = {
+                tf: module_trend_mtf.classify(rc[i], ec[i], wc[i], strong_lo=strong_lo, strong_hi=strong_hi)
+                for tf, (rc, ec, wc) in cols.items()
+            }
+    return out
+
+
+def replay(
+    candles: CandleSeries,
+    cols: dict,
+    start: int = 0,
+    stop: Optional[int] = None,
+    params: Optional[dict] = None,
+    balance: float = bot.BALANCE_USDT_DEFAULT,
+    risk_pct: float = bot.RISK_PCT_DEFAULT,
+    fee_pct: float = 0.0,
+    use_sl: bool = True,
+    compound: bool = True,
+    window: int = bot.LIMIT,
+    labels: Optional[list] = None,
+) -> dict:
+    """Replay bars [start, stop) flat-to-flat with one rule set (`params`, see DEFAULT_PARAMS).
+
+    `labels`: label_columns() for the same band, when the caller replays the
+    band many times; otherwise labels are classified per bar.
+    """
+    p = dict(DEFAULT_PARAMS, **(params or {}))
+    band = {"strong_lo": p["strong_lo"], "strong_hi": p["strong_hi"]}
+    stop = len(candles) if stop is None else stop
+    ts_ms = candles.ts_ms
+    step15 = kline_cache.interval_ms("15m")
+    rsi15_col = cols["15m"][0]
+
+    state = {"last_candle_ts_utc": None, "position": None, "balance_usdt": balance, "risk_pct": risk_pct}
+    trades: list[dict] = []
+    equity: list[tuple[int, float]] = []
+    realized = balance
+
+    def close_trade(i: int, price: float, reason: str) -> None:
+        nonlocal realized
+        pos = state["position"]
+        sign = -1.0 if pos["side"] == "SHORT" else 1.0
+        gross = sign * (price - pos["entry"]) * pos["size_btc"]
+        fees = fee_pct / 100.0 * pos["size_btc"] * (pos["entry"] + price)
+        pnl = gross - fees
+        risk = abs(pos["sl"] - pos["entry"]) * pos["size_btc"]
+        realized += pnl
+        trades.append(
+            {
+                "side": pos["side"],
+                "opened_ts_utc": pos["opened_ts_utc"],
+                "closed_ts_utc": candles[i]["ts_utc"],
+                "entry": pos["entry"],
+                "exit": price,
+                "sl": pos["sl"],
+                "size_btc": pos["size_btc"],
+                "pnl": pnl,
+                "r": pnl / risk if risk > 0 else 0.0,
+                "reason": reason,
+            }
+        )
+        state["position"] = None
+        if compound:
+            state["balance_usdt"] = realized
+
+    for i in range(start, stop):
+        c = candles[i]
+        close = c["close"]
+        now_ms = ts_ms[i] + step15
+
+        pos = state["position"]
+        if pos is not None and use_sl:
+            if pos["side"] == "SHORT" and c["high"] >= pos["sl"]:
+                close_trade(i, max(c["open"], pos["sl"]), "SL hit")
+            elif pos["side"] == "LONG" and c["low"] <= pos["sl"]:
+                close_trade(i, min(c["open"], pos["sl"]), "SL hit")
+
+        if i + 1 >= window and not math.isnan(rsi15_col[i]):
+            if labels is not None:
+                bar_labels = labels[i]
+            else:
+                bar_labels = {tf: module_trend_mtf.classify(rc[i], ec[i], wc[i], **band) for tf, (rc, ec, wc) in cols.items()}
+            win = candles[i - window + 2 : i + 1].copy()
+            win.append(now_ms, close, close, close, close, 0.0)
+            d = bot.decide(
+                state,
+                win,
+                bar_labels,
+                rsi15_col[i],
+                c["ts_utc"],
+                close_rule=p["close_rule"],
+                sl_buffer=p["sl_buffer"],
+                pivot_k=p["pivot_k"],
+            )
+            if d["action"] == "CLOSE":
+                state["position"] = d["position"]
+                close_trade(i, close, d["notes"])
+
+        pos = state["position"]
+        unreal = 0.0
+        if pos is not None:
+            sign = -1.0 if pos["side"] == "SHORT" else 1.0
+            unreal = sign * (close - pos["entry"]) * pos["size_btc"]
+        equity.append((ts_ms[i], realized + unreal))
+
+    if state["position"] is not None:
+        close_trade(stop - 1, candles[stop - 1]["close"], "end of data")
+        equity[-1] = (equity[-1][0], realized)
+
+    return {"trades": trades, "equity": equity, "stats": stats(trades, equity, balance)}
+
+
+def run_backtest(
+    tf_klines: dict,
+    balance: float = bot.BALANCE_USDT_DEFAULT,
+    risk_pct: float = bot.RISK_PCT_DEFAULT,
+    fee_pct: float = 0.0,
+    use_sl: bool = True,
+    compound: bool = True,
+    window: int = bot.LIMIT,
+    params: Optional[dict] = None,
+) -> dict:
+    candles, cols = indicator_columns(tf_klines)
+    return replay(
+        candles,
+        cols,
+        params=params,
+        balance=balance,
+        risk_pct=risk_pct,
+        fee_pct=fee_pct,
+        use_sl=use_sl,
+        compound=compound,
+        window=window,
+    )
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--symbol", default=bot.SYMBOL)
+    ap.add_argument("--days", type=int, default=365)
+    ap.add_argument("--cache-dir", default=str(bot.KLINE_CACHE_DIR))
+    ap.add_argument("--balance", type=float, default=bot.BALANCE_USDT_DEFAULT)
+    ap.add_argument("--risk-pct", type=float, default=bot.RISK_PCT_DEFAULT)
+    ap.add_argument("--fee-pct", type=float, default=0.0, help="per side, in percent of notional")
+    ap.add_argument("--no-sl", action="store_true", help="exit only on bot CLOSE signals")
+    ap.add_argument("--no-compound", action="store_true", help="size from the starting balance")
+    ap.add_argument("--trades-csv", default=None)
+    ap.add_argument("--equity-csv", default=None)
+    indicators_vec.add_arguments(ap)
+    args = ap.parse_args()
+    indicators_vec.configure(args.indicators)
+
+    hist = load_history(args.symbol, args.days, args.cache_dir)
+    t0 = time.perf_counter()
+    res = run_backtest(
+        hist,
+        balance=args.balance,
+        risk_pct=args.risk_pct,
+        fee_pct=args.fee_pct,
+        use_sl=not args.no_sl,
+        compound=not args.no_compound,
+    )
+    elapsed = time.perf_counter() - t0
+
+    if args.trades_csv and res["trades"]:
+        with open(args.trades_csv, "w", newline="", encoding="utf-8") as f:
+            w = csv.DictWriter(f, fieldnames=list(res["trades"][0].keys()))
+            w.writeheader()
+            w.writerows(res["trades"])
+    if args.equity_csv:
+        with open(args.equity_csv, "w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f)
+            w.writerow(["ts_ms", "equity_usdt"])
+            w.writerows(res["equity"])
+
+    out = {
+        "module": "backtest_15m",
+        "version": "0.1",
+        "symbol": args.symbol,
+        "bars_15m": len(hist["15m"]),
+        "stats": res["stats"],
+        "trades": res["trades"],
+        "meta": {"replay_s": round(elapsed, 3), "indicators": indicators_vec.backend_name()},
+    }
+    print(json.dumps(out, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
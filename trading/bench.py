@@ -0,0 +1,504 @@
+#!/usr/bin/env python3
+"""Offline performance benchmarks for the indicator, S/R and 15m bot code paths.
+
+Targets (each at every --sizes bar count it supports):
+- rsi / ema / wma              snapshot_mtf.rsi(14) / ema(9) / wma(45) on closes
+- compute_indicators           snapshot_mtf.compute_indicators (RSI14 -> EMA9/WMA45) on a CandleSeries,
+                               pure-Python backend
+- compute_indicators_numpy     the same on the indicators_vec NumPy backend
+- rsi_ma_chain_numpy           indicators_vec.rsi_ma_chain (RSI14, EMA9/WMA45 series) on NumPy
+- indicator_columns            backtest_15m.indicator_columns (per-bar MTF peek columns), pure Python
+- indicator_columns_numpy      the same on NumPy (both capped at COLUMNS_MAX_BARS)
+- pivots                       pivots.find_pivots highs + lows, window 5/5
+- cluster_zones                module_sr_mtf.cluster_zones over the pivot zones of the fixture
+- classify                     module_trend_mtf.classify for every bar (precomputed RSI/EMA/WMA)
+- cron_cycle                   snapshot_from_klines (1d/4h/1h/15m, `size` bars each) + cron_15m_bot.run_cycle,
+                               state / CSV in a temp dir (capped at CYCLE_MAX_BARS)
+
+Each (target, size) is called repeatedly (at least --min-reps times and
+--min-time seconds) and reported as p50/p95/p99 latency plus bars/s at p50.
+The *_numpy targets also report max_abs_diff / nan_mismatch against the
+pure-Python output on the same fixture; a diff above AGREE_TOL or any
+NaN-layout mismatch is counted in "disagreements" and fails the run like a
+regression. They are skipped when NumPy is not installed. The other targets
+run on the --indicators backend (cron_cycle goes through compute_indicators).
+
+Fixtures (never any network):
+- synthetic: seeded random-walk klines, identical on every run
+- recorded: klines already in a KlineCache store (--fixture-dir, e.g.
+  trading/cache/klines); sizes beyond the recorded rows are skipped
+
+Baseline: results are compared with --baseline (default bench_baseline.json
+next to this file) by p50; a target slower than (1 + --tolerance) x baseline is
+a regression and the exit status is 1. --save-baseline rewrites the file.
+The gate is relative to the host: every run times a fixed pure-Python workload
+(calibrate(), stored as env.calibration_ms with the baseline) and the baseline
+p50s are scaled by calibration now / calibration then, so a slower or faster
+machine is not reported as a regression or speed-up. --absolute compares raw
+p50s (same host only).
+
+Example:
+  python3 trading/bench.py                                   # compare with the stored baseline
+  python3 trading/bench.py --sizes 210,10000 --targets rsi,cron_cycle
+  python3 trading/bench.py --sizes 10000,100000 --targets compute_indicators,compute_indicators_numpy,indicator_columns_numpy
+  python3 trading/bench.py --fixture recorded --fixture-dir trading/cache/klines --save-baseline
+"""
+
+from __future__ import annotations
+
+import argparse
+import atexit
+import json
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+import backtest_15m
+import cron_15m_bot as bot
+
+sys.path.insert(0, str(bot.SCRIPTS_DIR))
+import indicators_vec  # noqa: E402
+import kline_cache  # noqa: E402
+import module_sr_mtf  # noqa: E402
+import module_trend_mtf  # noqa: E402
+import snapshot_mtf  # noqa: E402
+from candle_series import CandleSeries  # noqa: E402
+from pivots import find_pivots  # noqa: E402
+from state_store import open_store  # noqa: E402
+
+BASELINE_PATH = Path(__file__).resolve().parent / "bench_baseline.json"
+SIZES = [210, 10_000, 1_000_000]
+CYCLE_MAX_BARS = 10_000
+# the pure-Python bar loop of indicator_columns takes seconds per call beyond this
+COLUMNS_MAX_BARS = 100_000
+# NumPy vs pure-Python: largest accepted abs difference of an indicator value
+AGREE_TOL = 1e-6
+# latencies below this are dominated by timer noise; never flagged
+NOISE_FLOOR_MS = 0.05
+CALIBRATION_REPS = 15
+
+
+def synth_klines(n: int, interval: str, seed: int, price: float = 60_000.0) -> list[list]:
+    """Seeded random-walk REST kline rows ending at a fixed time."""
+    rnd = random.Random(seed)
+    step = kline_cache.interval_ms(interval)
+    t = 1_700_000_000_000 // step * step - n * step
+    rows = []
+    for _ in range(n):
+        o = price
+        c = o * (1 + rnd.gauss(0, 0.003))
+        h = max(o, c) * (1 + abs(rnd.gauss(0, 0.0015)))
+        lo = min(o, c) * (1 - abs(rnd.gauss(0, 0.0015)))
+        rows.append([t, f"{o:.2f}", f"{h:.2f}", f"{lo:.2f}", f"{c:.2f}", f"{rnd.random() * 100:.4f}", t + step - 1])
+        price = c
+        t += step
+    return rows
+
+
+class Fixture:
+    """Klines per TF for one size; derived columns are built on first use."""
+
+    def __init__(self, name: str, tf_klines: dict):
+        self.name = name
+        self.tf_klines = tf_klines
+        self._cache: dict = {}
+
+    def _get(self, key: str, build: Callable):
+        if key not in self._cache:
+            self._cache[key] = build()
+        return self._cache[key]
+
+    @property
+    def candles(self) -> CandleSeries:
+        return self._get("candles", lambda: CandleSeries.from_klines(self.tf_klines["15m"]))
+
+    @property
+    def closes(self) -> list[float]:
+        return self._get("closes", lambda: self.candles.closes.tolist())
+
+    @property
+    def rsi_ma(self) -> tuple:
+        """Per-bar RSI14, EMA9(RSI14), WMA45(RSI14) series (warm-up RSI filled as in rsi_ma_values)."""
+
+        def build() -> tuple:
+            r = snapshot_mtf.rsi(self.closes, 14)
+            filled, last = [], 50.0
+            for v in r:
+                last = last if v is None else v
+                filled.append(last)
+            return r, snapshot_mtf.ema(filled, 9), snapshot_mtf.wma(filled, 45)
+
+        return self._get("rsi_ma", build)
+
+    @property
+    def columns(self) -> dict:
+        """Pure-Python backtest_15m.indicator_columns (reference for the NumPy target)."""
+
+        def build() -> dict:
+            with indicators_vec.use("python"):
+                return backtest_15m.indicator_columns(self.tf_klines)[1]
+
+        return self._get("columns", build)
+
+    @property
+    def zones(self) -> list:
+        def build() -> list:
+            highs, lows = self.candles.highs, self.candles.lows
+            zones = []
+            for kind, values in (("resistance", highs), ("support", lows)):
+                for i in find_pivots(values, 5, 5, "high" if kind == "resistance" else "low"):
+                    lo, hi = module_sr_mtf.pct_band(values[i], 0.15)
+                    zones.append(module_sr_mtf.Zone("15m", kind, lo, hi, 1.0, 1, str(i)))
+            return zones
+
+        return self._get("zones", build)
+
+
+def make_fixture(kind: str, size: int, fixture_dir: Optional[str], symbol: str) -> Optional[Fixture]:
+    if kind == "synthetic":
+        tfs = {tf: synth_klines(size, tf, seed) for seed, tf in enumerate(bot.TFS)}
+        return Fixture("synthetic", tfs)
+    store = kline_cache.KlineCache(fixture_dir, fetch=None)
+    tfs = {}
+    for tf in bot.TFS:
+        rows = store.load(symbol, tf)
+        if len(rows) < size:
+            return None
+        tfs[tf] = rows[-size:]
+    return Fixture("recorded", tfs)
+
+
+# --- targets: name -> (max size or None, fixture -> (prepare, run)) ---
+
+
+def _simple(build: Callable[[Fixture], Callable[[], object]]) -> Callable:
+    """Target without per-call setup: build(fixture) -> zero-argument call."""
+
+    def make(fx: Fixture):
+        call = build(fx)
+        return (lambda: None), (lambda _: call())
+
+    return make
+
+
+def _on(backend: str, build: Callable[[Fixture], Callable[[], object]]) -> Callable[[Fixture], Callable[[], object]]:
+    """build() with the call pinned to one indicators_vec backend."""
+
+    def pinned(fx: Fixture) -> Callable[[], object]:
+        call = build(fx)
+
+        def run() -> object:
+            with indicators_vec.use(backend):
+                return call()
+
+        return run
+
+    return pinned
+
+
+def _classify_all(fx: Fixture) -> Callable[[], object]:
+    r, e, w = fx.rsi_ma
+    bars = [(r[i], e[i], w[i]) for i in range(len(r)) if r[i] is not None and w[i] is not None]
+    classify = module_trend_mtf.classify
+    return lambda: [classify(a, b, c) for a, b, c in bars]
+
+
+def _cron_cycle(fx: Fixture):
+    tmp = Path(tempfile.mkdtemp(prefix="bench_cycle_"))
+    atexit.register(shutil.rmtree, tmp, True)
+    bot.STATE_PATH = tmp / "state_15m.json"
+    bot.STATE_DB_PATH = tmp / "state.db"
+    bot.CSV_PATH = tmp / "trades_15m.csv"
+    bot.JOURNAL_PATH = tmp / "journal.db"
+
+    def prepare() -> None:
+        # a fresh state each call, otherwise the same candle is a NOOP short-cut
+        open_store(bot.STATE_DB_PATH).delete(bot.STATE_KEY)
+        bot.STATE_PATH.unlink(missing_ok=True)
+
+    def run(_) -> str:
+        return bot.run_cycle(snapshot_mtf.snapshot_from_klines(bot.SYMBOL, fx.tf_klines))
+
+    return prepare, run
+
+
+def series_diff(got, want) -> tuple[float, int]:
+    """(max abs diff, cells where exactly one side is NaN/None) of two aligned series."""
+    worst, mismatch = 0.0, 0
+    for a, b in zip(indicators_vec.as_list(got), indicators_vec.as_list(want)):
+        a = None if a is None or a != a else a
+        b = None if b is None or b != b else b
+        if (a is None) != (b is None):
+            mismatch += 1
+        elif a is not None:
+            worst = max(worst, abs(a - b))
+    return worst, mismatch
+
+
+def _agree(pairs) -> tuple[float, int]:
+    diffs = [series_diff(got, want) for got, want in pairs]
+    return max(d[0] for d in diffs), sum(d[1] for d in diffs)
+
+
+def _agree_compute_indicators(fx: Fixture) -> tuple[float, int]:
+    with indicators_vec.use("python"):
+        want = snapshot_mtf.compute_indicators(fx.candles)
+    with indicators_vec.use("numpy"):
+        got = snapshot_mtf.compute_indicators(fx.candles)
+    keys = ("rsi", "ema_rsi", "wma_rsi")
+    return _agree(([got[k]["value"]], [want[k]["value"]]) for k in keys)
+
+
+def _agree_rsi_ma_chain(fx: Fixture) -> tuple[float, int]:
+    with indicators_vec.use("numpy"):
+        got = indicators_vec.rsi_ma_chain(fx.closes)
+    return _agree(zip(got, fx.rsi_ma))
+
+
+def _agree_indicator_columns(fx: Fixture) -> tuple[float, int]:
+    with indicators_vec.use("numpy"):
+        _, got = backtest_15m.indicator_columns(fx.tf_klines)
+    return _agree((g, w) for tf in fx.columns for g, w in zip(got[tf], fx.columns[tf]))
+
+
+TARGETS: dict[str, tuple[Optional[int], Callable]] = {
+    "rsi": (None, _simple(lambda fx: lambda: snapshot_mtf.rsi(fx.closes, 14))),
+    "ema": (None, _simple(lambda fx: lambda: snapshot_mtf.ema(fx.closes, 9))),
+    "wma": (None, _simple(lambda fx: lambda: snapshot_mtf.wma(fx.closes, 45))),
+    "compute_indicators": (None, _simple(_on("python", lambda fx: lambda: snapshot_mtf.compute_indicators(fx.candles)))),
+    "compute_indicators_numpy": (None, _simple(_on("numpy", lambda fx: lambda: snapshot_mtf.compute_indicators(fx.candles)))),
+    "rsi_ma_chain_numpy": (None, _simple(_on("numpy", lambda fx: lambda: indicators_vec.rsi_ma_chain(fx.closes)))),
+    "indicator_columns": (
+        COLUMNS_MAX_BARS,
+        _simple(_on("python", lambda fx: lambda: backtest_15m.indicator_columns(fx.tf_klines))),
+    ),
+    "indicator_columns_numpy": (
+        COLUMNS_MAX_BARS,
+        _simple(_on("numpy", lambda fx: lambda: backtest_15m.indicator_columns(fx.tf_klines))),
+    ),
+    "pivots": (
+        None,
+        _simple(lambda fx: lambda: (find_pivots(fx.candles.highs, 5, 5, "high"), find_pivots(fx.candles.lows, 5, 5, "low"))),
+    ),
+    "cluster_zones": (None, _simple(lambda fx: lambda: module_sr_mtf.cluster_zones(fx.zones))),
+    "classify": (None, _simple(_classify_all)),
+    "cron_cycle": (CYCLE_MAX_BARS, _cron_cycle),
+}
+
+# NumPy targets: fixture -> (max abs diff, NaN-layout mismatches) vs pure Python
+AGREEMENT: dict[str, Callable[[Fixture], tuple[float, int]]] = {
+    "compute_indicators_numpy": _agree_compute_indicators,
+    "rsi_ma_chain_numpy": _agree_rsi_ma_chain,
+    "indicator_columns_numpy": _agree_indicator_columns,
+}
+
+
+def percentile(sorted_ms: list[float], p: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    k = max(0, min(len(sorted_ms) - 1, int(round(p / 100.0 * len(sorted_ms) + 0.5)) - 1))
+    return sorted_ms[k]
+
+
+def measure(prepare: Callable, run: Callable, min_reps: int, min_time_s: float, max_reps: int) -> list[float]:
+    samples: list[float] = []
+    spent = 0.0
+    while len(samples) < max_reps and (len(samples) < min_reps or spent < min_time_s):
+        arg = prepare()
+        t0 = time.perf_counter()
+        run(arg)
+        dt = time.perf_counter() - t0
+        samples.append(dt * 1000.0)
+        spent += dt
+    return samples
+
+
+def run_suite(
+    targets: list[str],
+    sizes: list[int],
+    fixture: str = "synthetic",
+    fixture_dir: Optional[str] = None,
+    symbol: str = bot.SYMBOL,
+    min_reps: int = 5,
+    min_time_s: float = 0.5,
+    max_reps: int = 1000,
+) -> tuple[list[dict], list[str]]:
+    results: list[dict] = []
+    skipped: list[str] = []
+    for size in sizes:
+        fx = make_fixture(fixture, size, fixture_dir, symbol)
+        if fx is None:
+            skipped.append(f"{fixture}@{size}: not enough recorded klines")
+            continue
+        for name in targets:
+            max_size, make = TARGETS[name]
+            if max_size is not None and size > max_size:
+                skipped.append(f"{name}@{size}: above {max_size} bars")
+                continue
+            if name in AGREEMENT and not indicators_vec.HAS_NUMPY:
+                skipped.append(f"{name}@{size}: NumPy not installed")
+                continue
+            prepare, run = make(fx)
+            ms = sorted(measure(prepare, run, min_reps, min_time_s, max_reps))
+            p50 = percentile(ms, 50)
+            row = {
+                "target": name,
+                "size": size,
+                "fixture": fx.name,
+                "reps": len(ms),
+                "p50_ms": round(p50, 4),
+                "p95_ms": round(percentile(ms, 95), 4),
+                "p99_ms": round(percentile(ms, 99), 4),
+                "bars_per_s": round(size / (p50 / 1000.0)) if p50 > 0 else None,
+            }
+            if name in AGREEMENT:
+                worst, mismatch = AGREEMENT[name](fx)
+                row["max_abs_diff"] = float(f"{worst:.3g}")
+                row["nan_mismatch"] = mismatch
+            results.append(row)
+    return results, skipped
+
+
+def _calibration_work() -> float:
+    # interpreter-bound like the targets: float recurrences, list appends, a sort
+    x, acc, out = 1.0, 0.0, []
+    for i in range(200_000):
+        x = x * 0.999 + (i % 7) * 0.001
+        acc += x if x > 1.0 else -x
+        out.append(acc)
+    out = sorted(out[::10])
+    return out[0]
+
+
+def calibrate(reps: int = CALIBRATION_REPS) -> float:
+    """p50 ms of a fixed pure-Python workload: the host-speed yardstick of the baseline."""
+    ms = sorted(measure(lambda: None, lambda _: _calibration_work(), reps, 0.0, reps))
+    return round(percentile(ms, 50), 4)
+
+
+def compare(results: list[dict], baseline: list[dict], tolerance: float, scale: float = 1.0) -> list[dict]:
+    """p50 of each result vs the baseline row with the same (target, size, fixture).
+
+    scale: host speed now / when the baseline was recorded (baseline p50s are multiplied by it).
+    """
+    base = {(b["target"], b["size"], b["fixture"]): b for b in baseline}
+    diff = []
+    for r in results:
+        b = base.get((r["target"], r["size"], r["fixture"]))
+        if b is None:
+            continue
+        expected = b["p50_ms"] * scale
+        ratio = r["p50_ms"] / expected if expected > 0 else 1.0
+        if ratio > 1.0 + tolerance and r["p50_ms"] - expected > NOISE_FLOOR_MS:
+            status = "REGRESSION"
+        elif ratio < 1.0 / (1.0 + tolerance) and expected - r["p50_ms"] > NOISE_FLOOR_MS:
+            status = "FASTER"
+        else:
+            status = "OK"
+        diff.append(
+            {
+                "target": r["target"],
+                "size": r["size"],
+                "fixture": r["fixture"],
+                "baseline_p50_ms": b["p50_ms"],
+                "expected_p50_ms": round(expected, 4),
+                "p50_ms": r["p50_ms"],
+                "ratio": round(ratio, 3),
+                "status": status,
+            }
+        )
+    return diff
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--targets", default=",".join(TARGETS), help="comma list of " + ",".join(TARGETS))
+    ap.add_argument("--sizes", default=",".join(str(s) for s in SIZES))
+    ap.add_argument("--fixture", choices=["synthetic", "recorded"], default="synthetic")
+    ap.add_argument("--fixture-dir", default=str(bot.KLINE_CACHE_DIR), help="KlineCache store for --fixture recorded")
+    ap.add_argument("--symbol", default=bot.SYMBOL)
+    ap.add_argument("--min-reps", type=int, default=5)
+    ap.add_argument("--min-time", type=float, default=0.5, help="seconds of calls per (target, size)")
+    ap.add_argument("--max-reps", type=int, default=1000)
+    ap.add_argument("--baseline", default=str(BASELINE_PATH))
+    ap.add_argument("--tolerance", type=float, default=0.25, help="allowed p50 slowdown vs baseline (0.25 = +25%%)")
+    ap.add_argument("--save-baseline", action="store_true", help="write the results to --baseline")
+    ap.add_argument("--absolute", action="store_true", help="compare raw p50s, without the host calibration")
+    indicators_vec.add_arguments(ap)
+    args = ap.parse_args()
+    indicators_vec.configure(args.indicators)
+
+    targets = [t.strip() for t in args.targets.split(",") if t.strip()]
+    unknown = [t for t in targets if t not in TARGETS]
+    if unknown:
+        raise SystemExit(f"unknown targets: {','.join(unknown)}")
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+
+    t0 = time.perf_counter()
+    calibration_ms = calibrate()
+    results, skipped = run_suite(
+        targets,
+        sizes,
+        fixture=args.fixture,
+        fixture_dir=args.fixture_dir,
+        symbol=args.symbol,
+        min_reps=args.min_reps,
+        min_time_s=args.min_time,
+        max_reps=args.max_reps,
+    )
+    env = {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "indicators": indicators_vec.backend_name(),
+        "calibration_ms": calibration_ms,
+    }
+
+    baseline_path = Path(args.baseline)
+    base_doc = json.loads(baseline_path.read_text(encoding="utf-8")) if baseline_path.exists() else None
+    base_env = (base_doc or {}).get("env", {})
+    # host speed now vs when the baseline was recorded
+    scale = 1.0
+    if base_env.get("calibration_ms") and not args.absolute:
+        scale = calibration_ms / base_env["calibration_ms"]
+    diff: list[dict] = []
+    if args.save_baseline:
+        # keep rows of targets/sizes/fixtures that were not re-run, rescaled to this host
+        keys = {(r["target"], r["size"], r["fixture"]) for r in results}
+        old = [b for b in (base_doc or {}).get("results", []) if (b["target"], b["size"], b["fixture"]) not in keys]
+        for b in old:
+            for k in ("p50_ms", "p95_ms", "p99_ms"):
+                b[k] = round(b[k] * scale, 4)
+        baseline_path.write_text(
+            json.dumps({"module": "bench", "version": "0.1", "env": env, "results": old + results}, indent=2) + "\n",
+            encoding="utf-8",
+        )
+    elif base_doc is not None:
+        if base_env.get("indicators", env["indicators"]) != env["indicators"]:
+            skipped.append(f"baseline: recorded with --indicators {base_env['indicators']}, this run {env['indicators']}")
+        diff = compare(results, base_doc["results"], args.tolerance, scale)
+    regressions = [d for d in diff if d["status"] == "REGRESSION"]
+    disagreements = [r for r in results if r.get("nan_mismatch") or r.get("max_abs_diff", 0.0) > AGREE_TOL]
+
+    out = {
+        "module": "bench",
+        "version": "0.1",
+        "fixture": args.fixture,
+        "results": results,
+        "diff": diff,
+        "regressions": len(regressions),
+        "disagreements": len(disagreements),
+        "skipped": skipped,
+        "meta": {"env": env, "host_scale": round(scale, 3), "elapsed_s": round(time.perf_counter() - t0, 3)},
+    }
+    print(json.dumps(out, ensure_ascii=False))
+    if regressions or disagreements:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,12 @@
 #!/usr/bin/env python3
 """15m BTCUSDT analysis bot (alert-only).
 
-Runs after each 15m candle close (cron should trigger at minute 01/16/31/46 UTC).
+Runs after each 15m candle close (cron should trigger at minute 01/16/31/46 UTC),
+or stays resident:
+- --daemon: wakes at each 15m close on the exchange clock (+ a small settle
+  delay) with warm connections, candles and indicator state
+- --stream: decides on the closed 15m kline event from the Binance WebSocket
+  (kline_stream.py)
 
 What it does:
 - Fetch snapshot (1d/4h/1h/15m)
@@ -10,26 +15,34 @@ What it does:
 - Decide OPEN/CLOSE based on:
   - OPEN SHORT when HTF is STRONG_DOWN and 15m is STRONG_DOWN
   - CLOSE when "bad force" on 15m: RSI in 40–60 balance zone OR bias flips against position
-- Log decisions to CSV (open/close only)
+- Log decisions to the event journal (open/close only; journal.py)
 - Output a single line:
     TELEGRAM: <message>
   or:
     NOOP
 
 Config/state:
-- trading/state_15m.json (created automatically)
-- trading/trades_15m.csv (created automatically)
+- trading/state.db (state_store.py: SQLite WAL, key "BTCUSDT:15m"; each cycle is
+  one atomic read-modify-write, so apply_15m_decision.py cannot race it)
+- trading/state_15m.json (JSON export of that state, rewritten atomically; imported
+  into state.db on first run)
+- trading/indicator_state_15m.json (streaming RSI/EMA/WMA state, created automatically)
+- trading/journal.db (journal.py "events"; same schema as the old trades_15m.csv,
+  which is imported on first write; `journal.py export events` writes it back)
+- --timings / --timings-log PATH: per-stage timings of each cycle (stage_timer.py)
+  printed to stderr as "TIMINGS: {...}" and appended to a rolling log
 
 NOTE: This logs *strategy signals* (not executed fills).
 """
 
 from __future__ import annotations
 
-import csv
+import argparse
 import json
 import math
 import os
-import subprocess
+import sys
+import time
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
@@ -37,15 +50,33 @@ from typing import Any, Dict, Optional, Tuple
 
 WORKSPACE = Path(__file__).resolve().parents[1]
 SKILL_DIR = WORKSPACE / "skills" / "trading-bot"
-SNAPSHOT = SKILL_DIR / "scripts" / "snapshot_mtf.py"
-MOD_TREND = SKILL_DIR / "scripts" / "module_trend_mtf.py"
+SCRIPTS_DIR = SKILL_DIR / "scripts"
+
+# snapshot/trend modules are called in-process (no python3 subprocess + JSON round trip)
+sys.path.insert(0, str(SCRIPTS_DIR))
+import kline_stream  # noqa: E402
+import module_trend_mtf  # noqa: E402
+import snapshot_mtf  # noqa: E402
+import stage_timer  # noqa: E402
+from candle_series import CandleSeries, column  # noqa: E402
+from exchange_clock import ExchangeClock  # noqa: E402
+from indicators_stream import load_chains, save_chains  # noqa: E402
+from journal import open_journal  # noqa: E402
+from kline_cache import KlineCache  # noqa: E402
+from pivots import find_pivots  # noqa: E402
+from state_store import open_store  # noqa: E402
 
 STATE_PATH = WORKSPACE / "trading" / "state_15m.json"
-CSV_PATH = WORKSPACE / "trading" / "trades_15m.csv"
+STATE_DB_PATH = WORKSPACE / "trading" / "state.db"
+CSV_PATH = WORKSPACE / "trading" / "trades_15m.csv"  # legacy log, imported into the journal
+JOURNAL_PATH = WORKSPACE / "trading" / "journal.db"
+KLINE_CACHE_DIR = WORKSPACE / "trading" / "cache" / "klines"
+INDICATOR_STATE_PATH = WORKSPACE / "trading" / "indicator_state_15m.json"
 
 SYMBOL = "BTCUSDT"
-TFS = "1d,4h,1h,15m"
-LIMIT = "210"
+STATE_KEY = f"{SYMBOL}:15m"
+TFS = ["1d", "4h", "1h", "15m"]
+LIMIT = 210
 
 BALANCE_USDT_DEFAULT = 1000.0
 RISK_PCT_DEFAULT = 1.0
@@ -53,98 +84,34 @@ RISK_PCT_DEFAULT = 1.0
 PIVOT_K = 2
 SL_BUFFER_USDT = 20.0  # small buffer above pivot high / below pivot low
 
+# --daemon: fetch this long after the exchange close, re-sync the clock this long before it
+DAEMON_SETTLE_S = 1.5
+DAEMON_WARMUP_S = 5
+DAEMON_RETRIES = 4
+
 
 def utc_now_iso() -> str:
     return datetime.now(timezone.utc).replace(microsecond=0).isoformat()
 
 
-def run(cmd: list[str], input_text: Optional[str] = None) -> str:
-    p = subprocess.run(
-        cmd,
-        input=input_text.encode("utf-8") if input_text is not None else None,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        check=True,
-    )
-    return p.stdout.decode("utf-8")
-
+def pivot_highs(candles: CandleSeries, k: int = 2):
+    highs = column(candles, "high")
+    return [(i, highs[i], candles[i]["ts_utc"]) for i in find_pivots(highs, k, k, "high")]
 
-def load_json(path: Path) -> dict:
-    return json.loads(path.read_text(encoding="utf-8"))
 
+def pivot_lows(candles: CandleSeries, k: int = 2):
+    lows = column(candles, "low")
+    return [(i, lows[i], candles[i]["ts_utc"]) for i in find_pivots(lows, k, k, "low")]
 
-def save_json(path: Path, obj: dict):
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(json.dumps(obj, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
 
-
-def ensure_csv(path: Path):
-    path.parent.mkdir(parents=True, exist_ok=True)
-    if path.exists():
-        return
-    headers = [
-        "event_id",
-        "event_ts_utc",
-        "symbol",
-        "action",
-        "side",
-        "tf_manage",
-        "entry",
-        "sl",
-        "size_btc",
-        "balance_usdt",
-        "risk_pct",
-        "risk_usdt",
-        "rsi15",
-        "ema9_rsi15",
-        "wma45_rsi15",
-        "bias15m",
-        "bias1h",
-        "bias4h",
-        "bias1d",
-        "snapshot_candle_ts_utc",
-        "notes",
-    ]
-    with path.open("w", newline="", encoding="utf-8") as f:
-        csv.writer(f).writerow(headers)
-
-
-def append_csv(path: Path, row: dict):
-    with path.open("a", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(f, fieldnames=row.keys())
-        w.writerow(row)
-
-
-def pivot_highs(candles: list[dict], k: int = 2):
-    piv = []
-    for i in range(k, len(candles) - k):
-        h = candles[i]["high"]
-        if all(h > candles[i - j]["high"] for j in range(1, k + 1)) and all(
-            h > candles[i + j]["high"] for j in range(1, k + 1)
-        ):
-            piv.append((i, h, candles[i]["ts_utc"]))
-    return piv
-
-
-def pivot_lows(candles: list[dict], k: int = 2):
-    piv = []
-    for i in range(k, len(candles) - k):
-        l = candles[i]["low"]
-        if all(l < candles[i - j]["low"] for j in range(1, k + 1)) and all(
-            l < candles[i + j]["low"] for j in range(1, k + 1)
-        ):
-            piv.append((i, l, candles[i]["ts_utc"]))
-    return piv
-
-
-def nearest_pivot_high_above(candles: list[dict], price: float) -> Optional[Tuple[int, float, str]]:
-    highs = [p for p in pivot_highs(candles, PIVOT_K) if p[1] > price]
+def nearest_pivot_high_above(candles: CandleSeries, price: float, k: int = PIVOT_K) -> Optional[Tuple[int, float, str]]:
+    highs = [p for p in pivot_highs(candles, k) if p[1] > price]
     highs.sort(key=lambda x: x[1])
     return highs[0] if highs else None
 
 
-def nearest_pivot_low_below(candles: list[dict], price: float) -> Optional[Tuple[int, float, str]]:
-    lows = [p for p in pivot_lows(candles, PIVOT_K) if p[1] < price]
+def nearest_pivot_low_below(candles: CandleSeries, price: float, k: int = PIVOT_K) -> Optional[Tuple[int, float, str]]:
+    lows = [p for p in pivot_lows(candles, k) if p[1] < price]
     lows.sort(key=lambda x: -x[1])
     return lows[0] if lows else None
 
@@ -153,79 +120,28 @@ def in_balance_zone(rsi: float) -> bool:
     return 40.0 <= rsi <= 60.0
 
 
-def main():
-    state = {
-        "last_candle_ts_utc": None,
-        "position": None,  # {side, entry, sl, size_btc, opened_ts_utc}
-        "balance_usdt": BALANCE_USDT_DEFAULT,
-        "risk_pct": RISK_PCT_DEFAULT,
-    }
-    if STATE_PATH.exists():
-        try:
-            state.update(load_json(STATE_PATH))
-        except Exception:
-            pass
-
-    # snapshot
-    snap_json = run(
-        ["python3", str(SNAPSHOT), "--symbol", SYMBOL, "--tfs", TFS, "--limit", LIMIT]
-    )
-    snap = json.loads(snap_json)
-
-    # trend labels
-    trend_json = run(["python3", str(MOD_TREND)], input_text=snap_json)
-    trend = json.loads(trend_json)
-
-    tf15 = snap["timeframes"]["15m"]
-    candles = tf15["candles"]
-    last_candle = candles[-1]
-    candle_ts = last_candle["ts_utc"]
-    close = float(last_candle["close"])
-
-    if state.get("last_candle_ts_utc") == candle_ts:
-        print("NOOP")
-        return
-
-    state["last_candle_ts_utc"] = candle_ts
-
-    labels = trend["labels"]
-    l1d, l4h, l1h, l15 = labels["1d"], labels["4h"], labels["1h"], labels["15m"]
-
-    # extract RSI values from snapshot indicators (15m)
-    ind15 = tf15["indicators"]
-    # snapshot_mtf.py schema (v0): indicators.rsi/ema_rsi/wma_rsi each has {length,value}
-    rsi15 = float(ind15["rsi"]["value"])
-    ema9 = float(ind15["ema_rsi"]["value"])
-    wma45 = float(ind15["wma_rsi"]["value"])
-
-    ensure_csv(CSV_PATH)
-
-    def log_event(action: str, side: str, entry: str, sl: str, size_btc: str, notes: str):
-        row = {
-            "event_id": f"{candle_ts}_{action}",
-            "event_ts_utc": utc_now_iso(),
-            "symbol": SYMBOL,
-            "action": action,
-            "side": side,
-            "tf_manage": "15m",
-            "entry": entry,
-            "sl": sl,
-            "size_btc": size_btc,
-            "balance_usdt": str(state.get("balance_usdt")),
-            "risk_pct": str(state.get("risk_pct")),
-            "risk_usdt": str(float(state.get("balance_usdt", BALANCE_USDT_DEFAULT)) * float(state.get("risk_pct", RISK_PCT_DEFAULT)) / 100.0),
-            "rsi15": f"{rsi15:.2f}",
-            "ema9_rsi15": f"{ema9:.2f}",
-            "wma45_rsi15": f"{wma45:.2f}",
-            "bias15m": l15["bias"],
-            "bias1h": l1h["bias"],
-            "bias4h": l4h["bias"],
-            "bias1d": l1d["bias"],
-            "snapshot_candle_ts_utc": candle_ts,
-            "notes": notes,
-        }
-        append_csv(CSV_PATH, row)
-
+def decide(
+    state: dict,
+    candles: CandleSeries,
+    labels: dict,
+    rsi15: float,
+    opened_ts_utc: str,
+    close_rule: str = "flip",
+    sl_buffer: float = SL_BUFFER_USDT,
+    pivot_k: int = PIVOT_K,
+) -> dict:
+    """One 15m decision step (pure; shared by main(), backtest_15m.py and walkforward_15m.py).
+
+    `candles` is the 15m window (last = current candle), `labels` the per-TF
+    output of module_trend_mtf. Updates state["position"] on OPEN/CLOSE and
+    returns {"action": OPEN|CLOSE|WARNING|NOOP, ...}.
+
+    close_rule: "flip" (live rule since 2026-01-31) or "balance" (the rule
+    before it: RSI 40-60 alone also closes). sl_buffer / pivot_k default to
+    the live constants.
+    """
+    l1d, l4h, l15 = labels["1d"], labels["4h"], labels["15m"]
+    close = float(candles[-1]["close"])
     pos = state.get("position")
 
     # CLOSE logic (bad force)
@@ -254,35 +170,18 @@ def main():
             bad_force = True
             reason.append(f"15m bias flipped to {l15['bias']}")
 
+        # pre-2026-01-31 rule (walk-forward comparisons): balance zone alone closes
+        if close_rule == "balance" and rsi_in_balance:
+            bad_force = True
+
         # Only close on actual bad force (bias flip), not just RSI balance zone
         if bad_force:
-            notes = "; ".join(reason)
-            log_event(
-                action="CLOSE",
-                side=side,
-                entry=str(pos.get("entry")),
-                sl=str(pos.get("sl")),
-                size_btc=str(pos.get("size_btc")),
-                notes=notes,
-            )
             state["position"] = None
-            save_json(STATE_PATH, state)
-            print(
-                "TELEGRAM: [BTCUSDT 15m] CLOSE {side} | Price={p:.2f} | RSI={r:.2f} | Reason: {notes} | CandleUTC={cts}".format(
-                    side=side, p=close, r=rsi15, notes=notes, cts=candle_ts
-                )
-            )
-            return
+            return {"action": "CLOSE", "side": side, "price": close, "position": pos, "notes": "; ".join(reason)}
 
         # Warning only (RSI balance zone but no bias flip) - HOLD but emit warning
         if warning_only and not bad_force:
-            save_json(STATE_PATH, state)
-            print(
-                "TELEGRAM: [BTCUSDT 15m] ⚠️ WARNING {side} | Price={p:.2f} | RSI={r:.2f} | {warn} | HOLD position | CandleUTC={cts}".format(
-                    side=side, p=close, r=rsi15, warn="; ".join(reason), cts=candle_ts
-                )
-            )
-            return
+            return {"action": "WARNING", "side": side, "price": close, "notes": "; ".join(reason)}
 
     # OPEN logic (only when flat)
     if pos is None:
@@ -291,53 +190,273 @@ def main():
 
         if htf_strong_down and ltf_strong_down:
             # pick SL from nearest pivot high above entry
-            piv_hi = nearest_pivot_high_above(candles, close)
+            piv_hi = nearest_pivot_high_above(candles, close, pivot_k)
             if not piv_hi:
-                save_json(STATE_PATH, state)
-                print("NOOP")
-                return
-            sl = float(piv_hi[1]) + SL_BUFFER_USDT
+                return {"action": "NOOP"}
+            sl = float(piv_hi[1]) + sl_buffer
             entry = close
             stop_dist = sl - entry
             if stop_dist <= 0:
-                save_json(STATE_PATH, state)
-                print("NOOP")
-                return
+                return {"action": "NOOP"}
             risk_usdt = float(state.get("balance_usdt", BALANCE_USDT_DEFAULT)) * float(state.get("risk_pct", RISK_PCT_DEFAULT)) / 100.0
             size_btc = risk_usdt / stop_dist
             # guardrails
             if size_btc <= 0 or not math.isfinite(size_btc):
-                save_json(STATE_PATH, state)
-                print("NOOP")
-                return
+                return {"action": "NOOP"}
 
             state["position"] = {
                 "side": "SHORT",
                 "entry": entry,
                 "sl": sl,
                 "size_btc": size_btc,
-                "opened_ts_utc": utc_now_iso(),
+                "opened_ts_utc": opened_ts_utc,
                 "pivot_high_ts_utc": piv_hi[2],
                 "pivot_high": piv_hi[1],
             }
-            log_event(
-                action="OPEN",
-                side="SHORT",
-                entry=f"{entry:.2f}",
-                sl=f"{sl:.2f}",
-                size_btc=f"{size_btc:.6f}",
-                notes=f"HTF STRONG_DOWN + 15m STRONG_DOWN; SL from nearest 15m pivot high {piv_hi[1]:.2f} (+{SL_BUFFER_USDT:.0f}).",
+            return {
+                "action": "OPEN",
+                "side": "SHORT",
+                "price": close,
+                "entry": entry,
+                "sl": sl,
+                "size_btc": size_btc,
+                "notes": f"HTF STRONG_DOWN + 15m STRONG_DOWN; SL from nearest 15m pivot high {piv_hi[1]:.2f} (+{sl_buffer:.0f}).",
+            }
+
+    return {"action": "NOOP"}
+
+
+def state_defaults() -> dict:
+    return {
+        "last_candle_ts_utc": None,
+        "position": None,  # {side, entry, sl, size_btc, opened_ts_utc}
+        "balance_usdt": BALANCE_USDT_DEFAULT,
+        "risk_pct": RISK_PCT_DEFAULT,
+    }
+
+
+def load_state() -> dict:
+    """Read-only copy of the bot state."""
+    return open_store(STATE_DB_PATH).get(STATE_KEY, state_defaults(), legacy_json=STATE_PATH)
+
+
+def state_transaction():
+    """Atomic read-modify-write of the bot state (committed + exported on exit)."""
+    return open_store(STATE_DB_PATH).transaction(STATE_KEY, state_defaults(), legacy_json=STATE_PATH, export=STATE_PATH)
+
+
+def report_timings() -> None:
+    """Per-stage timings of the cycle to stderr (stdout stays the TELEGRAM/NOOP line)."""
+    timings = stage_timer.end("cron_15m_bot")
+    if timings is not None:
+        print("TIMINGS: " + json.dumps(timings, ensure_ascii=False), file=sys.stderr, flush=True)
+
+
+def run_cycle(snap: dict) -> str:
+    """Decide on one snapshot, persist state/CSV; returns the output line."""
+    with state_transaction() as state:
+        return cycle(state, snap)
+
+
+def cycle(state: dict, snap: dict) -> str:
+    """run_cycle() body: updates `state` in place (the caller commits it)."""
+    # trend labels
+    with stage_timer.stage("module.trend"):
+        trend = module_trend_mtf.analyze(snap)
+
+    tf15 = snap["timeframes"]["15m"]
+    candles = tf15["candles"]
+    last_candle = candles[-1]
+    candle_ts = last_candle["ts_utc"]
+    close = float(last_candle["close"])
+
+    if state.get("last_candle_ts_utc") == candle_ts:
+        return "NOOP"
+
+    state["last_candle_ts_utc"] = candle_ts
+
+    labels = trend["labels"]
+    l1d, l4h, l1h, l15 = labels["1d"], labels["4h"], labels["1h"], labels["15m"]
+
+    # extract RSI values from snapshot indicators (15m)
+    ind15 = tf15["indicators"]
+    # snapshot_mtf.py schema (v0): indicators.rsi/ema_rsi/wma_rsi each has {length,value}
+    rsi15 = float(ind15["rsi"]["value"])
+    ema9 = float(ind15["ema_rsi"]["value"])
+    wma45 = float(ind15["wma_rsi"]["value"])
+
+    def log_event(action: str, side: str, entry: str, sl: str, size_btc: str, notes: str, exit_price: str = ""):
+        row = {
+            "event_id": f"{candle_ts}_{action}",
+            "event_ts_utc": utc_now_iso(),
+            "symbol": SYMBOL,
+            "action": action,
+            "side": side,
+            "tf_manage": "15m",
+            "entry": entry,
+            "sl": sl,
+            "size_btc": size_btc,
+            "balance_usdt": str(state.get("balance_usdt")),
+            "risk_pct": str(state.get("risk_pct")),
+            "risk_usdt": str(float(state.get("balance_usdt", BALANCE_USDT_DEFAULT)) * float(state.get("risk_pct", RISK_PCT_DEFAULT)) / 100.0),
+            "rsi15": f"{rsi15:.2f}",
+            "ema9_rsi15": f"{ema9:.2f}",
+            "wma45_rsi15": f"{wma45:.2f}",
+            "bias15m": l15["bias"],
+            "bias1h": l1h["bias"],
+            "bias4h": l4h["bias"],
+            "bias1d": l1d["bias"],
+            "snapshot_candle_ts_utc": candle_ts,
+            "notes": notes,
+            "exit": exit_price,
+        }
+        # idempotent: a re-run on the same candle keeps the first row (same event_id)
+        with stage_timer.stage("journal.append"):
+            open_journal(JOURNAL_PATH).record("events", row, legacy_csv=CSV_PATH)
+
+    with stage_timer.stage("decide"):
+        d = decide(state, candles, labels, rsi15, utc_now_iso())
+    action = d["action"]
+
+    if action == "CLOSE":
+        pos = d["position"]
+        log_event(
+            action="CLOSE",
+            side=d["side"],
+            entry=str(pos.get("entry")),
+            sl=str(pos.get("sl")),
+            size_btc=str(pos.get("size_btc")),
+            notes=d["notes"],
+            exit_price=f"{close:.2f}",
+        )
+        return (
+            "TELEGRAM: [BTCUSDT 15m] CLOSE {side} | Price={p:.2f} | RSI={r:.2f} | Reason: {notes} | CandleUTC={cts}".format(
+                side=d["side"], p=close, r=rsi15, notes=d["notes"], cts=candle_ts
+            )
+        )
+
+    if action == "WARNING":
+        return (
+            "TELEGRAM: [BTCUSDT 15m] ⚠️ WARNING {side} | Price={p:.2f} | RSI={r:.2f} | {warn} | HOLD position | CandleUTC={cts}".format(
+                side=d["side"], p=close, r=rsi15, warn=d["notes"], cts=candle_ts
             )
-            save_json(STATE_PATH, state)
-            print(
-                "TELEGRAM: [BTCUSDT 15m] OPEN SHORT | Entry={e:.2f} SL={sl:.2f} Size={sz:.6f}BTC | RSI={r:.2f} | CandleUTC={cts}".format(
-                    e=entry, sl=sl, sz=size_btc, r=rsi15, cts=candle_ts
-                )
+        )
+
+    if action == "OPEN":
+        log_event(
+            action="OPEN",
+            side=d["side"],
+            entry=f"{d['entry']:.2f}",
+            sl=f"{d['sl']:.2f}",
+            size_btc=f"{d['size_btc']:.6f}",
+            notes=d["notes"],
+        )
+        return (
+            "TELEGRAM: [BTCUSDT 15m] OPEN SHORT | Entry={e:.2f} SL={sl:.2f} Size={sz:.6f}BTC | RSI={r:.2f} | CandleUTC={cts}".format(
+                e=d["entry"], sl=d["sl"], sz=d["size_btc"], r=rsi15, cts=candle_ts
             )
+        )
+
+    return "NOOP"
+
+
+def run_stream(url: str) -> None:
+    """Resident mode: decide within milliseconds of each closed 15m kline event."""
+    chains = load_chains(INDICATOR_STATE_PATH)
+
+    def on_close(tf: str, stream: kline_stream.KlineStream) -> None:
+        if tf != "15m":
             return
+        stage_timer.begin()
+        now_ms = int(stream.buffers["15m"].last_closed()[6]) + 1
+        snap = snapshot_mtf.snapshot_from_klines(SYMBOL, {t: stream.window(t, now_ms) for t in TFS}, chains)
+        with stage_timer.stage("indicator_state.save"):
+            save_chains(INDICATOR_STATE_PATH, chains)
+        print(run_cycle(snap), flush=True)
+        report_timings()
+
+    cache = KlineCache(KLINE_CACHE_DIR, snapshot_mtf.fetch_klines)
+    stream = kline_stream.KlineStream(SYMBOL, TFS, LIMIT, on_close, url=url, cache=cache)
+    try:
+        stream.run()
+    except KeyboardInterrupt:
+        stream.stop()
+
+
+def run_daemon(settle_s: float = DAEMON_SETTLE_S) -> None:
+    """Resident mode: wake at each exchange 15m close (+settle_s) and run one cycle.
+
+    Connections (http_client pool), closed candles (in-memory KlineCache) and
+    indicator chains stay warm between cycles, so each cycle only fetches the
+    1-2 newest candles per TF. A few seconds before each close the exchange
+    clock offset is re-measured, which also re-opens the keep-alive connection.
+    """
+    clock = ExchangeClock(samples=3)
+    cache = KlineCache(KLINE_CACHE_DIR, snapshot_mtf.fetch_klines, memory=True)
+    chains = load_chains(INDICATOR_STATE_PATH)
+    clock.sync()
+    try:
+        while True:
+            boundary = clock.next_boundary_ms("15m")
+            if not clock.sleep_until(boundary - DAEMON_WARMUP_S * 1000):
+                return
+            clock.sync()
+            if not clock.sleep_until(boundary + int(settle_s * 1000)):
+                return
+
+            want_ts = snapshot_mtf.iso_utc(boundary)
+            stage_timer.begin()
+            try:
+                for attempt in range(DAEMON_RETRIES):
+                    snap = snapshot_mtf.build_snapshot(
+                        SYMBOL,
+                        TFS,
+                        LIMIT,
+                        cache=cache,
+                        chains=chains,
+                        indicator_state=INDICATOR_STATE_PATH,
+                    )
+                    c15 = (snap["timeframes"].get("15m") or {}).get("candles") or []
+                    # the exchange lists the new candle a moment after the close
+                    if not snap.get("error") and c15 and c15[-1]["ts_utc"] >= want_ts:
+                        break
+                    time.sleep(1.0 * (attempt + 1))
+                print(run_cycle(snap), flush=True)
+            except Exception as e:
+                print(f"ERROR: {type(e).__name__}: {e}", file=sys.stderr, flush=True)
+            report_timings()
+    except KeyboardInterrupt:
+        pass
+
 
-    save_json(STATE_PATH, state)
-    print("NOOP")
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--stream", action="store_true", help="stay resident on the kline WebSocket instead of one REST poll")
+    ap.add_argument("--stream-url", default=kline_stream.STREAM_URL)
+    ap.add_argument("--daemon", action="store_true", help="stay resident and wake at each exchange 15m close")
+    ap.add_argument("--settle-s", type=float, default=DAEMON_SETTLE_S, help="delay after the close (daemon)")
+    stage_timer.add_arguments(ap)
+    args = ap.parse_args()
+    stage_timer.configure(args.timings, args.timings_log)
+
+    if args.stream:
+        run_stream(args.stream_url)
+        return
+    if args.daemon:
+        run_daemon(args.settle_s)
+        return
+
+    # snapshot
+    stage_timer.begin()
+    snap = snapshot_mtf.build_snapshot(
+        SYMBOL,
+        TFS,
+        LIMIT,
+        cache_dir=KLINE_CACHE_DIR,
+        indicator_state=INDICATOR_STATE_PATH,
+    )
+    print(run_cycle(snap))
+    report_timings()
 
 
 if __name__ == "__main__":
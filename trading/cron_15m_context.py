@@ -5,22 +5,35 @@ Only fetches raw numbers. Analysis is done by LLM.
 
 Output: JSON with price, RSI/EMA/WMA per TF, recent candles, state.
 No trend labels, no S/R clustering, no SL/TP logic — that's LLM's job.
+
+--stream stays resident and prints one context line per closed 15m kline event.
 """
 
 from __future__ import annotations
 
+import argparse
 import json
-import subprocess
+import sys
 from datetime import datetime, timezone
 from pathlib import Path
 
 WORKSPACE = Path(__file__).resolve().parents[1]
-SNAPSHOT = WORKSPACE / "skills" / "trading-bot" / "scripts" / "snapshot_mtf.py"
+SCRIPTS_DIR = WORKSPACE / "skills" / "trading-bot" / "scripts"
 STATE_PATH = WORKSPACE / "trading" / "state_15m.json"
+STATE_DB_PATH = WORKSPACE / "trading" / "state.db"
+KLINE_CACHE_DIR = WORKSPACE / "trading" / "cache" / "klines"
+
+sys.path.insert(0, str(SCRIPTS_DIR))
+import kline_stream  # noqa: E402
+import snapshot_mtf  # noqa: E402
+import stage_timer  # noqa: E402
+from candle_series import CandleSeries, column, iso_utc  # noqa: E402
+from kline_cache import KlineCache  # noqa: E402
+from state_store import open_store  # noqa: E402
 
 SYMBOL = "BTCUSDT"
-TFS = "1d,4h,1h,30m,15m,5m"
-LIMIT = "100"  # enough for RSI+EMA+WMA warmup
+TFS = ["1d", "4h", "1h", "30m", "15m", "5m"]
+LIMIT = 100  # enough for RSI+EMA+WMA warmup
 
 # How many recent candles to include per TF
 CANDLE_LIMITS = {"1d": 30, "4h": 50, "1h": 72, "30m": 96, "15m": 96, "5m": 60}
@@ -31,22 +44,12 @@ def utc_now_iso() -> str:
 
 
 def load_state() -> dict:
-    if not STATE_PATH.exists():
-        return {"position": None, "balance_usdt": 1000.0, "risk_pct": 1.0}
-    try:
-        return json.loads(STATE_PATH.read_text(encoding="utf-8"))
-    except Exception:
-        return {"position": None, "balance_usdt": 1000.0, "risk_pct": 1.0}
-
+    # read-only; never blocks on a writer (state_store.py, WAL)
+    defaults = {"position": None, "balance_usdt": 1000.0, "risk_pct": 1.0}
+    return open_store(STATE_DB_PATH).get(f"{SYMBOL}:15m", defaults, legacy_json=STATE_PATH)
 
-def main():
-    # 1. Fetch snapshot
-    p = subprocess.run(
-        ["python3", str(SNAPSHOT), "--symbol", SYMBOL, "--tfs", TFS, "--limit", LIMIT],
-        capture_output=True, text=True, check=True
-    )
-    snap = json.loads(p.stdout)
 
+def build_context(snap: dict) -> dict:
     # 2. Extract per-TF data (just numbers, no classification)
     timeframes = {}
     for tf, block in snap.get("timeframes", {}).items():
@@ -57,17 +60,19 @@ def main():
         limit = CANDLE_LIMITS.get(tf, 50)
         recent = candles[-limit:] if len(candles) > limit else candles
 
-        # Simplify candle format
+        # Simplify candle format (column-wise over the CandleSeries)
+        ts = column(recent, "ts_ms") if isinstance(recent, CandleSeries) else None
+        o, h, lo, c, v = (column(recent, name) for name in ("open", "high", "low", "close", "volume"))
         simple_candles = [
             {
-                "ts": c["ts_utc"],
-                "o": round(c["open"], 2),
-                "h": round(c["high"], 2),
-                "l": round(c["low"], 2),
-                "c": round(c["close"], 2),
-                "v": round(c["volume"], 2),
+                "ts": iso_utc(ts[i]) if ts is not None else recent[i]["ts_utc"],
+                "o": round(o[i], 2),
+                "h": round(h[i], 2),
+                "l": round(lo[i], 2),
+                "c": round(c[i], 2),
+                "v": round(v[i], 2),
             }
-            for c in recent
+            for i in range(len(recent))
         ]
 
         timeframes[tf] = {
@@ -87,7 +92,8 @@ def main():
     candle_ts = candles15[-1]["ts_utc"] if candles15 else None
 
     # 4. State
-    state = load_state()
+    with stage_timer.stage("state.load"):
+        state = load_state()
 
     # 5. Output
     out = {
@@ -103,7 +109,51 @@ def main():
         },
     }
 
-    print(json.dumps(out, ensure_ascii=False))
+    return out
+
+
+def with_timings(out: dict) -> dict:
+    timings = stage_timer.end("cron_15m_context")
+    if timings is not None:
+        out["meta"] = {"timings": timings}
+    return out
+
+
+def run_stream(url: str) -> None:
+    """Print one context line per closed 15m kline event (kline_stream.py)."""
+
+    def on_close(tf: str, stream: kline_stream.KlineStream) -> None:
+        if tf != "15m":
+            return
+        now_ms = int(stream.buffers["15m"].last_closed()[6]) + 1
+        stage_timer.begin()
+        snap = snapshot_mtf.snapshot_from_klines(SYMBOL, {t: stream.window(t, now_ms) for t in TFS})
+        print(json.dumps(with_timings(build_context(snap)), ensure_ascii=False), flush=True)
+
+    cache = KlineCache(KLINE_CACHE_DIR, snapshot_mtf.fetch_klines)
+    stream = kline_stream.KlineStream(SYMBOL, TFS, LIMIT, on_close, url=url, cache=cache)
+    try:
+        stream.run()
+    except KeyboardInterrupt:
+        stream.stop()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--stream", action="store_true", help="stay resident on the kline WebSocket")
+    ap.add_argument("--stream-url", default=kline_stream.STREAM_URL)
+    stage_timer.add_arguments(ap)
+    args = ap.parse_args()
+    stage_timer.configure(args.timings, args.timings_log)
+
+    if args.stream:
+        run_stream(args.stream_url)
+        return
+
+    # 1. Fetch snapshot (in-process)
+    stage_timer.begin()
+    snap = snapshot_mtf.build_snapshot(SYMBOL, TFS, LIMIT, cache_dir=KLINE_CACHE_DIR)
+    print(json.dumps(with_timings(build_context(snap)), ensure_ascii=False))
 
 
 if __name__ == "__main__":
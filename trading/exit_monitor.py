@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+"""Intrabar exit monitor for the 15m position (SL, bad force, adaptive TP).
+
+cron_15m_bot.py stores an SL but only looks at the position once per 15m
+close, and only for a bias flip. This resident process watches a live feed
+and closes the position the moment an exit condition triggers:
+
+- SL: checked on every tick against the stored sl (1m kline update: the
+  candle's high / low; --feed trade: each aggTrade price). A handful of float
+  compares per tick; the fill is the SL, or the current price when it is
+  already beyond it.
+- bad force: the bot's close rule (15m bias flipped against the position),
+  evaluated on the closed 15m kline event instead of a minute later; with
+  --intrabar-force also on every 1m close, peeking the live 15m candle.
+- adaptive TP (SKILL.md: no hard TP, exit when the force fades): armed once
+  price reaches position["tp_ref"] (apply_15m_decision.py --tp-ref) or the
+  open profit reaches --tp-arm-r R; once armed, closes when the 15m label is
+  no longer STRONG in the trade direction or RSI15 leaves the extreme zone
+  (< 20 / > 80) it was in.
+
+15m RSI/EMA/WMA come from the bot's own RsiMaChain: at every 15m close the
+chains cron_15m_bot persists (indicator_state_15m.json) are re-read and the
+15m one is synced on the same window the bot's stream mode decides on
+(KlineStream.window), so the monitor and cron_15m_bot.decide() judge a flip
+on identical values. Between closes the live candle is only peeked; no
+evaluation recomputes a window. The 1h/4h/1d biases of a CLOSE row are the
+persisted HTF chains peeked at the fill (as of the bot's last cycle), or
+NOT_EVALUATED without them.
+
+A close is one state transaction on the same key as the bot and
+apply_15m_decision.py (the position is cleared only if it is still the one
+being watched; the bot may have closed it first), a CLOSE event with the
+fill in `exit` in the journal (id `<candle>_CLOSE_exit_monitor`, the bot's
+`<candle>_CLOSE` plus the source), a TELEGRAM line on stdout and an
+"EXIT: {...}" line on stderr with the trigger -> journaled latency. The
+position is re-read from state.db every --poll-s, so a new OPEN is watched
+from then on.
+
+Binance pushes 1m kline updates every ~2 s (the high / low still catch a
+touch in between); --feed trade follows every trade.
+
+Example:
+  python3 trading/exit_monitor.py
+  python3 trading/exit_monitor.py --feed trade --intrabar-force --tp-arm-r 3
+Local stand-in:
+  python3 skills/trading-bot/scripts/mock_kline_ws.py --port 9443 --tfs 1m,15m --speed 60 --trades
+  python3 trading/exit_monitor.py --stream-url ws://127.0.0.1:9443 --feed trade
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Optional
+
+import apply_15m_decision as apply
+import cron_15m_bot as bot
+
+sys.path.insert(0, str(bot.SCRIPTS_DIR))
+import kline_stream  # noqa: E402
+import module_trend_mtf  # noqa: E402
+import snapshot_mtf  # noqa: E402
+from indicators_stream import RsiMaChain, chain_key, load_chains  # noqa: E402
+from journal import open_journal  # noqa: E402
+from kline_cache import KlineCache, interval_ms  # noqa: E402
+
+TFS = ["1m", "15m"]
+HTFS = ["1h", "4h", "1d"]
+EVENT_SOURCE = "exit_monitor"
+# journal bias column of a TF the monitor has no chain for
+NOT_EVALUATED = "NOT_EVALUATED"
+STEP_15M = interval_ms("15m")
+TP_ARM_R = 2.0
+POLL_S = 1.0
+RSI_EXTREME_LO = 20.0
+RSI_EXTREME_HI = 80.0
+
+
+def position_key(pos: dict) -> tuple:
+    return (pos.get("opened_ts_utc"), pos.get("side"), pos.get("entry"))
+
+
+class Watch:
+    """The open position reduced to what a tick compares against."""
+
+    def __init__(self, pos: dict, tp_arm_r: float = TP_ARM_R):
+        self.pos = pos
+        self.key = position_key(pos)
+        self.short = pos["side"] == "SHORT"
+        self.entry = float(pos["entry"])
+        self.sl = None if pos.get("sl") is None else float(pos["sl"])
+        try:
+            self.opened_ms = int(datetime.fromisoformat(pos["opened_ts_utc"]).timestamp() * 1000)
+        except (KeyError, TypeError, ValueError):
+            self.opened_ms = 0
+        # price that arms the adaptive TP: the stored reference, else tp_arm_r R of profit
+        if pos.get("tp_ref") is not None:
+            self.arm_at: Optional[float] = float(pos["tp_ref"])
+        elif tp_arm_r > 0 and self.sl is not None and self.sl != self.entry:
+            risk = abs(self.sl - self.entry)
+            self.arm_at = self.entry - tp_arm_r * risk if self.short else self.entry + tp_arm_r * risk
+        else:
+            self.arm_at = None
+        self.armed = False
+        self.prev_rsi: Optional[float] = None  # RSI15 at the previous 15m close
+
+
+class ExitMonitor:
+    """Exit rules over ticks / candle events; `close(watch, price, reason, ts_ms)` acts on a trigger.
+
+    Feed-agnostic so tests can drive it directly; run() wires it to KlineStream.
+    """
+
+    def __init__(
+        self,
+        symbol: str,
+        close: Callable[[Watch, float, str, int], Optional[dict]],
+        load_position: Callable[[], Optional[dict]],
+        tp_arm_r: float = TP_ARM_R,
+        intrabar_force: bool = False,
+        poll_s: float = POLL_S,
+        chains_path: Optional[Path | str] = None,
+    ):
+        self.symbol = symbol
+        self.close = close
+        self.load_position = load_position
+        self.tp_arm_r = tp_arm_r
+        self.intrabar_force = intrabar_force
+        self.poll_s = poll_s
+        self.watch: Optional[Watch] = None
+        self.next_poll = 0.0
+        self.chains_path = chains_path  # cron_15m_bot's persisted chains (None: seed from the window)
+        self.chains: dict[str, RsiMaChain] = {}
+        self.chain = RsiMaChain()
+        self.chain_ts: Optional[str] = None  # ts_utc of the last 15m candle pushed
+        self.exits: list[dict] = []
+
+    # --- position ---
+
+    def refresh(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now < self.next_poll:
+            return
+        self.next_poll = now + self.poll_s
+        pos = self.load_position()
+        if pos is None or not pos.get("side") or pos.get("entry") is None:
+            self.watch = None
+        elif self.watch is None or self.watch.key != position_key(pos):
+            self.watch = Watch(pos, self.tp_arm_r)
+
+    def _exit(self, price: float, reason: str, ts_ms: int) -> None:
+        w = self.watch
+        self.watch = None
+        out = self.close(w, price, reason, ts_ms)
+        if out is not None:
+            self.exits.append(out)
+        # re-read on the next tick: another writer may hold a new position
+        self.next_poll = 0.0
+
+    # --- per tick: O(1) ---
+
+    def on_price(self, high: float, low: float, price: float, ts_ms: int) -> None:
+        self.refresh()
+        w = self.watch
+        if w is None:
+            return
+        if w.sl is not None and (high >= w.sl if w.short else low <= w.sl):
+            self._exit(max(price, w.sl) if w.short else min(price, w.sl), f"SL hit (sl={w.sl:.2f})", ts_ms)
+            return
+        if not w.armed and w.arm_at is not None and (low <= w.arm_at if w.short else high >= w.arm_at):
+            w.armed = True
+
+    def on_kline(self, tf: str, row: list, closed: bool) -> None:
+        """KlineStream on_update hook (every kline event)."""
+        if tf != "1m":
+            return
+        price = float(row[4])
+        ts_ms = int(row[6]) if closed else int(time.time() * 1000)
+        self.refresh()
+        w = self.watch
+        if w is not None and int(row[0]) < w.opened_ms:
+            # candle started before the position: its high / low may predate the entry
+            self.on_price(price, price, price, ts_ms)
+        else:
+            self.on_price(float(row[2]), float(row[3]), price, ts_ms)
+        if closed and self.intrabar_force and self.watch is not None:
+            rsi, ema, wma = self.chain.peek(price)
+            self.check_force(rsi, ema, wma, price, int(row[6]), at_close=False)
+
+    def on_trade(self, price: float, ts_ms: int) -> None:
+        """KlineStream on_trade hook (aggTrade)."""
+        self.on_price(price, price, price, ts_ms)
+
+    # --- 15m close: bot rule + adaptive TP ---
+
+    def sync_chain(self, window: list[list]) -> None:
+        """Re-read the bot's chains and sync the 15m one on `window` (REST rows, last = live candle).
+
+        The same RsiMaChain.sync the bot runs on the same window, so both see the
+        same RSI/EMA/WMA (a chain behind the window is reseeded from it, as in the bot).
+        """
+        if len(window) < 2:
+            return
+        self.chains = load_chains(self.chains_path) if self.chains_path is not None else {}
+        self.chain = self.chains.get(chain_key(self.symbol, "15m")) or RsiMaChain()
+        self.chain.sync(snapshot_mtf.klines_to_candles(window))
+        self.chain_ts = self.chain.last_ts
+
+    def biases(self, price: float) -> dict[str, str]:
+        """15m / 1h / 4h / 1d bias at `price` for the journal row (NOT_EVALUATED without a warm chain)."""
+        out = {}
+        for tf in ["15m"] + HTFS:
+            if tf == "15m":
+                chain = self.chain if self.chain_ts is not None else None
+            else:
+                chain = self.chains.get(chain_key(self.symbol, tf))
+            ind = chain.peek(price) if chain is not None else (None,)
+            out[tf] = NOT_EVALUATED if None in ind else module_trend_mtf.classify(*ind)["bias"]
+        return out
+
+    def on_15m_close(self, close: float, ts_ms: int) -> None:
+        self.refresh(force=True)
+        if self.watch is None:
+            return
+        # what the bot sees at the close: the new candle, flat at the close price
+        rsi, ema, wma = self.chain.peek(close)
+        self.check_force(rsi, ema, wma, close, ts_ms, at_close=True)
+
+    def check_force(self, rsi, ema, wma, price: float, ts_ms: int, at_close: bool) -> None:
+        w = self.watch
+        if w is None or rsi is None or ema is None or wma is None:
+            return
+        l15 = module_trend_mtf.classify(rsi, ema, wma)
+        reason = None
+        # same rule as cron_15m_bot.decide (close_rule "flip")
+        if w.short and l15["bias"].startswith("BUY") or not w.short and l15["bias"].startswith("SELL"):
+            reason = f"bad force: 15m bias flipped to {l15['bias']}"
+        elif w.armed:
+            if l15["B"] != ("STRONG_DOWN" if w.short else "STRONG_UP"):
+                reason = f"adaptive TP: 15m force faded ({l15['B']}, RSI15={rsi:.2f})"
+            elif w.prev_rsi is not None and (
+                (w.short and w.prev_rsi < RSI_EXTREME_LO <= rsi) or (not w.short and w.prev_rsi > RSI_EXTREME_HI >= rsi)
+            ):
+                reason = f"adaptive TP: RSI15 left the extreme zone ({w.prev_rsi:.2f} -> {rsi:.2f})"
+        if at_close:
+            w.prev_rsi = rsi
+        if reason is not None:
+            self._exit(price, reason, ts_ms)
+
+
+def close_position(
+    symbol: str,
+    w: Watch,
+    price: float,
+    reason: str,
+    ts_ms: int,
+    ind: Optional[tuple] = None,
+    biases: Optional[dict] = None,
+) -> Optional[dict]:
+    """Clear the watched position (if still open) and journal the CLOSE; None if someone else closed it.
+
+    ind: (RSI15, EMA9, WMA45) at the trigger, when the 15m chain is warm.
+    biases: {tf: bias} for 15m / 1h / 4h / 1d (ExitMonitor.biases); missing TFs are NOT_EVALUATED.
+    """
+    biases = biases or {}
+    with apply.state_transaction(symbol) as state:
+        pos = state.get("position")
+        if pos is None or position_key(pos) != w.key:
+            return None
+        state["position"] = None
+        bal = float(state.get("balance_usdt", bot.BALANCE_USDT_DEFAULT))
+        risk_pct = float(state.get("risk_pct", bot.RISK_PCT_DEFAULT))
+        candle_ts = snapshot_mtf.iso_utc(ts_ms // STEP_15M * STEP_15M)
+        rsi15, ema9, wma45 = ("", "", "") if ind is None else (f"{v:.2f}" for v in ind)
+        row = {
+            # the bot's id for a CLOSE on this candle, plus the source
+            "event_id": f"{candle_ts}_CLOSE_{EVENT_SOURCE}",
+            "event_ts_utc": apply.utc_now_iso(),
+            "symbol": symbol,
+            "action": "CLOSE",
+            "side": pos["side"],
+            "tf_manage": pos.get("tf") or "15m",
+            "entry": str(pos.get("entry")),
+            "sl": str(pos.get("sl")),
+            "size_btc": str(pos.get("size_btc")),
+            "balance_usdt": f"{bal:g}",
+            "risk_pct": f"{risk_pct:g}",
+            "risk_usdt": f"{bal * risk_pct / 100.0:g}",
+            "rsi15": rsi15,
+            "ema9_rsi15": ema9,
+            "wma45_rsi15": wma45,
+            "bias15m": biases.get("15m", NOT_EVALUATED),
+            "bias1h": biases.get("1h", NOT_EVALUATED),
+            "bias4h": biases.get("4h", NOT_EVALUATED),
+            "bias1d": biases.get("1d", NOT_EVALUATED),
+            "snapshot_candle_ts_utc": candle_ts,
+            "notes": f"CLOSE {pos['side']} (exit_monitor): {reason}",
+            "exit": f"{price:.2f}",
+        }
+        # inside the transaction: the state change and its event land together
+        open_journal(apply.JOURNAL_PATH).record("events", row, legacy_csv=apply.CSV_PATH)
+    return row
+
+
+def run(
+    symbol: str,
+    url: str,
+    feed: str = "kline",
+    tp_arm_r: float = TP_ARM_R,
+    intrabar_force: bool = False,
+    poll_s: float = POLL_S,
+) -> None:
+    stream: Optional[kline_stream.KlineStream] = None
+
+    def load_position() -> Optional[dict]:
+        return apply.load_state(symbol).get("position")
+
+    def close(w: Watch, price: float, reason: str, ts_ms: int) -> Optional[dict]:
+        t0 = time.perf_counter()
+        ind = mon.chain.peek(price) if mon.chain_ts is not None else (None,)
+        row = close_position(symbol, w, price, reason, ts_ms, None if None in ind else ind, mon.biases(price))
+        if row is None:
+            return None
+        now_ms = int(time.time() * 1000)
+        print(
+            "TELEGRAM: [{sym} 15m] CLOSE {side} | Price={p:.2f} | Reason: {r} | CandleUTC={cts}".format(
+                sym=symbol, side=row["side"], p=price, r=reason, cts=row["snapshot_candle_ts_utc"]
+            ),
+            flush=True,
+        )
+        info = {
+            "event_id": row["event_id"],
+            "trigger_ts_utc": snapshot_mtf.iso_utc(ts_ms),
+            "exit": price,
+            "reason": reason,
+            "close_ms": round((time.perf_counter() - t0) * 1000.0, 3),
+            "trigger_to_journal_ms": now_ms - ts_ms,
+        }
+        print("EXIT: " + json.dumps(info, ensure_ascii=False), file=sys.stderr, flush=True)
+        return info
+
+    mon = ExitMonitor(
+        symbol,
+        close,
+        load_position,
+        tp_arm_r=tp_arm_r,
+        intrabar_force=intrabar_force,
+        poll_s=poll_s,
+        chains_path=bot.INDICATOR_STATE_PATH,
+    )
+
+    def on_close(tf: str, s: kline_stream.KlineStream) -> None:
+        if tf != "15m":
+            return
+        buf = s.buffers["15m"]
+        row = buf.last_closed()
+        # the window cron_15m_bot.run_stream decides on at this close
+        mon.sync_chain(s.window("15m", int(row[6]) + 1))
+        mon.on_15m_close(float(row[4]), int(row[6]) + 1)
+
+    def on_update(tf: str, row: list, closed: bool) -> None:
+        if mon.chain_ts is None and stream is not None:
+            # first event after the REST seed: warm the 15m chain once
+            mon.sync_chain(stream.window("15m", int(time.time() * 1000)))
+        mon.on_kline(tf, row, closed)
+
+    cache = KlineCache(bot.KLINE_CACHE_DIR, snapshot_mtf.fetch_klines)
+    stream = kline_stream.KlineStream(
+        symbol,
+        TFS,
+        bot.LIMIT,
+        on_close,
+        url=url,
+        cache=cache,
+        on_update=on_update,
+        on_trade=mon.on_trade if feed == "trade" else None,
+    )
+    mon.refresh(force=True)
+    try:
+        stream.run()
+    except KeyboardInterrupt:
+        stream.stop()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--symbol", default=bot.SYMBOL)
+    ap.add_argument("--stream-url", default=kline_stream.STREAM_URL)
+    ap.add_argument("--feed", choices=["kline", "trade"], default="kline", help="SL ticks from 1m kline updates or aggTrade")
+    ap.add_argument("--tp-arm-r", type=float, default=TP_ARM_R, help="arm the adaptive TP at this open R without a tp_ref (0 = tp_ref only)")
+    ap.add_argument("--intrabar-force", action="store_true", help="also evaluate bad force / adaptive TP on each 1m close")
+    ap.add_argument("--poll-s", type=float, default=POLL_S, help="re-read the position from state.db this often")
+    args = ap.parse_args()
+
+    run(args.symbol, args.stream_url, args.feed, args.tp_arm_r, args.intrabar_force, args.poll_s)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,12 @@
 #!/usr/bin/env python3
-"""Append a strategy DECISION/PLAN row to trading/decisions.csv.
+"""Record a strategy DECISION/PLAN row in the journal (journal.py "decisions").
 
 This logs what the assistant *planned* at decision time (even if no real order was placed).
-It is intentionally separate from executed trade logs.
+It is intentionally separate from executed trade logs. Same columns as the old
+trading/decisions.csv (imported on first write); re-running with the same
+--decision-id is a no-op. Query / export:
+  python3 skills/trading-bot/scripts/journal.py query decisions --action OPEN
+  python3 skills/trading-bot/scripts/journal.py export decisions --out trading/decisions.csv
 
 Usage:
   python3 trading/log_decision.py --decision-id ... --symbol BTCUSDT --side SHORT \
@@ -14,39 +18,16 @@ Usage:
 """
 
 import argparse
-import csv
+import sys
 from datetime import datetime
 from pathlib import Path
 
-HEADERS = [
-    "decision_id",
-    "decided_at_local",
-    "symbol",
-    "side",
-    "tf_trigger",
-    "setup",
-    "entry_trigger",
-    "sl",
-    "balance_usdt",
-    "risk_pct_balance",
-    "risk_usdt",
-    "position_size_base",
-    "notes",
-    "snapshot_ts_utc",
-    "price_snapshot",
-    "outcome",
-    "closed_at_local",
-    "exit",
-    "realized_pnl_usdt",
-]
+WORKSPACE = Path(__file__).resolve().parents[1]
+CSV_PATH = WORKSPACE / "trading" / "decisions.csv"  # legacy log, imported into the journal
+JOURNAL_PATH = WORKSPACE / "trading" / "journal.db"
 
-
-def ensure_file(path: Path):
-    path.parent.mkdir(parents=True, exist_ok=True)
-    if not path.exists():
-        with path.open("w", newline="", encoding="utf-8") as f:
-            w = csv.writer(f)
-            w.writerow(HEADERS)
+sys.path.insert(0, str(WORKSPACE / "skills" / "trading-bot" / "scripts"))
+from journal import open_journal  # noqa: E402
 
 
 def main():
@@ -73,9 +54,6 @@ def main():
     if risk_usdt is None:
         risk_usdt = args.balance * (args.risk_pct / 100.0)
 
-    out = Path(__file__).resolve().parent / "decisions.csv"
-    ensure_file(out)
-
     row = {
         "decision_id": args.decision_id,
         "decided_at_local": args.decided_at_local,
@@ -98,11 +76,10 @@ def main():
         "realized_pnl_usdt": "",
     }
 
-    with out.open("a", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(f, fieldnames=HEADERS)
-        w.writerow(row)
-
-    print(f"Appended decision → {out}")
+    if open_journal(JOURNAL_PATH).record("decisions", row, legacy_csv=CSV_PATH):
+        print(f"Recorded decision {args.decision_id} → {JOURNAL_PATH}")
+    else:
+        print(f"Decision {args.decision_id} already recorded → {JOURNAL_PATH}")
 
 
 if __name__ == "__main__":
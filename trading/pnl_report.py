@@ -0,0 +1,607 @@
+#!/usr/bin/env python3
+"""Realized / unrealized PnL, R-multiples, win rate and drawdown from the journal.
+
+Sources (journal.py, trading/journal.db):
+- events: the 15m bot position (cron_15m_bot.py + apply_15m_decision.py)
+  and the portfolio positions (portfolio_15m.py, --portfolio). OPEN/CLOSE
+  rows are paired per position_id, else per symbol, in journal order. The exit is the
+  stored SL if a 15m candle touched it in between (fill at SL, or at the open
+  on a gap, as in backtest_15m.py), else the CLOSE row's exit column, else
+  the open of the CLOSE candle (the price the bot decided on; rows journaled
+  before exit was recorded). Setup = "bot_<tf_manage>" ("portfolio_<tf_manage>"
+  for portfolio rows).
+- decisions: plans from log_decision.py. The entry level is parsed from
+  entry_trigger ("~83920", else its last number), SL / size from the first
+  number of their text. Filled when a candle after the decision trades
+  through the entry, then closed at the SL the same way.
+- trades: executed trades (trades.csv schema), filled at entry.
+
+Backfill: decisions get outcome PROFIT_UNREALIZED / LOSS_UNREALIZED while
+open and PROFIT / LOSS plus exit / closed_at_local / realized_pnl_usdt once
+closed (an exit typed in by hand is kept, only the PnL is filled in); trades
+get unrealized_pnl_usdt refreshed, or the same closing columns. Outcomes
+other than OPEN / *_UNREALIZED are never overwritten.
+
+Incremental: events are read with journal.scan() from the last seq in the
+checkpoint (trading/cache/pnl_checkpoint.json), which also holds the open
+positions, per-symbol / per-setup running stats and how far each open
+position was checked against the klines; a daily run only touches the rows
+and candles since the previous one. Decisions / trades are edited in place,
+so they are streamed again every run (human-scale tables); only unsettled
+rows are checked against klines, from where the last run stopped. Prices come
+from the shared kline store (trading/cache/klines, no requests); --fetch pulls
+missing older 15m history from REST for the run.
+
+Example:
+  python3 trading/pnl_report.py
+  python3 trading/pnl_report.py --rebuild --fetch --show-closed
+  python3 trading/pnl_report.py --dry-run --no-sl
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import sys
+import time
+from bisect import bisect_left
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Optional
+
+import cron_15m_bot as bot
+
+sys.path.insert(0, str(bot.SCRIPTS_DIR))
+import kline_cache  # noqa: E402
+import snapshot_mtf  # noqa: E402
+from candle_series import iso_utc  # noqa: E402
+from journal import KINDS, open_journal  # noqa: E402
+from state_store import export_json  # noqa: E402
+
+CHECKPOINT_PATH = bot.WORKSPACE / "trading" / "cache" / "pnl_checkpoint.json"
+CHECKPOINT_VERSION = 1
+INTERVAL = "15m"
+STEP_MS = kline_cache.interval_ms(INTERVAL)
+
+# outcomes the report may rewrite (log_decision.py writes OPEN)
+PROVISIONAL = {"", "OPEN", "PROFIT_UNREALIZED", "LOSS_UNREALIZED"}
+
+_NUM = re.compile(r"-?\d+(?:\.\d+)?")
+_TILDE_NUM = re.compile(r"~\s*(-?\d+(?:\.\d+)?)")
+
+
+def parse_ms(ts: str) -> Optional[int]:
+    if not ts:
+        return None
+    try:
+        return int(datetime.fromisoformat(ts).timestamp() * 1000)
+    except ValueError:
+        return None
+
+
+def parse_local_ms(text: str) -> Optional[int]:
+    try:
+        return int(datetime.strptime(text.strip(), "%Y-%m-%d %H:%M").timestamp() * 1000)
+    except ValueError:
+        return None
+
+
+def local_str(ms: int) -> str:
+    """Same format as decided_at_local / opened_at_local."""
+    return datetime.fromtimestamp(ms / 1000).strftime("%Y-%m-%d %H:%M")
+
+
+def first_number(text: str) -> Optional[float]:
+    m = _NUM.search(text or "")
+    return float(m.group()) if m else None
+
+
+def entry_level(text: str) -> Optional[float]:
+    """Entry price of a trigger like "15m close < 83930 (sell-stop ~83920)"."""
+    m = _TILDE_NUM.search(text or "")
+    if m:
+        return float(m.group(1))
+    nums = _NUM.findall(text or "")
+    return float(nums[-1]) if nums else None
+
+
+def pnl_of(side: str, entry: float, price: float, size: float) -> float:
+    return (-1.0 if side == "SHORT" else 1.0) * (price - entry) * size
+
+
+def r_of(pnl: float, entry: float, sl: Optional[float], size: float) -> Optional[float]:
+    risk = abs(entry - sl) * size if sl is not None else 0.0
+    return pnl / risk if risk > 0 else None
+
+
+class Prices:
+    """15m candles per symbol from the kline store, loaded once per run.
+
+    Rows are the closed candles plus the live one (its close is the mark).
+    With `fetch`, history older than the store is pulled from REST on demand.
+    """
+
+    def __init__(self, cache_dir: Path | str, fetch=None):
+        self.cache = kline_cache.KlineCache(cache_dir, fetch)
+        self.fetch = fetch
+        self.series: dict[str, tuple[list[int], list[list]]] = {}
+        self.fetched_from: dict[str, int] = {}
+
+    def rows(self, symbol: str, from_ms: Optional[int] = None) -> tuple[list[int], list[list]]:
+        hit = self.series.get(symbol)
+        if hit is None:
+            entry = self.cache.load_entry(symbol, INTERVAL)
+            rows = (entry.get("klines") or []) + (entry.get("live") or [])
+            hit = self.series[symbol] = ([int(k[0]) for k in rows], rows)
+        ts, rows = hit
+        if self.fetch is not None and from_ms is not None and from_ms < self.fetched_from.get(symbol, ts[0] if ts else from_ms + 1):
+            start = from_ms // STEP_MS * STEP_MS
+            older = self._fetch_range(symbol, start, ts[0] if ts else None)
+            self.fetched_from[symbol] = start
+            if older:
+                rows = older + rows
+                hit = self.series[symbol] = ([int(k[0]) for k in rows], rows)
+        return hit
+
+    def _fetch_range(self, symbol: str, start_ms: int, stop_ms: Optional[int]) -> list[list]:
+        out: list[list] = []
+        while stop_ms is None or start_ms < stop_ms:
+            end = None if stop_ms is None else stop_ms - 1
+            page = self.fetch(symbol, INTERVAL, kline_cache.MAX_PAGE, start_ms=start_ms, end_ms=end)
+            out.extend(page)
+            if len(page) < kline_cache.MAX_PAGE:
+                break
+            start_ms = int(page[-1][0]) + STEP_MS
+        return out
+
+    def open_at(self, symbol: str, ts_ms: int) -> Optional[float]:
+        """Open of the candle starting at ts_ms (the bot's decision price)."""
+        ts, rows = self.rows(symbol, ts_ms)
+        i = bisect_left(ts, ts_ms)
+        return float(rows[i][1]) if i < len(ts) and ts[i] == ts_ms else None
+
+    def mark(self, symbol: str) -> Optional[tuple[int, float]]:
+        ts, rows = self.rows(symbol)
+        return (ts[-1], float(rows[-1][4])) if ts else None
+
+    def touch(self, symbol: str, level: float, up: bool, from_ms: int, to_ms: Optional[int] = None) -> tuple[Optional[tuple[int, float]], int]:
+        """First candle in [from_ms, to_ms) trading through `level`.
+
+        up: high >= level (fill max(open, level)), else low <= level (fill
+        min(open, level)). Returns ((candle ts, fill) or None, checked_to_ms);
+        the live candle is checked but not counted as done, so the next call
+        looks at it again.
+        """
+        ts, rows = self.rows(symbol, from_ms)
+        if not ts:
+            return None, from_ms
+        i = bisect_left(ts, from_ms)
+        checked = from_ms
+        while i < len(ts) and (to_ms is None or ts[i] < to_ms):
+            k = rows[i]
+            o = float(k[1])
+            if up and float(k[2]) >= level:
+                return (ts[i], max(o, level)), ts[i]
+            if not up and float(k[3]) <= level:
+                return (ts[i], min(o, level)), ts[i]
+            if i < len(ts) - 1:
+                checked = ts[i] + STEP_MS
+            i += 1
+        return None, checked
+
+
+class Stats:
+    """Running stats of closed trades in journal order (a checkpointable dict)."""
+
+    FIELDS = ("trades", "wins", "losses", "pnl", "gross_win", "gross_loss", "r_sum", "r_n", "equity", "peak", "max_dd")
+
+    def __init__(self, doc: Optional[dict] = None):
+        self.d = {f: 0 for f in self.FIELDS}
+        self.d.update(doc or {})
+
+    def add(self, pnl: float, r: Optional[float]) -> None:
+        d = self.d
+        d["trades"] += 1
+        if pnl > 0:
+            d["wins"] += 1
+            d["gross_win"] += pnl
+        else:
+            d["losses"] += 1
+            d["gross_loss"] -= pnl
+        d["pnl"] += pnl
+        if r is not None:
+            d["r_sum"] += r
+            d["r_n"] += 1
+        # drawdown of the realized equity curve (cumulative PnL of this group)
+        d["equity"] += pnl
+        d["peak"] = max(d["peak"], d["equity"])
+        d["max_dd"] = max(d["max_dd"], d["peak"] - d["equity"])
+
+    def report(self, open_pos: Iterable[dict] = ()) -> dict:
+        d = self.d
+        open_pos = list(open_pos)
+        marked = [p["unrealized_usdt"] for p in open_pos if p.get("unrealized_usdt") is not None]
+        return {
+            "trades": d["trades"],
+            "wins": d["wins"],
+            "losses": d["losses"],
+            "win_rate": round(d["wins"] / d["trades"], 4) if d["trades"] else None,
+            "realized_pnl_usdt": round(d["pnl"], 2),
+            "avg_r": round(d["r_sum"] / d["r_n"], 3) if d["r_n"] else None,
+            "profit_factor": round(d["gross_win"] / d["gross_loss"], 3) if d["gross_loss"] > 0 else None,
+            "max_drawdown_usdt": round(d["max_dd"], 2),
+            "open": len(open_pos),
+            "unrealized_pnl_usdt": round(sum(marked), 2),
+        }
+
+
+class Book:
+    """Stats per total / symbol / setup for one source."""
+
+    def __init__(self, doc: Optional[dict] = None, keep_closed: bool = False):
+        self.groups = {k: Stats(v) for k, v in (doc or {}).items()}
+        self.keep_closed = keep_closed
+        self.closed: list[dict] = []  # only with keep_closed: a rebuild stays flat in memory
+        self.closed_now = 0
+        self.unpriced = 0  # rows without the numbers / candles to price them
+        self.pending = 0  # decisions whose entry has not traded yet
+
+    def add(self, trade: dict, new: bool = True) -> None:
+        """One closed trade; new=False for rows already settled in an earlier run."""
+        for key in ("total", f"symbol:{trade['symbol']}", f"setup:{trade['setup']}"):
+            self.groups.setdefault(key, Stats()).add(trade["pnl_usdt"], trade["r"])
+        if new:
+            self.closed_now += 1
+            if self.keep_closed:
+                self.closed.append(trade)
+
+    def doc(self) -> dict:
+        return {k: s.d for k, s in self.groups.items()}
+
+    def report(self, open_pos: list[dict]) -> dict:
+        def group(key: str) -> list[dict]:
+            if key == "total":
+                return open_pos
+            dim, _, val = key.partition(":")
+            return [p for p in open_pos if p.get(dim) == val]
+
+        keys = set(self.groups) | {"total"} | {f"symbol:{p['symbol']}" for p in open_pos} | {f"setup:{p['setup']}" for p in open_pos}
+        out: dict = {"total": None, "by_symbol": {}, "by_setup": {}}
+        for key in sorted(keys):
+            rep = self.groups.get(key, Stats()).report(group(key))
+            if key == "total":
+                out["total"] = rep
+            else:
+                dim, _, val = key.partition(":")
+                out["by_" + dim][val] = rep
+        out["open"] = open_pos
+        out["closed_this_run"] = self.closed_now
+        if self.keep_closed:
+            out["closed"] = self.closed
+        if self.unpriced:
+            out["unpriced"] = self.unpriced
+        if self.pending:
+            out["pending"] = self.pending
+        return out
+
+
+def _trade(symbol: str, setup: str, side: str, entry: float, sl: Optional[float], size: float, exit_price: float, **extra) -> dict:
+    pnl = pnl_of(side, entry, exit_price, size)
+    r = r_of(pnl, entry, sl, size)
+    return {
+        "symbol": symbol,
+        "setup": setup,
+        "side": side,
+        "entry": entry,
+        "sl": sl,
+        "size": size,
+        "exit": exit_price,
+        "pnl_usdt": round(pnl, 4),
+        "r": None if r is None else round(r, 3),
+        **extra,
+    }
+
+
+def _marked(p: dict, prices: Prices) -> dict:
+    out = dict(p)
+    m = prices.mark(p["symbol"])
+    if m is None:
+        out["mark"] = out["unrealized_usdt"] = out["r"] = None
+        return out
+    out["mark_ts_utc"] = iso_utc(m[0])
+    out["mark"] = m[1]
+    pnl = pnl_of(p["side"], p["entry"], m[1], p["size"])
+    out["unrealized_usdt"] = round(pnl, 4)
+    r = r_of(pnl, p["entry"], p.get("sl"), p["size"])
+    out["r"] = None if r is None else round(r, 3)
+    return out
+
+
+def replay_events(journal, ck: dict, prices: Prices, use_sl: bool, show_closed: bool = False) -> tuple[Book, list[dict], dict]:
+    """Pair OPEN/CLOSE events after the checkpointed seq; updates `ck` in place."""
+    ev = ck["events"]
+    book = Book(ev["groups"], show_closed)
+    open_pos: dict = ev["open"]
+    stopped: dict = ev.setdefault("stopped", {})  # position key -> OPEN event_id closed at its SL, CLOSE not seen yet
+    first = last = ev["seq"]
+    orphans = 0
+
+    def close(pos: dict, close_ms: Optional[int], price: Optional[float], reason: str, touched: bool = False) -> None:
+        """touched: the SL was already checked up to close_ms (the fill is the hit)."""
+        if use_sl and not touched and pos.get("sl") is not None:
+            # stopped out before the CLOSE candle
+            hit, pos["checked_ms"] = prices.touch(pos["symbol"], pos["sl"], pos["side"] == "SHORT", pos["checked_ms"], close_ms)
+            if hit is not None:
+                close_ms, price, reason = hit[0], hit[1], "SL hit"
+        if price is None:
+            book.unpriced += 1
+            return
+        book.add(
+            _trade(
+                pos["symbol"],
+                pos["setup"],
+                pos["side"],
+                pos["entry"],
+                pos.get("sl"),
+                pos["size"],
+                price,
+                opened_ts_utc=pos["opened_ts_utc"],
+                closed_ts_utc=None if close_ms is None else iso_utc(close_ms),
+                reason=reason,
+                event_id=pos["event_id"],
+            )
+        )
+
+    for seq, row in journal.scan("events", ev["seq"]):
+        last = seq
+        action, symbol = row["action"], row["symbol"]
+        if action not in ("OPEN", "CLOSE"):
+            continue
+        # portfolio rows: one position per id (scale-ins); bot rows: one per symbol
+        key = row["position_id"] or symbol
+        setup = f"{'portfolio' if row['position_id'] else 'bot'}_{row['tf_manage'] or INTERVAL}"
+        ts_ms = parse_ms(row["snapshot_candle_ts_utc"])
+        entry, sl, size = first_number(row["entry"]), first_number(row["sl"]), first_number(row["size_btc"])
+        if action == "OPEN":
+            if entry is None or size is None or ts_ms is None:
+                book.unpriced += 1
+                continue
+            stopped.pop(key, None)
+            prev = open_pos.pop(key, None)
+            if prev is not None:
+                # a second OPEN without a CLOSE replaces the position (the state holds one)
+                close(prev, ts_ms, prices.open_at(symbol, ts_ms), "replaced by a new OPEN")
+            open_pos[key] = {
+                "symbol": symbol,
+                "setup": setup,
+                "side": row["side"] or "SHORT",
+                "entry": entry,
+                "sl": sl,
+                "size": size,
+                "opened_ts_utc": row["snapshot_candle_ts_utc"],
+                "checked_ms": ts_ms,
+                "event_id": row["event_id"],
+            }
+            continue
+        price = first_number(row["exit"])
+        if price is None and ts_ms is not None:
+            price = prices.open_at(symbol, ts_ms)
+        pos = open_pos.pop(key, None)
+        if pos is None and stopped.pop(key, None):
+            continue  # closed at the SL in an earlier run
+        if pos is None:
+            # OPEN not journaled (the log starts mid-trade)
+            if entry is None or size is None or not row["side"] or ts_ms is None:
+                orphans += 1
+                continue
+            # priced from the CLOSE row itself (the bot copies entry / sl / size into it)
+            pos = {"symbol": symbol, "setup": setup, "side": row["side"], "entry": entry, "sl": sl, "size": size, "opened_ts_utc": None, "event_id": None, "checked_ms": ts_ms}
+        close(pos, ts_ms, price, row["notes"])
+
+    # positions still open: stopped out since the last check?
+    for key in list(open_pos):
+        pos = open_pos[key]
+        if use_sl and pos.get("sl") is not None:
+            hit, pos["checked_ms"] = prices.touch(pos["symbol"], pos["sl"], pos["side"] == "SHORT", pos["checked_ms"])
+            if hit is not None:
+                del open_pos[key]
+                stopped[key] = pos["event_id"]
+                close(pos, hit[0], hit[1], "SL hit", touched=True)
+
+    ev["seq"] = last
+    ev["groups"] = book.doc()
+    marks = [_marked(p, prices) for p in open_pos.values()]
+    return book, marks, {"from_seq": first, "to_seq": last, "orphan_closes": orphans}
+
+
+def settle_rows(
+    journal, kind: str, ck: dict, prices: Prices, use_sl: bool, dry_run: bool, show_closed: bool = False
+) -> tuple[Book, list[dict], int]:
+    """Stream decisions / trades, settle the open ones against klines, backfill their columns."""
+    progress: dict = ck.setdefault(kind, {})
+    seen: dict = {}
+    book = Book(keep_closed=show_closed)
+    marks: list[dict] = []
+    updates: list[tuple[str, dict]] = []
+    is_decision = kind == "decisions"
+
+    for row in journal.query(kind):
+        rid, symbol = row[KINDS[kind].id], row["symbol"]
+        side = row["side"]
+        setup = row["setup"] or kind
+        sl = first_number(row["sl"])
+        if is_decision:
+            entry = entry_level(row["entry_trigger"])
+            size = first_number(row["position_size_base"])
+            outcome = row["outcome"]
+        else:
+            entry = first_number(row["entry"])
+            size = first_number(row["size_base"])
+            outcome = ""
+        if entry is None or size is None or side not in ("LONG", "SHORT"):
+            book.unpriced += 1
+            continue
+
+        exit_price = first_number(row["exit"])
+        if exit_price is not None:
+            # closed by hand: PnL filled in once, stats from the row
+            pnl = first_number(row["realized_pnl_usdt"])
+            new = pnl is None
+            if new:
+                pnl = pnl_of(side, entry, exit_price, size)
+                fields = {"realized_pnl_usdt": f"{pnl:.2f}"}
+                if not is_decision and row["unrealized_pnl_usdt"]:
+                    fields["unrealized_pnl_usdt"] = ""
+                if is_decision and outcome in PROVISIONAL:
+                    fields["outcome"] = "PROFIT" if pnl > 0 else "LOSS"
+                updates.append((rid, fields))
+            r = r_of(pnl, entry, sl, size)
+            book.add({"symbol": symbol, "setup": setup, "pnl_usdt": pnl, "r": r, "id": rid, "exit": exit_price}, new)
+            progress.pop(rid, None)
+            continue
+        if is_decision and outcome not in PROVISIONAL:
+            continue  # cancelled / settled by hand without an exit
+
+        start_ms = parse_ms(row["snapshot_ts_utc"])
+        if start_ms is None:
+            start_ms = parse_local_ms(row["decided_at_local" if is_decision else "opened_at_local"])
+        if start_ms is None:
+            book.unpriced += 1
+            continue
+        # the decision / fill was made inside its snapshot candle: look from the next one
+        st = progress.get(rid) or {"filled": not is_decision, "checked_ms": start_ms // STEP_MS * STEP_MS + STEP_MS}
+        seen[rid] = st
+
+        if not st["filled"]:
+            # stop / limit at the entry level: triggered from the side the price was on
+            ref = first_number(row["price_snapshot"])
+            up = entry > ref if ref is not None else side == "LONG"
+            hit, st["checked_ms"] = prices.touch(symbol, entry, up, st["checked_ms"])
+            if hit is None:
+                book.pending += 1
+                continue
+            # the SL check starts on the fill candle (worst case: both in one bar)
+            st.update(filled=True, fill=hit[1], checked_ms=hit[0])
+        entry = st.get("fill", entry)
+
+        hit = None
+        if use_sl and sl is not None:
+            hit, st["checked_ms"] = prices.touch(symbol, sl, side == "SHORT", st["checked_ms"])
+        if hit is not None:
+            pnl = pnl_of(side, entry, hit[1], size)
+            fields = {"exit": f"{hit[1]:.10g}", "closed_at_local": local_str(hit[0]), "realized_pnl_usdt": f"{pnl:.2f}"}
+            if is_decision:
+                fields["outcome"] = "PROFIT" if pnl > 0 else "LOSS"
+            else:
+                fields["unrealized_pnl_usdt"] = ""
+            updates.append((rid, fields))
+            book.add({"symbol": symbol, "setup": setup, "pnl_usdt": pnl, "r": r_of(pnl, entry, sl, size), "id": rid, **fields})
+            seen.pop(rid)
+            continue
+
+        pos = _marked({"id": rid, "symbol": symbol, "setup": setup, "side": side, "entry": entry, "sl": sl, "size": size}, prices)
+        marks.append(pos)
+        if pos["unrealized_usdt"] is None:
+            continue
+        if is_decision:
+            want = {"outcome": "PROFIT_UNREALIZED" if pos["unrealized_usdt"] > 0 else "LOSS_UNREALIZED"}
+            if outcome != want["outcome"]:
+                updates.append((rid, want))
+        else:
+            want = f"{pos['unrealized_usdt']:.2f}"
+            if row["unrealized_pnl_usdt"] != want:
+                updates.append((rid, {"unrealized_pnl_usdt": want}))
+
+    # applied after the read cursor is done (outcome is an indexed column)
+    if not dry_run:
+        for rid, fields in updates:
+            journal.update(kind, rid, fields)
+    ck[kind] = seen
+    return book, marks, len(updates)
+
+
+def load_checkpoint(path: Path | str, journal_path: str, use_sl: bool, rebuild: bool) -> tuple[dict, bool]:
+    fresh = {"version": CHECKPOINT_VERSION, "journal": journal_path, "use_sl": use_sl, "events": {"seq": 0, "open": {}, "groups": {}}}
+    if rebuild or not Path(path).exists():
+        return fresh, True
+    try:
+        ck = json.loads(Path(path).read_text(encoding="utf-8"))
+    except ValueError:
+        return fresh, True
+    if not isinstance(ck, dict) or (ck.get("version"), ck.get("journal"), ck.get("use_sl")) != (CHECKPOINT_VERSION, journal_path, use_sl):
+        return fresh, True
+    return ck, False
+
+
+def run(
+    journal_path: Path | str = bot.JOURNAL_PATH,
+    checkpoint: Path | str = CHECKPOINT_PATH,
+    cache_dir: Path | str = bot.KLINE_CACHE_DIR,
+    use_sl: bool = True,
+    fetch: bool = False,
+    rebuild: bool = False,
+    dry_run: bool = False,
+    show_closed: bool = False,
+) -> dict:
+    t0 = time.perf_counter()
+    journal = open_journal(journal_path)
+    ck, rebuilt = load_checkpoint(checkpoint, str(Path(journal_path).resolve()), use_sl, rebuild)
+    if ck["events"]["seq"] > journal.last_seq("events"):
+        # journal recreated / restored from an older copy
+        ck, rebuilt = load_checkpoint(checkpoint, str(Path(journal_path).resolve()), use_sl, True)
+    prices = Prices(cache_dir, snapshot_mtf.fetch_klines if fetch else None)
+
+    events, event_marks, meta = replay_events(journal, ck, prices, use_sl, show_closed)
+    sections = {"events": events.report(event_marks)}
+    backfilled = {}
+    for kind in ("decisions", "trades"):
+        book, marks, n = settle_rows(journal, kind, ck, prices, use_sl, dry_run, show_closed)
+        sections[kind] = book.report(marks)
+        backfilled[kind] = n
+
+    if not dry_run:
+        export_json(checkpoint, ck)
+    return {
+        "module": "pnl_report",
+        "version": "0.1",
+        "as_of_utc": iso_utc(int(time.time() * 1000)),
+        **sections,
+        "backfilled": backfilled,
+        "meta": {
+            **meta,
+            "rebuilt": rebuilt,
+            "use_sl": use_sl,
+            "dry_run": dry_run,
+            "elapsed_ms": round((time.perf_counter() - t0) * 1000.0, 3),
+        },
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--journal", default=str(bot.JOURNAL_PATH))
+    ap.add_argument("--checkpoint", default=str(CHECKPOINT_PATH))
+    ap.add_argument("--cache-dir", default=str(bot.KLINE_CACHE_DIR))
+    ap.add_argument("--no-sl", action="store_true", help="exit only on journaled CLOSE / exit (SL never fills)")
+    ap.add_argument("--fetch", action="store_true", help="fetch 15m history older than the kline store from REST")
+    ap.add_argument("--rebuild", action="store_true", help="ignore the checkpoint, replay the whole journal")
+    ap.add_argument("--dry-run", action="store_true", help="no journal backfill, checkpoint untouched")
+    ap.add_argument("--show-closed", action="store_true", help="list the trades closed in this run")
+    args = ap.parse_args()
+
+    out = run(
+        journal_path=args.journal,
+        checkpoint=args.checkpoint,
+        cache_dir=args.cache_dir,
+        use_sl=not args.no_sl,
+        fetch=args.fetch,
+        rebuild=args.rebuild,
+        dry_run=args.dry_run,
+        show_closed=args.show_closed,
+    )
+    print(json.dumps(out, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
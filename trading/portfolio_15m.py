@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""Per-candle update of every portfolio position from one batched price pull.
+
+Runs after each 15m close (cron at minute 01/16/31/46 UTC, like
+cron_15m_bot.py) or stays resident with --daemon (wakes at each exchange 15m
+close). One cycle:
+- one /api/v3/ticker request for the symbols of all open positions
+  (portfolio.fetch_tickers): open / high / low / last over the window since
+  the previous cycle (15m when on schedule, wider after a gap, so no candle
+  goes unchecked); a gap beyond the 7d ticker window is read from 15m klines
+  instead (portfolio.fetch_kline_quotes, with a WARNING on stderr);
+- portfolio.mark(): positions whose SL traded are closed at the SL, the rest
+  marked to the last price; the portfolio halts new entries for the UTC day
+  once realized + unrealized loss reaches max_daily_loss_pct;
+- closes go to the journal as CLOSE events with exit and position_id.
+The positions are read before the request and updated in one state
+transaction on "portfolio:15m" (shared with apply_15m_decision.py
+--portfolio), so the HTTP round trip never holds the state lock.
+
+Output: one TELEGRAM line per close / halt, else NOOP. The positions with
+per-position and aggregate risk: skills/trading-bot/scripts/portfolio.py.
+
+Example:
+  python3 trading/portfolio_15m.py
+  python3 trading/portfolio_15m.py --daemon --timings
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import sys
+import time
+from typing import Optional
+
+import apply_15m_decision as apply
+import cron_15m_bot as bot
+
+sys.path.insert(0, str(bot.SCRIPTS_DIR))
+import portfolio  # noqa: E402
+import stage_timer  # noqa: E402
+from exchange_clock import ExchangeClock  # noqa: E402
+from journal import open_journal  # noqa: E402
+from kline_cache import interval_ms  # noqa: E402
+from snapshot_mtf import iso_utc  # noqa: E402
+
+STEP_15M = interval_ms("15m")
+WINDOW_DEFAULT = "15m"
+
+
+def window_since(last_update_ms: Optional[int], now_ms: int) -> Optional[str]:
+    """Smallest Binance ticker windowSize (1-59m, 1-23h, 1-7d) reaching back to the previous cycle.
+
+    None when the gap is longer than the largest window (7d): the caller reads klines instead.
+    """
+    if last_update_ms is None:
+        return WINDOW_DEFAULT
+    minutes = max(15, math.ceil((now_ms - last_update_ms) / 60_000) + 1)
+    if minutes <= 59:
+        return f"{minutes}m"
+    if minutes <= 23 * 60:
+        return f"{math.ceil(minutes / 60)}h"
+    if minutes * 60_000 > portfolio.TICKER_MAX_WINDOW_MS:
+        return None
+    return f"{math.ceil(minutes / 1440)}d"
+
+
+def fmt_price(x: float) -> str:
+    return f"{x:.8g}"
+
+
+def run_cycle(window: Optional[str] = None) -> list[str]:
+    """Fetch, mark and journal once; returns the output lines."""
+    now_ms = int(time.time() * 1000)
+    with stage_timer.stage("state.load"):
+        doc = apply.load_portfolio()
+    symbols = portfolio.Portfolio(doc).symbols()
+    quotes: dict = {}
+    window = window or window_since(doc.get("last_update_ms"), now_ms)
+    if symbols and window is None:
+        gap_d = (now_ms - doc["last_update_ms"]) / 86_400_000
+        print(f"WARNING: {gap_d:.1f}d since the last update is beyond the 7d ticker window; SL check over 15m klines", file=sys.stderr, flush=True)
+        with stage_timer.stage("fetch.klines"):
+            quotes = portfolio.fetch_kline_quotes(symbols, doc["last_update_ms"], now_ms)
+    elif symbols:
+        with stage_timer.stage("fetch.ticker"):
+            quotes = portfolio.fetch_tickers(symbols, window)
+
+    # the candle that just closed
+    candle_ts = iso_utc(now_ms // STEP_15M * STEP_15M - STEP_15M)
+    lines = []
+    with apply.portfolio_transaction() as doc:
+        book = portfolio.Portfolio(doc)
+        was_halted = bool(doc.get("halted"))
+        with stage_timer.stage("portfolio.mark"):
+            closed = book.mark(quotes, now_ms)
+        with stage_timer.stage("journal.append"):
+            journal = open_journal(apply.JOURNAL_PATH)
+            for c in closed:
+                row = apply.portfolio_event(doc, "CLOSE", c, candle_ts, c["reason"], exit_price=c["exit"])
+                journal.record("events", row, legacy_csv=apply.CSV_PATH)
+        agg = book.report()["aggregate"]
+        summary = "Portfolio: {n} open, risk {rp}% | Today {pnl:+.2f} USDT".format(
+            n=agg["open_positions"], rp=agg["open_risk_pct"], pnl=agg["realized_today_usdt"]
+        )
+        for c in closed:
+            lines.append(
+                "TELEGRAM: [{sym} 15m] CLOSE {side} {pid} | Price={p} | PnL={pnl:+.2f} USDT ({r}R) | Reason: {why} | {summary} | CandleUTC={cts}".format(
+                    sym=c["symbol"], side=c["side"], pid=c["id"], p=fmt_price(c["exit"]), pnl=c["pnl_usdt"], r=c["r"], why=c["reason"], summary=summary, cts=candle_ts
+                )
+            )
+        if doc.get("halted") and not was_halted:
+            lines.append(
+                "TELEGRAM: [PORTFOLIO] ⚠️ Daily loss cap {cap}% reached (loss {loss}%) | No new positions until 00:00 UTC | {summary}".format(
+                    cap=doc["max_daily_loss_pct"], loss=agg["daily_loss_pct"], summary=summary
+                )
+            )
+    return lines or ["NOOP"]
+
+
+def report_timings() -> None:
+    timings = stage_timer.end("portfolio_15m")
+    if timings is not None:
+        print("TIMINGS: " + json.dumps(timings, ensure_ascii=False), file=sys.stderr, flush=True)
+
+
+def run_once(window: Optional[str]) -> None:
+    stage_timer.begin()
+    try:
+        for line in run_cycle(window):
+            print(line, flush=True)
+    finally:
+        report_timings()
+
+
+def run_daemon(window: Optional[str], settle_s: float = bot.DAEMON_SETTLE_S) -> None:
+    """Resident mode: one cycle at each exchange 15m close (+settle_s)."""
+    clock = ExchangeClock(samples=3)
+    clock.sync()
+    try:
+        while True:
+            boundary = clock.next_boundary_ms("15m")
+            if not clock.sleep_until(boundary - bot.DAEMON_WARMUP_S * 1000):
+                return
+            clock.sync()
+            if not clock.sleep_until(boundary + int(settle_s * 1000)):
+                return
+            try:
+                run_once(window)
+            except Exception as e:
+                print(f"ERROR: {type(e).__name__}: {e}", file=sys.stderr, flush=True)
+    except KeyboardInterrupt:
+        pass
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--daemon", action="store_true", help="stay resident and run at each exchange 15m close")
+    ap.add_argument("--settle-s", type=float, default=bot.DAEMON_SETTLE_S, help="delay after the close (daemon)")
+    ap.add_argument("--window", default=None, help="ticker windowSize (default: since the previous cycle, at least 15m)")
+    stage_timer.add_arguments(ap)
+    args = ap.parse_args()
+    stage_timer.configure(args.timings, args.timings_log)
+
+    if args.daemon:
+        run_daemon(args.window, args.settle_s)
+        return
+    run_once(args.window)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""Walk-forward evaluation of the cron_15m_bot rules (module_trend_mtf Rule A/B entries/exits).
+
+Rolling folds over stored history: each fold fits the rule parameters on its
+in-sample (IS) window and scores the winner on the out-of-sample (OOS) window
+that follows; the next fold starts one OOS length later (--anchored keeps the
+IS start fixed). OOS windows never overlap, so the per-fold OOS equity curves
+stitch into one continuous curve.
+
+Parameters fitted in-sample (grid; defaults = the live bot):
+- Rule B band, "lo/hi" (live 40/60): STRONG_DOWN / STRONG_UP thresholds
+- close rule: flip (live since 2026-01-31) or balance (RSI 40-60 alone closes)
+- SL buffer above the pivot high (USDT) and pivot strength k
+
+Every fold also replays the live parameter set on its OOS window ("baseline"),
+so a rule tweak can be judged on data it was not fitted on.
+
+Work sharing: the per-bar RSI/EMA/WMA columns of every TF are computed once
+(backtest_15m.indicator_columns) and handed to each worker process once; the
+trend labels per band are classified once per worker (label_columns). Folds
+run in parallel and every IS candidate / OOS run is a backtest_15m.replay()
+over a bar range of those columns.
+
+History comes from backtest_15m.load_history over --cache-dir; the store is
+sized for --days, so a rerun only fetches the candles closed since the last
+one (none within the live-candle TTL). meta.history_s shows the load time.
+
+Example:
+  python3 trading/walkforward_15m.py --days 365 --is-days 90 --oos-days 30 \
+    --bands 40/60,35/65 --close-rules flip,balance --equity-csv /tmp/wf_equity.csv
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import math
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from typing import Optional
+
+import backtest_15m as bt
+import cron_15m_bot as bot
+
+sys.path.insert(0, str(bot.SCRIPTS_DIR))
+import indicators_vec  # noqa: E402
+
+BARS_PER_DAY = 96
+
+# per-process inputs set by init_worker (shared by every fold of the process)
+_SHARED: dict = {}
+
+
+def parse_list(spec: str, cast=float) -> list:
+    return [cast(x.strip()) for x in spec.split(",") if x.strip()]
+
+
+def param_grid(bands: str, close_rules: str, sl_buffers: str, pivot_ks: str) -> list[dict]:
+    out = []
+    for band, rule, buf, k in product(
+        parse_list(bands, str), parse_list(close_rules, str), parse_list(sl_buffers), parse_list(pivot_ks, int)
+    ):
+        lo, _, hi = band.partition("/")
+        if rule not in ("flip", "balance"):
+            raise ValueError(f"unknown close rule: {rule}")
+        out.append({"strong_lo": float(lo), "strong_hi": float(hi), "close_rule": rule, "sl_buffer": buf, "pivot_k": k})
+    return out
+
+
+def make_folds(first: int, n: int, is_bars: int, oos_bars: int, anchored: bool = False, min_oos: int = BARS_PER_DAY) -> list[tuple]:
+    """(is_start, is_stop, oos_stop) bar ranges; the last OOS may be shorter (>= min_oos bars)."""
+    folds = []
+    is_stop = first + is_bars
+    while is_stop + min_oos <= n:
+        is_start = first if anchored else is_stop - is_bars
+        folds.append((is_start, is_stop, min(is_stop + oos_bars, n)))
+        is_stop += oos_bars
+    return folds
+
+
+def score(st: dict, objective: str) -> float:
+    if objective == "return":
+        return st["return_pct"]
+    if objective == "calmar":
+        return st["return_pct"] / max(st["max_drawdown_pct"], 1e-9)
+    return st["avg_r"] if st["avg_r"] is not None else -math.inf
+
+
+def init_worker(candles, cols, cfg: dict) -> None:
+    _SHARED.clear()
+    # label columns per Rule B band, built on first use and reused by every fold
+    _SHARED.update(candles=candles, cols=cols, cfg=cfg, labels={})
+
+
+def run_fold(fold: tuple[int, tuple]) -> dict:
+    """Fit on IS, replay the winner and the live parameters on OOS."""
+    k, (is_start, is_stop, oos_stop) = fold
+    candles, cols, cfg = _SHARED["candles"], _SHARED["cols"], _SHARED["cfg"]
+
+    def run(params: dict, start: int, stop: int) -> dict:
+        band = (params["strong_lo"], params["strong_hi"])
+        if band not in _SHARED["labels"]:
+            _SHARED["labels"][band] = bt.label_columns(cols, *band)
+        return bt.replay(candles, cols, start, stop, params, labels=_SHARED["labels"][band], **cfg["replay"])
+
+    best: Optional[tuple[float, dict, dict]] = None
+    for params in cfg["grid"]:
+        st = run(params, is_start, is_stop)["stats"]
+        if st["trades"] < cfg["min_trades"]:
+            continue
+        s = score(st, cfg["objective"])
+        if best is None or s > best[0]:
+            best = (s, params, st)
+    fallback = best is None
+    if fallback:
+        params = dict(bt.DEFAULT_PARAMS)
+        is_stats = run(params, is_start, is_stop)["stats"]
+    else:
+        _, params, is_stats = best
+
+    oos = run(params, is_stop, oos_stop)
+    base = oos if params == bt.DEFAULT_PARAMS else run(bt.DEFAULT_PARAMS, is_stop, oos_stop)
+    return {
+        "fold": k,
+        "is_from_utc": candles[is_start]["ts_utc"],
+        "is_to_utc": candles[is_stop - 1]["ts_utc"],
+        "oos_from_utc": candles[is_stop]["ts_utc"],
+        "oos_to_utc": candles[oos_stop - 1]["ts_utc"],
+        "params": params,
+        "fallback": fallback,
+        "is_stats": is_stats,
+        "oos_stats": oos["stats"],
+        "baseline_oos_stats": base["stats"],
+        "_oos": oos,
+        "_base": base,
+    }
+
+
+def stitch(runs: list[dict], balance: float) -> tuple[list[dict], list[tuple[int, float]]]:
+    """Chain fold replays (each started at `balance`) into one OOS curve.
+
+    Sizing is proportional to the balance, so with compounding each fold is
+    rescaled exactly by (equity at the end of the previous fold / balance).
+    """
+    trades: list[dict] = []
+    equity: list[tuple[int, float]] = []
+    level = balance
+    for r in runs:
+        scale = level / balance
+        trades.extend(dict(t, pnl=t["pnl"] * scale, size_btc=t["size_btc"] * scale) for t in r["trades"])
+        equity.extend((ts, e * scale) for ts, e in r["equity"])
+        if equity:
+            level = equity[-1][1]
+    return trades, equity
+
+
+def walk_forward(
+    tf_klines: dict,
+    grid: list[dict],
+    is_days: int = 90,
+    oos_days: int = 30,
+    anchored: bool = False,
+    objective: str = "expectancy",
+    min_trades: int = 3,
+    procs: Optional[int] = None,
+    **replay_kw,
+) -> dict:
+    t0 = time.perf_counter()
+    candles, cols = bt.indicator_columns(tf_klines)
+    t_cols = time.perf_counter() - t0
+
+    window = replay_kw.get("window", bot.LIMIT)
+    rsi15 = cols["15m"][0]
+    first = next((i for i in range(window - 1, len(candles)) if not math.isnan(rsi15[i])), len(candles))
+    folds = make_folds(first, len(candles), is_days * BARS_PER_DAY, oos_days * BARS_PER_DAY, anchored)
+
+    cfg = {"grid": grid, "objective": objective, "min_trades": min_trades, "replay": replay_kw}
+    procs = max(1, min(procs or os.cpu_count() or 1, len(folds) or 1))
+    t1 = time.perf_counter()
+    if procs <= 1:
+        init_worker(candles, cols, cfg)
+        results = [run_fold(f) for f in enumerate(folds)]
+    else:
+        with ProcessPoolExecutor(max_workers=procs, initializer=init_worker, initargs=(candles, cols, cfg)) as pool:
+            results = list(pool.map(run_fold, enumerate(folds)))
+    t_folds = time.perf_counter() - t1
+
+    balance = replay_kw.get("balance", bot.BALANCE_USDT_DEFAULT)
+    fit_trades, fit_equity = stitch([r.pop("_oos") for r in results], balance)
+    base_trades, base_equity = stitch([r.pop("_base") for r in results], balance)
+    chosen = Counter(json.dumps(r["params"], sort_keys=True) for r in results)
+    return {
+        "folds": results,
+        "oos": {
+            "fitted": bt.stats(fit_trades, fit_equity, balance),
+            "baseline": bt.stats(base_trades, base_equity, balance),
+        },
+        "chosen_params": [{"params": json.loads(p), "folds": c} for p, c in chosen.most_common()],
+        "trades": fit_trades,
+        "equity": [(ts, e, b) for (ts, e), (_, b) in zip(fit_equity, base_equity)],
+        "meta": {"columns_s": round(t_cols, 3), "indicators": indicators_vec.backend_name(), "folds_s": round(t_folds, 3), "procs": procs, "candidates": len(grid)},
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--symbol", default=bot.SYMBOL)
+    ap.add_argument("--days", type=int, default=365)
+    ap.add_argument("--cache-dir", default=str(bot.KLINE_CACHE_DIR))
+    ap.add_argument("--is-days", type=int, default=90)
+    ap.add_argument("--oos-days", type=int, default=30)
+    ap.add_argument("--anchored", action="store_true", help="expanding IS window from the first bar")
+    ap.add_argument("--bands", default="40/60,35/65,45/55", help="Rule B lo/hi pairs")
+    ap.add_argument("--close-rules", default="flip,balance")
+    ap.add_argument("--sl-buffers", default="20,50")
+    ap.add_argument("--pivot-ks", default="2,3")
+    ap.add_argument("--objective", choices=["expectancy", "return", "calmar"], default="expectancy")
+    ap.add_argument("--min-trades", type=int, default=3, help="IS trades for a candidate to be eligible")
+    ap.add_argument("--balance", type=float, default=bot.BALANCE_USDT_DEFAULT)
+    ap.add_argument("--risk-pct", type=float, default=bot.RISK_PCT_DEFAULT)
+    ap.add_argument("--fee-pct", type=float, default=0.0, help="per side, in percent of notional")
+    ap.add_argument("--no-sl", action="store_true", help="exit only on bot CLOSE signals")
+    ap.add_argument("--procs", type=int, default=None, help="fold processes (default: cpu count)")
+    ap.add_argument("--trades-csv", default=None, help="stitched OOS trades of the fitted parameters")
+    ap.add_argument("--equity-csv", default=None, help="stitched OOS equity: fitted vs baseline")
+    indicators_vec.add_arguments(ap)
+    args = ap.parse_args()
+    indicators_vec.configure(args.indicators)
+
+    grid = param_grid(args.bands, args.close_rules, args.sl_buffers, args.pivot_ks)
+    t0 = time.perf_counter()
+    hist = bt.load_history(args.symbol, args.days, args.cache_dir)
+    t_hist = time.perf_counter() - t0
+    res = walk_forward(
+        hist,
+        grid,
+        is_days=args.is_days,
+        oos_days=args.oos_days,
+        anchored=args.anchored,
+        objective=args.objective,
+        min_trades=args.min_trades,
+        procs=args.procs,
+        balance=args.balance,
+        risk_pct=args.risk_pct,
+        fee_pct=args.fee_pct,
+        use_sl=not args.no_sl,
+    )
+
+    if args.trades_csv and res["trades"]:
+        with open(args.trades_csv, "w", newline="", encoding="utf-8") as f:
+            w = csv.DictWriter(f, fieldnames=list(res["trades"][0].keys()))
+            w.writeheader()
+            w.writerows(res["trades"])
+    if args.equity_csv:
+        with open(args.equity_csv, "w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f)
+            w.writerow(["ts_ms", "equity_fitted_usdt", "equity_baseline_usdt"])
+            w.writerows(res["equity"])
+
+    out = {
+        "module": "walkforward_15m",
+        "version": "0.1",
+        "symbol": args.symbol,
+        "bars_15m": len(hist["15m"]),
+        "is_days": args.is_days,
+        "oos_days": args.oos_days,
+        "anchored": args.anchored,
+        "objective": args.objective,
+        "folds": res["folds"],
+        "oos": res["oos"],
+        "chosen_params": res["chosen_params"],
+        "meta": {"history_s": round(t_hist, 3), **res["meta"]},
+    }
+    print(json.dumps(out, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()